@@ -0,0 +1,83 @@
+import hmac
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from fastapi import Header, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from principals import Principal, principal_cache
+
+SECRET_KEY = "supersecretkey"
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
+principal_cache.token_lifetime = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/signin")
+
+# Shared secret for /admin routes; they are disabled while it is unset.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+# python-jose is imported on first use rather than at worker boot; it is one
+# of the slowest imports in the app.
+
+def create_access_token(data: dict):
+    from jose import jwt
+
+    to_encode = data.copy()
+    now = datetime.now(timezone.utc)
+    to_encode.setdefault("iat", now)
+    to_encode.setdefault("exp", now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return encoded_jwt
+
+
+def token_for(user) -> str:
+    return create_access_token(data={"sub": user.email, "uid": user.id, "name": user.username})
+
+
+def resolve_token(token: str) -> Tuple[dict, Optional[Principal]]:
+    """Decode `token` and return its claims plus the principal, if it can be
+    resolved without the database. `(claims, None)` means the caller must
+    look the user up (legacy token, or user changed since issue)."""
+    from jose import JWTError, jwt
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception()
+    email = payload.get("sub")
+    if email is None:
+        raise credentials_exception()
+
+    user_id = payload.get("uid")
+    if user_id is None or principal_cache.changed_since(user_id, payload.get("iat")):
+        return payload, None
+    principal = principal_cache.get(user_id)
+    if principal is None and "name" in payload:
+        # Tokens carry everything a principal needs; no query required.
+        principal = Principal(user_id, email, payload["name"])
+        principal_cache.put(principal, payload.get("exp"))
+    return payload, principal
+
+
+def remember(user, payload: dict) -> Principal:
+    """Cache the principal for a user that had to be loaded from the DB."""
+    if user is None:
+        raise credentials_exception()
+    principal = Principal.from_user(user)
+    principal_cache.put(principal, payload.get("exp"))
+    return principal
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN or not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
@@ -0,0 +1,344 @@
+"""Load-test the backend against a synthetic dataset.
+
+Seeds a scratch database, then drives a weighted mix of browse, search,
+cart and login requests either in-process (TestClient) or against a local
+uvicorn. Reports p50/p95/p99 latency, requests per second and (in-process)
+SQL queries per request, and writes them to a JSON file:
+
+    python -m benchmarks.run --products 10000 --requests 2000 --out bench.json
+    python -m benchmarks.run --mode uvicorn --concurrency 16 --baseline bench.json
+
+With --baseline, each operation is compared against the stored results and
+the exit status is non-zero if any p95 regressed by more than --tolerance.
+Run from the backend directory.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import seed as seeding
+
+# Relative weights of each operation in the "mixed" workload
+WORKLOADS = {
+    "mixed": {"browse_category": 30, "browse_page": 15, "product_detail": 20, "search": 15,
+              "cart_get": 8, "cart_patch": 5, "favorites_get": 5, "login": 2},
+    "browse": {"browse_category": 40, "browse_page": 30, "product_detail": 30},
+    "search": {"search": 100},
+    "cart": {"cart_get": 50, "cart_patch": 40, "favorites_get": 10},
+    "login": {"login": 100},
+}
+
+SEARCH_TERMS = [w.lower()[:n] for w in seeding.NOUNS + seeding.ADJECTIVES for n in (3, 5)]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class Driver:
+    """Issues one operation at a time against a client with httpx's API."""
+
+    def __init__(self, client, products: int, users: int, rng: random.Random):
+        self.client = client
+        self.products = products
+        self.users = users
+        self.rng = rng
+        self.tokens = {}
+
+    def _auth(self, user_id):
+        token = self.tokens.get(user_id)
+        if token is None:
+            token = self._login(user_id).json()["access_token"]
+            self.tokens[user_id] = token
+        return {"Authorization": f"Bearer {token}"}
+
+    def _login(self, user_id):
+        return self.client.post("/auth/signin", json={
+            "email": f"user{user_id}@bench.local", "password": seeding.BENCH_PASSWORD,
+        })
+
+    def prepare(self, op):
+        """Do any setup (e.g. obtaining a token) outside the timed section."""
+        user_id = self.rng.randint(1, self.users)
+        if op in ("cart_get", "cart_patch", "favorites_get"):
+            return user_id, self._auth(user_id)
+        return user_id, None
+
+    def run(self, op, user_id, headers):
+        rng, client = self.rng, self.client
+        if op == "browse_category":
+            return client.get("/products", params={"category": rng.choice(seeding.CATEGORIES), "limit": 50})
+        if op == "browse_page":
+            return client.get("/products", params={
+                "sort": rng.choice(["price", "effective_price", "name"]), "order": rng.choice(["asc", "desc"]),
+                "discounted": rng.random() < 0.3, "limit": 50,
+            })
+        if op == "product_detail":
+            return client.get(f"/products/{rng.randint(1, self.products)}")
+        if op == "search":
+            return client.get("/products/search", params={"q": rng.choice(SEARCH_TERMS), "limit": 10})
+        if op == "cart_get":
+            return client.get("/cart", headers=headers)
+        if op == "cart_patch":
+            ops = [{"op": "add", "product_id": rng.randint(1, self.products), "quantity": 1}]
+            if rng.random() < 0.5:
+                ops.append({"op": "set", "product_id": rng.randint(1, self.products), "quantity": 0})
+            return client.patch("/cart", json={"operations": ops}, headers=headers)
+        if op == "favorites_get":
+            return client.get("/favorites", headers=headers)
+        if op == "login":
+            return self._login(user_id)
+        raise ValueError(op)
+
+
+class QueryCounter:
+    """Counts statements on the app's engine (in-process mode only).
+
+    Only statements run on behalf of a request count, going by the metrics
+    middleware's per-request context, so background work (the invalidation
+    listener, flushers, refreshes) is left out. The count is still shared by
+    all requests, so it is only attributed to an operation when requests are
+    issued one at a time.
+    """
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        import metrics
+
+        self.current_request = metrics.current_request
+        self.lock = threading.Lock()
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        if self.current_request() is None:
+            return
+        with self.lock:
+            self.count += 1
+
+    def take(self):
+        with self.lock:
+            count, self.count = self.count, 0
+        return count
+
+
+def run_workload(make_client, args, query_counter=None):
+    weights = WORKLOADS[args.workload]
+    ops, op_weights = list(weights), list(weights.values())
+    samples = defaultdict(list)
+    queries = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    per_worker = [args.requests // args.concurrency + (1 if i < args.requests % args.concurrency else 0)
+                  for i in range(args.concurrency)]
+
+    def worker(index):
+        rng = random.Random(args.seed + index)
+        with make_client() as client:
+            driver = Driver(client, args.products, args.users, rng)
+            for _ in range(per_worker[index]):
+                op = rng.choices(ops, op_weights)[0]
+                user_id, headers = driver.prepare(op)
+                if query_counter:
+                    query_counter.take()
+                start = time.perf_counter()
+                response = driver.run(op, user_id, headers)
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    samples[op].append(elapsed)
+                    if query_counter:
+                        queries[op].append(query_counter.take())
+                    if response.status_code >= 400:
+                        errors[op] += 1
+
+    # Warm up caches and connection pools before measuring
+    with make_client() as client:
+        driver = Driver(client, args.products, args.users, random.Random(args.seed))
+        for op in ops:
+            user_id, headers = driver.prepare(op)
+            driver.run(op, user_id, headers)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(worker, range(args.concurrency)))
+    wall = time.perf_counter() - started
+
+    results = {}
+    all_samples = []
+    for op in ops:
+        values = sorted(samples[op])
+        all_samples.extend(values)
+        if not values:
+            continue
+        results[op] = {
+            "count": len(values),
+            "errors": errors[op],
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+            "p99_ms": round(percentile(values, 99), 3),
+            "mean_ms": round(sum(values) / len(values), 3),
+            "queries_per_request": round(sum(queries[op]) / len(queries[op]), 2) if queries[op] else None,
+        }
+    all_samples.sort()
+    total = {
+        "count": len(all_samples),
+        "errors": sum(errors.values()),
+        "wall_s": round(wall, 3),
+        "rps": round(len(all_samples) / wall, 1) if wall else None,
+        "p50_ms": round(percentile(all_samples, 50), 3),
+        "p95_ms": round(percentile(all_samples, 95), 3),
+        "p99_ms": round(percentile(all_samples, 99), 3),
+    }
+    return {"operations": results, "total": total}
+
+
+# --- Modes ---
+
+def run_in_process(args):
+    from fastapi.testclient import TestClient
+
+    import main
+    import metrics
+    import models
+
+    counter = QueryCounter(models.engine) if args.concurrency == 1 and metrics.METRICS_ENABLED else None
+    # Enter the lifespan once; workers share the app but get their own clients.
+    with TestClient(main.app):
+        return run_workload(lambda: TestClient(main.app), args, counter)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_uvicorn(args):
+    import httpx
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(args.workers),
+         "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        deadline = time.time() + 30
+        while True:
+            try:
+                httpx.get(base_url + "/products/1", timeout=1)
+                break
+            except httpx.HTTPError:
+                if time.time() > deadline or server.poll() is not None:
+                    raise RuntimeError("uvicorn did not start")
+                time.sleep(0.2)
+        return run_workload(lambda: httpx.Client(base_url=base_url, timeout=30), args)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+# --- Baseline comparison ---
+
+def compare(results, baseline, tolerance):
+    """Print per-operation p95/rps deltas; return True if nothing regressed."""
+    ok = True
+    base_ops = baseline.get("results", {}).get("operations", {})
+    for op, current in results["operations"].items():
+        base = base_ops.get(op)
+        if not base:
+            print(f"{op:16s} (no baseline)")
+            continue
+        delta = (current["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0
+        flag = ""
+        if delta > tolerance:
+            ok = False
+            flag = "  REGRESSION"
+        print(f"{op:16s} p95 {base['p95_ms']:9.3f} -> {current['p95_ms']:9.3f} ms ({delta:+.1%}){flag}")
+    base_rps = baseline.get("results", {}).get("total", {}).get("rps")
+    if base_rps:
+        rps = results["total"]["rps"]
+        print(f"{'total':16s} rps {base_rps:9.1f} -> {rps:9.1f} ({(rps - base_rps) / base_rps:+.1%})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), default="mixed")
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--cart-items", type=int, default=10)
+    parser.add_argument("--favorites", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="database file to seed (default: a temp file)")
+    parser.add_argument("--reuse-db", action="store_true", help="skip seeding if --db already exists")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed p95 regression (fraction)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="smhome-bench-"), "bench.db")
+    url = f"sqlite:///{os.path.abspath(db_path)}"
+    # Must be set before the app's modules are imported
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("BCRYPT_ROUNDS", "12")
+    if args.mode == "inprocess":
+        # One process, so nothing to broadcast to, and no bus polling on the engine
+        os.environ.setdefault("INVALIDATION_BACKEND", "local")
+
+    dataset = None
+    if not (args.reuse_db and os.path.exists(db_path)):
+        dataset = seeding.seed(url, args.products, args.users, args.cart_items, args.favorites, args.seed,
+                               log=lambda msg: print(msg, file=sys.stderr))
+
+    results = run_in_process(args) if args.mode == "inprocess" else run_uvicorn(args)
+    report = {
+        "meta": {
+            "mode": args.mode,
+            "workload": args.workload,
+            "products": args.products,
+            "users": args.users,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers if args.mode == "uvicorn" else None,
+            "db_mode": os.getenv("DB_MODE", "sync"),
+            "dataset": dataset,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+    print(json.dumps(results["total"]))
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Synthetic catalog, users, carts and favorites for benchmarking.
+
+Rows are written with chunked executemany() inserts rather than the ORM so
+that seeding a million products stays practical. Run on its own with:
+
+    python -m benchmarks.seed --products 100000 --url sqlite:///./bench.db
+"""
+import argparse
+import json
+import random
+import time
+
+from sqlalchemy import create_engine, insert
+
+CATEGORIES = ["Living Room", "Bedroom", "Kitchen", "Bathroom"]
+NOUNS = ["Sofa", "Armchair", "Table", "Bed", "Wardrobe", "Shelf", "Lamp", "Mirror", "Cabinet",
+         "Desk", "Stool", "Rug", "Towel", "Comforter", "Dresser", "Bench", "Sideboard", "Vanity"]
+ADJECTIVES = ["Modern", "Rustic", "Cozy", "Compact", "Classic", "Nordic", "Oak", "Walnut", "Velvet",
+              "Linen", "Minimal", "Industrial", "Vintage", "Soft", "Sturdy"]
+COLORS = [("White", "#ffffff"), ("Black", "#000000"), ("Oak", "#c8a165"), ("Walnut", "#5c4033"),
+          ("Grey", "#808080"), ("Beige", "#f5f5dc"), ("Midnight Blue", "#1e3a8a"), ("Forest Green", "#166534")]
+IMAGE_URL = "https://www.ikea.com/us/en/images/products/{slug}-{color}__{n}_pe{m}_s5.jpg?f=xl"
+
+BENCH_PASSWORD = "benchpass"
+CHUNK = 10_000
+
+
+def _product(rng: random.Random, product_id: int) -> dict:
+    name = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {product_id}"
+    slug = name.lower().replace(" ", "-")
+    colors = []
+    for color_name, hex_code in rng.sample(COLORS, rng.randint(1, 4)):
+        color_slug = color_name.lower().replace(" ", "-")
+        images = [
+            IMAGE_URL.format(slug=slug, color=color_slug, n=rng.randint(100000, 1999999), m=rng.randint(100000, 999999))
+            for _ in range(rng.randint(1, 3))
+        ]
+        colors.append({"name": color_name, "hex": hex_code, "images": images})
+    return {
+        "id": product_id,
+        "name": name,
+        "price": round(rng.uniform(9, 2000), 2),
+        "image": colors[0]["images"][0],
+        "description": f"A {name.lower()} for everyday living, built to last and easy to care for.",
+        "category": rng.choice(CATEGORIES),
+        "discountPercent": rng.choice([None] * 4 + [10, 15, 20, 30]),
+        "colors": colors,
+    }
+
+
+def seed(url: str, products: int = 10_000, users: int = 100, cart_items: int = 10, favorites: int = 10,
+         seed_value: int = 42, log=print) -> dict:
+    """Create a fresh schema at `url` and fill it. Returns the row counts."""
+    # Imported here so DATABASE_URL can be set by the caller first
+    import listings
+    import models
+    import passwords
+    import search
+
+    rng = random.Random(seed_value)
+    engine = create_engine(url)
+    models.Base.metadata.drop_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS products_fts")
+    models.Base.metadata.create_all(engine)
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for start in range(1, products + 1, CHUNK):
+            rows = [_product(rng, i) for i in range(start, min(start + CHUNK, products + 1))]
+            conn.execute(insert(models.Product.__table__), rows)
+        listings.rebuild(conn)
+        log(f"seeded {products} products in {time.perf_counter() - started:.1f}s")
+
+        # One hash shared by every user keeps seeding fast; logins still pay full cost.
+        hashed = passwords.hash_password_sync(BENCH_PASSWORD)
+        conn.execute(insert(models.User.__table__), [
+            {"id": i, "email": f"user{i}@bench.local", "hashed_password": hashed, "username": f"user{i}"}
+            for i in range(1, users + 1)
+        ])
+
+        cart_rows, favorite_rows = [], []
+        for user_id in range(1, users + 1):
+            for product_id in rng.sample(range(1, products + 1), min(cart_items, products)):
+                cart_rows.append({"user_id": user_id, "product_id": product_id,
+                                  "quantity": rng.randint(1, 3), "selected_color": None, "color_key": ""})
+            for product_id in rng.sample(range(1, products + 1), min(favorites, products)):
+                favorite_rows.append({"user_id": user_id, "product_id": product_id})
+        if cart_rows:
+            conn.execute(insert(models.CartItem.__table__), cart_rows)
+        if favorite_rows:
+            conn.execute(insert(models.Favorite.__table__), favorite_rows)
+
+    search.init_search(engine)
+    engine.dispose()
+    log(f"seeding done in {time.perf_counter() - started:.1f}s")
+    return {"products": products, "users": users, "cart_items": len(cart_rows), "favorites": len(favorite_rows)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///./bench.db")
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--cart-items", type=int, default=10)
+    parser.add_argument("--favorites", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(seed(args.url, args.products, args.users, args.cart_items, args.favorites, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import json
+from typing import Any
+
+from sqlalchemy import delete
+
+import models
+from database import upsert_insert
+import schemas
+
+# Every cart line is unique per (user, product, color). `selected_color` is
+# free-form JSON and NULL never collides in a UNIQUE index, so the constraint
+# is on `color_key`, a normalized non-null text form of the color.
+
+def color_key(selected_color: Any) -> str:
+    if selected_color is None:
+        return ""
+    if isinstance(selected_color, dict) and selected_color.get("name"):
+        return str(selected_color["name"])
+    return json.dumps(selected_color, sort_keys=True, separators=(",", ":"))
+
+
+def _insert(dialect_name: str):
+    return upsert_insert(dialect_name, models.CartItem.__table__)
+
+
+def add_statement(dialect_name: str, user_id: int, product_id: int, quantity: int, selected_color: Any = None):
+    """Insert a line, or add `quantity` to the existing one, in one statement."""
+    stmt = _insert(dialect_name).values(
+        user_id=user_id,
+        product_id=product_id,
+        quantity=quantity,
+        selected_color=selected_color,
+        color_key=color_key(selected_color),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "product_id", "color_key"],
+        set_={"quantity": models.CartItem.__table__.c.quantity + stmt.excluded.quantity},
+    )
+
+
+def set_statement(dialect_name: str, user_id: int, product_id: int, quantity: int, selected_color: Any = None):
+    """Set a line's quantity outright; zero removes it."""
+    if quantity <= 0:
+        return remove_statement(user_id, product_id, selected_color)
+    stmt = _insert(dialect_name).values(
+        user_id=user_id,
+        product_id=product_id,
+        quantity=quantity,
+        selected_color=selected_color,
+        color_key=color_key(selected_color),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "product_id", "color_key"],
+        set_={"quantity": stmt.excluded.quantity},
+    )
+
+
+def remove_statement(user_id: int, product_id: int, selected_color: Any = None, any_color: bool = False):
+    stmt = delete(models.CartItem).where(
+        models.CartItem.user_id == user_id,
+        models.CartItem.product_id == product_id,
+    )
+    if not any_color:
+        stmt = stmt.where(models.CartItem.color_key == color_key(selected_color))
+    return stmt
+
+
+def operation_statement(dialect_name: str, user_id: int, op: schemas.CartOperation):
+    if op.op == "add":
+        return add_statement(dialect_name, user_id, op.product_id, op.quantity, op.selected_color)
+    if op.op == "set":
+        return set_statement(dialect_name, user_id, op.product_id, op.quantity, op.selected_color)
+    # A remove without a color drops every color of the product, like DELETE /cart/{id}
+    return remove_statement(user_id, op.product_id, op.selected_color, any_color=op.selected_color is None)
+
+
+def removed_event(product_id: int, selected_color: Any = None) -> dict:
+    """Data of a `cart.removed` event; no color means every color."""
+    return {"product_id": product_id, "selected_color": selected_color}
+
+
+def operation_events(operations, items) -> list:
+    """`(event type, data)` for each line the operations touched, given the
+    cart afterwards as `cart_item_dict`s; ordered by when each line was last
+    touched, so applying them in turn reproduces the final cart."""
+    lines = {(item["product"]["id"], color_key(item["selected_color"])): item for item in items}
+    changes = {}
+    for op in operations:
+        if op.op == "remove" and op.selected_color is None:
+            key, change = (op.product_id, None), ("cart.removed", removed_event(op.product_id))
+        else:
+            key = (op.product_id, color_key(op.selected_color))
+            line = lines.get(key)
+            change = ("cart.item", line) if line else ("cart.removed", removed_event(op.product_id, op.selected_color))
+        changes.pop(key, None)
+        changes[key] = change
+    return list(changes.values())
@@ -0,0 +1,171 @@
+import base64
+import json
+from typing import Optional
+
+from sqlalchemy import select, or_, and_
+
+import locales
+import models
+import schemas
+import serializers
+
+# Listings filter and sort on the `product_listings` read model so every
+# query is served from one of its indexes; products are joined by primary key
+# only for the rows on the page.
+Listing = models.ProductListing
+
+# Columns a listing may be ordered by. `id` is always appended as a tie-breaker
+# so the keyset cursor is unique even when names or prices repeat.
+SORT_COLUMNS = {
+    "id": Listing.product_id,
+    "name": Listing.name,
+    "price": Listing.price,
+    "effective_price": Listing.effective_price,
+}
+
+# JSON types a cursor's sort value may have for each sort; prices can be null
+SORT_VALUE_TYPES = {
+    "id": (int,),
+    "name": (str,),
+    "price": (float, int, type(None)),
+    "effective_price": (float, int, type(None)),
+}
+
+# Response field holding each sort key, for building the next cursor
+SORT_ATTRIBUTES = {
+    "id": "id",
+    "name": "name",
+    "price": "price",
+    "effective_price": "effectivePrice",
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# --- Cursor Encoding ---
+
+def encode_cursor(sort_value, product_id: int) -> str:
+    raw = json.dumps([sort_value, product_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str = "id"):
+    """Return `(sort_value, product_id)`; raises InvalidCursor for anything
+    encode_cursor() wouldn't have produced for `sort`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        decoded = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(decoded, list) or len(decoded) != 2:
+        raise InvalidCursor(cursor)
+    sort_value, product_id = decoded
+    # bool is an int subclass, but never a valid key
+    if type(product_id) is not int or isinstance(sort_value, bool) \
+            or not isinstance(sort_value, SORT_VALUE_TYPES[sort]):
+        raise InvalidCursor(cursor)
+    return sort_value, product_id
+
+
+# --- Listing Query ---
+
+def product_listing_query(
+    category: Optional[str] = None,
+    discounted: bool = False,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort: str = "id",
+    order: str = "asc",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+):
+    """Build the SELECT for one page of `/products`.
+
+    When `limit` is given, one extra row is fetched so the caller can tell
+    whether a further page exists (see `split_page`).
+    """
+    Product = models.Product
+    sort_col = SORT_COLUMNS[sort]
+    key_col = Listing.product_id
+    descending = order == "desc"
+
+    stmt = select(*serializers.PRODUCT_COLUMNS).join(Listing, Listing.product_id == Product.id)
+    if category:
+        stmt = stmt.where(Listing.category == category)
+    if discounted:
+        stmt = stmt.where(Listing.is_discounted.is_(True))
+    if min_price is not None:
+        stmt = stmt.where(Listing.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(Listing.price <= max_price)
+
+    # Prices can be null: those rows sort after every price (before, when
+    # descending), keyed on `(sort_col IS NULL, sort_col, id)`, since a
+    # comparison with NULL would match nothing and end the paging early
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort)
+        if sort == "id":
+            stmt = stmt.where(key_col < last_id if descending else key_col > last_id)
+        elif last_value is None and descending:
+            stmt = stmt.where(or_(and_(sort_col.is_(None), key_col < last_id), sort_col.is_not(None)))
+        elif last_value is None:
+            stmt = stmt.where(sort_col.is_(None), key_col > last_id)
+        elif descending:
+            stmt = stmt.where(or_(sort_col < last_value, and_(sort_col == last_value, key_col < last_id)))
+        else:
+            stmt = stmt.where(or_(
+                sort_col > last_value, and_(sort_col == last_value, key_col > last_id), sort_col.is_(None),
+            ))
+
+    if sort == "id":
+        stmt = stmt.order_by(key_col.desc() if descending else key_col.asc())
+    elif descending:
+        stmt = stmt.order_by(sort_col.is_(None).desc(), sort_col.desc(), key_col.desc())
+    else:
+        stmt = stmt.order_by(sort_col.is_(None).asc(), sort_col.asc(), key_col.asc())
+
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def split_page(products, sort: str, limit: Optional[int]):
+    """Trim the look-ahead product and return `(products, next_cursor)`."""
+    if limit is None or len(products) <= limit:
+        return products, None
+    products = products[:limit]
+    last = products[-1]
+    return products, encode_cursor(last[SORT_ATTRIBUTES[sort]], last["id"])
+
+
+# --- Serialization ---
+
+def product_query(product_id: int):
+    return select(*serializers.PRODUCT_COLUMNS).where(models.Product.id == product_id)
+
+
+def encode_products(products: list, shape: str = "full", locale: str = locales.DEFAULT_LOCALE, translations=()) -> bytes:
+    """Encode ProductResponse-shaped dicts in `locale`. `translations` are the
+    locale's locales.translations_query() rows for them; the default locale
+    needs none."""
+    settings = locales.registry.get(locale)
+    if settings is None:
+        return serializers.encode_products(products, shape)
+    return serializers.encode_products(locales.localize(products, settings, translations), shape, localized=True)
+
+
+def serialize_products(rows, shape: str = "full", locale: str = locales.DEFAULT_LOCALE, translations=()) -> bytes:
+    return encode_products([serializers.product_dict(row) for row in rows], shape, locale, translations)
+
+
+def serialize_product(row, locale: str = locales.DEFAULT_LOCALE, translations=()) -> bytes:
+    settings = locales.registry.get(locale)
+    if settings is None:
+        return serializers.encode_one(serializers.product_dict(row), schemas.ProductResponse)
+    product, = locales.localize([serializers.product_dict(row)], settings, translations)
+    return serializers.encode_one(product, schemas.LocalizedProductResponse)
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, NamedTuple, Optional
+
+from fastapi import Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+import invalidation
+import models
+
+# Entries kept; the least recently used go first
+CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "4096"))
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+
+    @classmethod
+    def of(cls, body: bytes) -> "CachedBody":
+        return cls(body, '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+class Uncacheable(Exception):
+    """Raised by a build whose body should be served but not kept, e.g. an
+    empty slice for a category the catalog doesn't have."""
+
+    def __init__(self, body: bytes):
+        super().__init__()
+        self.body = body
+
+
+class CatalogCache:
+    """Pre-serialized catalog responses, keyed by slice and tagged with the
+    catalog version they were built from.
+
+    Any committed product write bumps the version, which makes every entry
+    built from an older version a miss on its next lookup. At most
+    `max_size` entries are kept, so keys built from request values can't
+    grow the cache without bound.
+    """
+
+    def __init__(self, max_size: int = CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._version = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump(self) -> int:
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            return self._version
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self._version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, version: int, body: bytes) -> CachedBody:
+        cached = CachedBody.of(body)
+        with self._lock:
+            # A write that committed while `body` was being built has already
+            # bumped the version; don't let the stale bytes back in.
+            if version == self._version:
+                self._entries[key] = (version, cached)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return cached
+
+    def get_or_build(self, key: Hashable, build: Callable[[], bytes]) -> CachedBody:
+        cached = self.get(key)
+        if cached is None:
+            version = self._version
+            try:
+                cached = self.put(key, version, build())
+            except Uncacheable as uncached:
+                cached = CachedBody.of(uncached.body)
+        return cached
+
+    async def get_or_build_async(self, key: Hashable, build: Callable[[], Awaitable[bytes]]) -> CachedBody:
+        cached = self.get(key)
+        if cached is None:
+            version = self._version
+            try:
+                cached = self.put(key, version, await build())
+            except Uncacheable as uncached:
+                cached = CachedBody.of(uncached.body)
+        return cached
+
+
+catalog_cache = CatalogCache()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def cached_response(cached: CachedBody, if_none_match: Optional[str] = None, headers: Optional[dict] = None) -> Response:
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache", **(headers or {})}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+# --- Invalidation ---
+# Product writes only mark the session; the version is bumped once the
+# transaction commits so readers never cache rows that might be rolled back.
+# Bumps go through the invalidation bus so every worker drops its entries.
+
+INVALIDATION_TOPIC = "catalog"
+
+
+def invalidate():
+    invalidation.publish(INVALIDATION_TOPIC)
+
+
+invalidation.subscribe(INVALIDATION_TOPIC, lambda key: catalog_cache.bump())
+
+
+def _mark_catalog_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["catalog_dirty"] = True
+
+
+for _model in (models.Product, models.ProductTranslation):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _mark_catalog_dirty)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    if session.info.pop("catalog_dirty", False):
+        invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session):
+    session.info.pop("catalog_dirty", None)
@@ -0,0 +1,250 @@
+"""Bulk catalog import and export.
+
+Imports stream NDJSON or CSV, validate every record against
+schemas.ProductBase and upsert by id in chunked executemany() batches, so
+hundreds of thousands of products load in one pass without the ORM.
+Exports stream NDJSON straight off a server-side cursor.
+
+Records may carry `translations`, keyed by locale: {"fr": {"name": ...,
+"description": ..., "category": ...}}; each given locale's row is replaced.
+New products are stocked with orders.INITIAL_STOCK units.
+
+    python catalog_io.py import products.ndjson
+    python catalog_io.py import products.csv --format csv
+    python catalog_io.py export catalog.ndjson
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+from typing import IO, Dict, Iterable, Iterator, Optional
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import func, select
+
+import listings
+import models
+import orders
+import schemas
+import search
+from catalog_cache import invalidate as invalidate_catalog
+from database import upsert_insert
+
+BATCH_SIZE = 5_000
+# Rows per transaction; large transactions amortize the commit cost
+TRANSACTION_ROWS = 100_000
+MAX_REPORTED_ERRORS = 100
+
+PRODUCT_COLUMNS = ["id", "name", "price", "image", "description", "category", "discountPercent", "colors"]
+
+
+class CatalogImportError(Exception):
+    pass
+
+
+class TranslationImport(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+
+
+class ProductImport(schemas.ProductBase):
+    id: Optional[int] = None
+    translations: Optional[Dict[str, TranslationImport]] = None
+
+
+# --- Readers ---
+
+def read_ndjson(stream: IO[str]) -> Iterator[tuple]:
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as exc:
+            yield line_no, exc
+
+
+def read_csv(stream: IO[str]) -> Iterator[tuple]:
+    """CSV with a header row; `colors` and `translations` hold JSON as text."""
+    for line_no, row in enumerate(csv.DictReader(stream), 2):
+        row = {key: (value if value != "" else None) for key, value in row.items()}
+        try:
+            for column in ("colors", "translations"):
+                if row.get(column) is not None:
+                    row[column] = json.loads(row[column])
+        except ValueError as exc:
+            yield line_no, exc
+            continue
+        yield line_no, row
+
+
+READERS = {"ndjson": read_ndjson, "csv": read_csv}
+
+
+# --- Import ---
+
+def _write_batch(conn, batch: list):
+    table = models.Product.__table__
+    stmt = upsert_insert(conn.dialect.name, table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={column: stmt.excluded[column] for column in PRODUCT_COLUMNS if column != "id"},
+    )
+    translations = [
+        {"product_id": row["id"], "locale": locale.lower(), **fields}
+        for row in batch
+        for locale, fields in (row.pop("translations") or {}).items()
+    ]
+    conn.execute(stmt, batch)
+    if translations:
+        _write_translations(conn, translations)
+    conn.execute(orders.stock_missing_statement([row["id"] for row in batch]))
+    listings.refresh(conn, batch)
+    search.reindex(conn, [row["id"] for row in batch])
+
+
+def _write_translations(conn, translations: list):
+    stmt = upsert_insert(conn.dialect.name, models.ProductTranslation.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["product_id", "locale"],
+        set_={column: stmt.excluded[column] for column in ("name", "description", "category")},
+    )
+    conn.execute(stmt, translations)
+
+
+def import_products(engine, records: Iterable[tuple], batch_size: int = BATCH_SIZE,
+                    transaction_rows: int = TRANSACTION_ROWS, strict: bool = False) -> dict:
+    """Validate and upsert `(line_no, record)` pairs. Records without an id
+    are appended after the current highest id; a later record naming one of
+    those ids is rejected rather than overwriting it. Returns a summary
+    report."""
+    imported, skipped, errors = 0, 0, []
+    # Ids this import gave out, and the lines they went to
+    assigned: Dict[int, int] = {}
+    conn = engine.connect()
+    try:
+        trans = conn.begin()
+        search.suspend_triggers(conn)
+        next_id = (conn.execute(select(func.max(models.Product.id))).scalar() or 0) + 1
+        batch, in_transaction = [], 0
+
+        for line_no, record in records:
+            try:
+                if isinstance(record, Exception):
+                    raise ValueError(f"unreadable record: {record}")
+                product = ProductImport.model_validate(record)
+                if product.id in assigned:
+                    raise ValueError(f"id {product.id} was already given to the record on line {assigned[product.id]}")
+            except (ValidationError, ValueError) as exc:
+                if strict:
+                    raise CatalogImportError(f"line {line_no}: {exc}")
+                skipped += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"line": line_no, "error": str(exc)})
+                continue
+
+            row = product.model_dump()
+            if row["id"] is None:
+                row["id"] = next_id
+                assigned[next_id] = line_no
+            next_id = max(next_id, row["id"] + 1)
+            batch.append(row)
+
+            if len(batch) >= batch_size:
+                _write_batch(conn, batch)
+                imported += len(batch)
+                in_transaction += len(batch)
+                batch = []
+                if in_transaction >= transaction_rows:
+                    search.restore_triggers(conn)
+                    trans.commit()
+                    trans = conn.begin()
+                    search.suspend_triggers(conn)
+                    in_transaction = 0
+
+        if batch:
+            _write_batch(conn, batch)
+            imported += len(batch)
+        search.restore_triggers(conn)
+        trans.commit()
+    finally:
+        conn.close()
+        # Core writes bypass the ORM hooks, so invalidate explicitly
+        invalidate_catalog()
+    return {"imported": imported, "skipped": skipped, "errors": errors}
+
+
+# --- Export ---
+
+def export_products(engine, chunk_size: int = 1_000) -> Iterator[bytes]:
+    """Yield one NDJSON line per product, reading through a streaming cursor."""
+    table = models.Product.__table__
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(
+            select(*[table.c[column] for column in PRODUCT_COLUMNS]).order_by(table.c.id)
+        )
+        for rows in result.mappings().partitions():
+            translations = _translations_by_product(engine, [row["id"] for row in rows])
+            for row in rows:
+                record = dict(row)
+                if row["id"] in translations:
+                    record["translations"] = translations[row["id"]]
+                yield (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _translations_by_product(engine, product_ids: list) -> dict:
+    Translation = models.ProductTranslation
+    found = {}
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(Translation.product_id, Translation.locale, Translation.name, Translation.description,
+                   Translation.category).where(Translation.product_id.in_(product_ids))
+        )
+        for product_id, locale, name, description, category in rows:
+            found.setdefault(product_id, {})[locale] = {"name": name, "description": description, "category": category}
+    return found
+
+
+# --- CLI ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="upsert products from NDJSON/CSV ('-' for stdin)")
+    importer.add_argument("path")
+    importer.add_argument("--format", choices=sorted(READERS))
+    importer.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    importer.add_argument("--strict", action="store_true", help="abort on the first invalid record")
+
+    exporter = commands.add_parser("export", help="write the catalog as NDJSON ('-' for stdout)")
+    exporter.add_argument("path")
+
+    args = parser.parse_args(argv)
+    engine = models.engine
+
+    if args.command == "import":
+        fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+        stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8", newline="")
+        with stream:
+            try:
+                report = import_products(engine, READERS[fmt](stream), args.batch_size, strict=args.strict)
+            except CatalogImportError as exc:
+                parser.exit(1, f"import aborted: {exc}\n")
+        print(json.dumps(report, indent=2))
+    else:
+        out = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+        with out:
+            for line in export_products(engine):
+                out.write(line)
+
+
+def text_stream(binary: IO[bytes]) -> IO[str]:
+    return io.TextIOWrapper(binary, encoding="utf-8", newline="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import gzip
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# brotli is optional; without it clients are offered gzip only.
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Bodies smaller than this go out as-is; below ~1 KB the framing overhead
+# eats most of the saving.
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+# Only JSON responses under these prefixes are compressed
+COMPRESSED_PATHS = ("/products", "/cart", "/favorites")
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best encoding the client accepts, or None for identity."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    for coding in ENCODINGS:
+        if accepted.get(coding, accepted.get("*", 0)) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressedBodies:
+    """Small LRU of compressed bodies keyed by (ETag, encoding), so cached
+    catalog responses are compressed once per version, not once per request."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+
+    def get_or_compress(self, etag: Optional[str], body: bytes, encoding: str) -> bytes:
+        if etag is None:
+            return compress(body, encoding)
+        key = (etag, encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                return compressed
+        compressed = compress(body, encoding)
+        with self._lock:
+            self._entries[key] = compressed
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compressed
+
+
+compressed_bodies = CompressedBodies()
+
+
+class CompressionMiddleware:
+    """Negotiated gzip/brotli for the catalog, cart and favorites JSON.
+
+    Only single-message bodies are touched; streamed responses such as the
+    NDJSON export pass through unchanged. A compressed body gets a weak ETag,
+    since it is a different byte sequence from the identity representation.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE, paths=COMPRESSED_PATHS):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            pending, start = start, None
+            response_headers = [(k, v) for k, v in pending["headers"] if k.lower() != b"vary"]
+            vary = [v for k, v in pending["headers"] if k.lower() == b"vary"]
+            response_headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+            pending = {**pending, "headers": response_headers}
+
+            body = message.get("body", b"")
+            if (
+                encoding is None
+                or message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or not _is_json(response_headers)
+                or any(k.lower() == b"content-encoding" for k, _ in response_headers)
+            ):
+                await send(pending)
+                await send(message)
+                return
+
+            etag = _header(response_headers, b"etag")
+            compressed = compressed_bodies.get_or_compress(etag, body, encoding)
+            rewritten = [
+                (k, v) for k, v in response_headers
+                if k.lower() not in (b"content-length", b"etag")
+            ]
+            rewritten.append((b"content-encoding", encoding.encode("ascii")))
+            rewritten.append((b"content-length", str(len(compressed)).encode("ascii")))
+            if etag is not None:
+                rewritten.append((b"etag", b"W/" + etag.encode("latin-1").removeprefix(b"W/")))
+            await send({**pending, "headers": rewritten})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _header(headers, name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _is_json(headers) -> bool:
+    content_type = _header(headers, b"content-type") or ""
+    return content_type.startswith("application/json")
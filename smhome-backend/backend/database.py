@@ -0,0 +1,156 @@
+import logging
+import os
+
+from sqlalchemy import create_engine, event
+
+logger = logging.getLogger("smhome.db")
+
+# --- Configuration ---
+# DATABASE_URL is a plain SQLAlchemy URL (sqlite:///..., postgresql://...).
+# DB_MODE=async serves the routes from routes_async.py on an AsyncSession;
+# the async driver (aiosqlite / asyncpg) is derived from the URL.
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./furniture_store.db")
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+
+# Pool settings apply to server databases (and to SQLite's QueuePool).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# single writer; busy_timeout makes writers queue instead of failing with
+# "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative means KiB rather than pages
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024))),
+    "temp_store": "MEMORY",
+}
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str = DATABASE_URL) -> str:
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme:
+        # Already names a driver
+        return url
+    return _ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+# --- Engine Factory ---
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def engine_options(url: str) -> dict:
+    if is_sqlite(url):
+        options = {"connect_args": {"check_same_thread": False}}
+        if ":memory:" in url or url.rstrip("/").endswith("sqlite:"):
+            # In-memory databases get a single shared connection; no pool knobs
+            return options
+    else:
+        options = {}
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=not is_sqlite(url),
+    )
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def configure_engine(engine):
+    """Install per-connection setup on a sync engine (or an async engine's
+    `sync_engine`)."""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+    return engine
+
+
+def make_engine(url: str = DATABASE_URL):
+    return configure_engine(create_engine(url, **engine_options(url)))
+
+
+def upsert_insert(dialect_name: str, table):
+    """An INSERT supporting `on_conflict_do_update()` for the given dialect."""
+    from sqlalchemy.dialects import postgresql, sqlite
+
+    inserts = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+    try:
+        return inserts[dialect_name](table)
+    except KeyError:
+        raise NotImplementedError(f"upserts are not supported on {dialect_name}")
+
+
+def describe_engine(engine) -> dict:
+    """The settings actually in effect, for the startup report."""
+    pool = engine.pool
+    report = {"url": engine.url.render_as_string(hide_password=True), "pool": type(pool).__name__}
+    for attr in ("size", "_max_overflow", "_timeout", "_recycle"):
+        value = getattr(pool, attr, None)
+        if value is not None:
+            report[attr.lstrip("_")] = value() if callable(value) else value
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            for name in SQLITE_PRAGMAS:
+                report[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+    return report
+
+
+def log_engine_settings(engine):
+    logger.info("database settings: %s", ", ".join(f"{k}={v}" for k, v in describe_engine(engine).items()))
+
+
+# --- Async Engine ---
+# Created on first use so sync deployments never import the async drivers.
+_async_engine = None
+_async_sessionmaker = None
+
+
+def get_async_engine():
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = async_database_url()
+        _async_engine = create_async_engine(url, **engine_options(url))
+        configure_engine(_async_engine.sync_engine)
+        _async_sessionmaker = async_sessionmaker(_async_engine, expire_on_commit=False)
+    return _async_engine
+
+
+def AsyncSessionLocal():
+    get_async_engine()
+    return _async_sessionmaker()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine():
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_sessionmaker = None
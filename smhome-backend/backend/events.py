@@ -0,0 +1,194 @@
+"""Per-user Server-Sent Events for cart and favorites changes.
+
+Write routes call publish() with a small delta once their transaction has
+committed. Events travel over the invalidation bus, so a stream held by one
+worker also hears about writes handled by another, and the hub fans each
+one out to that user's open streams.
+
+Every connection has a bounded queue. A client too slow to drain it has
+the queue replaced by a single `reset` event, telling it to re-fetch its
+cart and favorites, rather than holding unbounded memory for it. Recent
+events are kept per user so a reconnecting EventSource resumes from its
+Last-Event-ID; when that id is older than what is kept, it gets `reset`.
+Each stream starts with an id-only message marking the current position,
+so even a client that has seen no events yet resumes without a gap.
+
+Event ids are `<worker>.<sequence>`: each worker numbers events in the
+order it receives them, so ids are only comparable within one worker. A
+reconnect that lands on another worker (or on a restarted one) can't be
+resumed and gets `reset` instead, i.e. the client does a full resync.
+
+Event types and their data:
+
+    cart.item         a cart line as returned by GET /cart
+    cart.removed      {"product_id", "selected_color"}; a null color means every color
+    cart.cleared      {} (the cart became an order)
+    favorite.added    a favorite as returned by GET /favorites
+    favorite.removed  {"product_id"}
+    reset             {} (state may have been missed; re-fetch)
+"""
+import asyncio
+import os
+import threading
+import uuid
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Set
+
+import fastjson
+import invalidation
+
+QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "64"))
+BACKLOG_SIZE = int(os.getenv("EVENTS_BACKLOG_SIZE", "128"))
+KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+# Streams end after this long and the browser reconnects, resuming by id.
+# Open streams would otherwise hold up a graceful shutdown indefinitely.
+STREAM_SECONDS = float(os.getenv("EVENTS_STREAM_SECONDS", "300"))
+# Users whose recent events are kept for resuming
+BACKLOG_USERS = 10_000
+RETRY_MS = 3000
+
+INVALIDATION_TOPIC = "events"
+
+
+def encode(event: dict) -> bytes:
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (
+        event["id"].encode("ascii"), event["type"].encode("ascii"), fastjson.dumps(event["data"])
+    )
+
+
+class Subscription:
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def push(self, event: dict):
+        # Runs on the subscription's loop
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({**event, "type": "reset", "data": {}})
+        else:
+            self.queue.put_nowait(event)
+
+
+class Backlog:
+    def __init__(self):
+        self.events: deque = deque(maxlen=BACKLOG_SIZE)
+        # Newest sequence no longer kept; resuming from before it misses events
+        self.dropped_through = 0
+
+    def append(self, event: dict):
+        if len(self.events) == self.events.maxlen:
+            self.dropped_through = self.events[0]["seq"]
+        self.events.append(event)
+
+    @property
+    def last_seq(self) -> int:
+        return self.events[-1]["seq"] if self.events else self.dropped_through
+
+
+class EventHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Tells this worker's event ids from another's, or from before a restart
+        self.instance = uuid.uuid4().hex[:12]
+        self._seq = 0
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._backlogs: "OrderedDict[int, Backlog]" = OrderedDict()
+        # Newest sequence among backlogs evicted to stay under BACKLOG_USERS
+        self._evicted_through = 0
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.instance}.{seq}"
+
+    def deliver(self, user_id: int, event: dict):
+        """Number an event, record it and hand it to the user's streams; any
+        thread."""
+        with self._lock:
+            self._seq += 1
+            event = {"id": self.event_id(self._seq), "seq": self._seq, **event}
+            backlog = self._backlogs.get(user_id)
+            if backlog is None:
+                backlog = self._backlogs[user_id] = Backlog()
+                while len(self._backlogs) > BACKLOG_USERS:
+                    _, evicted = self._backlogs.popitem(last=False)
+                    self._evicted_through = max(self._evicted_through, evicted.last_seq)
+            else:
+                self._backlogs.move_to_end(user_id)
+            backlog.append(event)
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.push, event)
+
+    def subscribe(self, user_id: int, last_event_id: Optional[str] = None):
+        """Open a stream; returns `(subscription, events to replay first,
+        position)`. Every event the subscription receives is newer than the
+        position."""
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            replay = self._replay(user_id, last_event_id)
+            position = self.event_id(self._seq)
+        return subscription, replay, position
+
+    def _replay(self, user_id: int, last_event_id: Optional[str]) -> list:
+        if last_event_id is None:
+            return []
+        instance, _, seq = last_event_id.partition(".")
+        backlog = self._backlogs.get(user_id)
+        kept_from = backlog.dropped_through if backlog else self._evicted_through
+        # An id from another worker says nothing about what this one sent
+        if instance != self.instance or not seq.isdigit() or int(seq) < kept_from:
+            return [{"id": self.event_id(self._seq), "seq": self._seq, "type": "reset", "data": {}}]
+        return [event for event in (backlog.events if backlog else ()) if event["seq"] > int(seq)]
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+
+hub = EventHub()
+
+
+def publish(user_id: int, event_type: str, data: dict):
+    """Send an event to every stream `user_id` has open, on any worker."""
+    message = {"user_id": user_id, "type": event_type, "data": data}
+    invalidation.publish(INVALIDATION_TOPIC, fastjson.dumps_str(message))
+
+
+def _receive(key: Optional[str]):
+    message = fastjson.loads(key)
+    hub.deliver(message.pop("user_id"), message)
+
+
+invalidation.subscribe(INVALIDATION_TOPIC, _receive)
+
+
+async def stream(user_id: int, last_event_id: Optional[str] = None):
+    """The text/event-stream body; ends when the client disconnects or after
+    STREAM_SECONDS."""
+    subscription, replay, position = hub.subscribe(user_id, last_event_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_SECONDS
+    try:
+        yield b"retry: %d\n\n" % RETRY_MS
+        for event in replay:
+            yield encode(event)
+        yield b"id: %s\n\n" % position.encode("ascii")
+        while loop.time() < deadline:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), min(KEEPALIVE_SECONDS, deadline - loop.time())
+                )
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield b": keepalive\n\n"
+                continue
+            yield encode(event)
+    finally:
+        hub.unsubscribe(subscription)
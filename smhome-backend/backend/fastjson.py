@@ -0,0 +1,26 @@
+import json
+
+# orjson is in requirements.txt; without it the stdlib encoder produces the
+# same compact output, only slower.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+if orjson is not None:
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def dumps_str(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    loads = orjson.loads
+else:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+    def dumps_str(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+
+    loads = json.loads
@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, FrozenSet, Iterable, Optional
+
+from sqlalchemy import select
+
+import invalidation
+import models
+from database import upsert_insert
+
+FAVORITE_IDS_CACHE_SIZE = 10_000
+INVALIDATION_TOPIC = "favorites"
+
+
+def add_statement(dialect_name: str, user_id: int, product_id: int):
+    """Idempotent favorite; rowcount is 1 only when it is new."""
+    stmt = upsert_insert(dialect_name, models.Favorite.__table__).values(user_id=user_id, product_id=product_id)
+    return stmt.on_conflict_do_nothing(index_elements=["user_id", "product_id"])
+
+
+def ids_statement(user_id: int):
+    return select(models.Favorite.product_id).where(
+        models.Favorite.user_id == user_id, models.Favorite.product_id.is_not(None)
+    )
+
+
+class FavoriteIdCache:
+    """Bounded LRU of each user's favorited product ids.
+
+    The favorite routes update the set in place after they commit; other
+    workers drop theirs through the invalidation bus. Any change also bumps
+    `version`, so a set loaded while a write was committing is not stored.
+    """
+
+    def __init__(self, maxsize: int = FAVORITE_IDS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._version = 0
+        self._entries: "OrderedDict[int, FrozenSet[int]]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[FrozenSet[int]]:
+        with self._lock:
+            ids = self._entries.get(user_id)
+            if ids is not None:
+                self._entries.move_to_end(user_id)
+            return ids
+
+    def put(self, user_id: int, version: int, ids: Iterable[int]) -> FrozenSet[int]:
+        ids = frozenset(ids)
+        with self._lock:
+            if version == self._version:
+                self._entries[user_id] = ids
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return ids
+
+    def get_or_load(self, user_id: int, load: Callable[[], Iterable[int]]) -> FrozenSet[int]:
+        ids = self.get(user_id)
+        if ids is None:
+            version = self._version
+            ids = self.put(user_id, version, load())
+        return ids
+
+    async def get_or_load_async(self, user_id: int, load: Callable[[], Awaitable[Iterable[int]]]) -> FrozenSet[int]:
+        ids = self.get(user_id)
+        if ids is None:
+            version = self._version
+            ids = self.put(user_id, version, await load())
+        return ids
+
+    def _change(self, user_id: int, update: Optional[Callable[[FrozenSet[int]], FrozenSet[int]]]):
+        with self._lock:
+            self._version += 1
+            ids = self._entries.pop(user_id, None)
+            if ids is not None and update is not None:
+                self._entries[user_id] = update(ids)
+
+    def added(self, user_id: int, product_id: int):
+        self._change(user_id, lambda ids: ids | {product_id})
+
+    def removed(self, user_id: int, product_id: int):
+        self._change(user_id, lambda ids: ids - {product_id})
+
+    def invalidate(self, user_id: int):
+        self._change(user_id, None)
+
+
+favorite_ids = FavoriteIdCache()
+
+invalidation.subscribe(INVALIDATION_TOPIC, lambda key: favorite_ids.invalidate(int(key)))
+
+
+def favorite_added(user_id: int, product_id: int):
+    favorite_ids.added(user_id, product_id)
+    invalidation.publish(INVALIDATION_TOPIC, str(user_id), local=False)
+
+
+def favorite_removed(user_id: int, product_id: int):
+    favorite_ids.removed(user_id, product_id)
+    invalidation.publish(INVALIDATION_TOPIC, str(user_id), local=False)
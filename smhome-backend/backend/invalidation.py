@@ -0,0 +1,259 @@
+"""Cross-worker cache invalidation.
+
+Every uvicorn worker keeps its own in-memory caches (catalog bytes,
+principals, the price book), so a write handled by one worker has to reach
+the others. Writers call publish(topic, key): this worker's handlers run
+straight away, and a background thread broadcasts the message to the other
+workers, whose bus threads hand it to the same handlers.
+
+The transport is picked with INVALIDATION_BACKEND:
+
+    database  (default) rows in `cache_invalidations`, read by every worker
+              each INVALIDATION_POLL_MS; needs nothing but the shared database
+    redis     PUBLISH/SUBSCRIBE on INVALIDATION_CHANNEL at REDIS_URL; needs
+              the `redis` package and any server speaking the Redis protocol
+    local     no broadcast, for a single worker
+"""
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, func, or_, select
+
+import fastjson
+import models
+
+# redis is optional; only INVALIDATION_BACKEND=redis needs it.
+try:
+    import redis
+except ImportError:  # pragma: no cover - depends on the environment
+    redis = None
+
+logger = logging.getLogger("smhome.invalidation")
+
+BACKEND = os.getenv("INVALIDATION_BACKEND", "database").lower()
+POLL_SECONDS = float(os.getenv("INVALIDATION_POLL_MS", "20")) / 1000
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CHANNEL = os.getenv("INVALIDATION_CHANNEL", "smhome:invalidate")
+RETENTION_SECONDS = 300
+PRUNE_SECONDS = 60
+# On PostgreSQL a lower id can commit after a higher one; ids skipped over
+# are looked for again for this long
+GAP_SECONDS = 5.0
+MAX_GAPS = 1000
+
+# Lets a worker recognise, and skip, its own messages
+ORIGIN = uuid.uuid4().hex
+
+Message = models.CacheInvalidation
+Handler = Callable[[Optional[str]], None]
+
+_handlers: Dict[str, List[Handler]] = defaultdict(list)
+
+
+def subscribe(topic: str, handler: Handler):
+    _handlers[topic].append(handler)
+
+
+def dispatch(topic: str, key: Optional[str] = None):
+    for handler in _handlers.get(topic, ()):
+        try:
+            handler(key)
+        except Exception:
+            logger.exception("invalidation handler for %r failed", topic)
+
+
+def publish(topic: str, key: Optional[str] = None, local: bool = True):
+    """Invalidate here now and tell the other workers. Pass `local=False`
+    when this worker has already brought its own cache up to date."""
+    if local:
+        dispatch(topic, key)
+    if _worker is not None:
+        _worker.outbox.put((topic, key))
+    elif BACKEND != "local":
+        # No bus thread (e.g. a CLI import): broadcast inline
+        try:
+            bus = make_bus(models.engine)
+            bus.write([(topic, key)])
+            bus.close()
+        except Exception:
+            logger.exception("could not broadcast invalidation %r", topic)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# --- Backends ---
+
+class DatabaseBus:
+    """Messages are rows; each worker reads the ones past its cursor."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._cursor = 0
+        self._gaps: Dict[int, float] = {}
+        self._next_prune = 0.0
+
+    def open(self):
+        with self.engine.connect() as conn:
+            self._cursor = conn.execute(select(func.max(Message.id))).scalar() or 0
+
+    def write(self, messages):
+        now = utcnow()
+        with self.engine.begin() as conn:
+            conn.execute(Message.__table__.insert(), [
+                {"origin": ORIGIN, "topic": topic, "key": key, "created_at": now} for topic, key in messages
+            ])
+
+    def poll(self):
+        condition = Message.id > self._cursor
+        if self._gaps:
+            condition = or_(condition, Message.id.in_(list(self._gaps)))
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(Message.id, Message.origin, Message.topic, Message.key).where(condition).order_by(Message.id)
+            ).all()
+            now = time.monotonic()
+            if now >= self._next_prune:
+                conn.execute(delete(Message).where(Message.created_at < utcnow() - timedelta(seconds=RETENTION_SECONDS)))
+                conn.commit()
+                self._next_prune = now + PRUNE_SECONDS
+
+        for message_id, origin, topic, key in rows:
+            self._gaps.pop(message_id, None)
+            if message_id > self._cursor:
+                for missing in range(max(self._cursor + 1, message_id - MAX_GAPS), message_id):
+                    self._gaps[missing] = now + GAP_SECONDS
+                self._cursor = message_id
+            if origin != ORIGIN:
+                dispatch(topic, key)
+        for missing in [m for m, until in self._gaps.items() if until <= now]:
+            del self._gaps[missing]
+
+    def close(self):
+        pass
+
+
+class RedisBus:
+    """Messages go out with PUBLISH; redis-py's listener thread delivers them."""
+
+    def __init__(self, url: str = REDIS_URL):
+        if redis is None:
+            raise RuntimeError("INVALIDATION_BACKEND=redis needs the redis package")
+        self.client = redis.Redis.from_url(url)
+        self._listener = None
+
+    def open(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{CHANNEL: self._receive})
+        self._listener = pubsub.run_in_thread(
+            sleep_time=POLL_SECONDS, daemon=True, exception_handler=self._listener_failed
+        )
+
+    def write(self, messages):
+        pipe = self.client.pipeline(transaction=False)
+        for topic, key in messages:
+            pipe.publish(CHANNEL, fastjson.dumps({"origin": ORIGIN, "topic": topic, "key": key}))
+        pipe.execute()
+
+    def poll(self):
+        pass
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener.join(timeout=1)
+        self.client.close()
+
+    @staticmethod
+    def _receive(message):
+        data = fastjson.loads(message["data"])
+        if data["origin"] != ORIGIN:
+            dispatch(data["topic"], data["key"])
+
+    @staticmethod
+    def _listener_failed(exc, pubsub, thread):
+        # The pubsub reconnects and resubscribes on its next read
+        logger.warning("invalidation listener error: %s", exc)
+        time.sleep(1)
+
+
+def make_bus(engine):
+    if BACKEND == "redis":
+        return RedisBus()
+    if BACKEND == "database":
+        return DatabaseBus(engine)
+    raise ValueError(f"unknown INVALIDATION_BACKEND {BACKEND!r}")
+
+
+# --- Bus thread ---
+
+class BusWorker(threading.Thread):
+    """Sends queued messages as soon as they arrive and polls for others'."""
+
+    def __init__(self, bus):
+        super().__init__(name="invalidation-bus", daemon=True)
+        self.bus = bus
+        self.outbox: queue.SimpleQueue = queue.SimpleQueue()
+        self._stopping = threading.Event()
+
+    def _take(self, timeout: Optional[float]) -> list:
+        messages = []
+        try:
+            messages.append(self.outbox.get(timeout=timeout) if timeout else self.outbox.get_nowait())
+            while True:
+                messages.append(self.outbox.get_nowait())
+        except queue.Empty:
+            return messages
+
+    def run(self):
+        while not self._stopping.is_set():
+            outgoing = self._take(POLL_SECONDS)
+            try:
+                if outgoing:
+                    self.bus.write(outgoing)
+                    outgoing = []
+                self.bus.poll()
+            except Exception:
+                logger.exception("cache invalidation bus failed")
+                # Invalidations are idempotent, so resending is harmless
+                for message in outgoing:
+                    self.outbox.put(message)
+                self._stopping.wait(1.0)
+
+    def stop(self):
+        self._stopping.set()
+        self.join()
+        outgoing = self._take(None)
+        try:
+            if outgoing:
+                self.bus.write(outgoing)
+        except Exception:
+            logger.exception("could not send final invalidations")
+        self.bus.close()
+
+
+_worker: Optional[BusWorker] = None
+
+
+def start(engine):
+    global _worker
+    if _worker is None and BACKEND != "local":
+        bus = make_bus(engine)
+        bus.open()
+        _worker = BusWorker(bus)
+        _worker.start()
+
+
+def stop():
+    global _worker
+    if _worker is not None:
+        worker, _worker = _worker, None
+        worker.stop()
@@ -0,0 +1,85 @@
+from sqlalchemy import delete, event, func, insert, select
+
+import models
+from database import upsert_insert
+
+# Keeps `product_listings` in step with `products`. ORM writes refresh their
+# row inside the same transaction; bulk writers that bypass the ORM call
+# `refresh()` themselves.
+
+REBUILD_CHUNK = 5000
+
+
+def listing_row(product) -> dict:
+    """Read-model values for a product (ORM object or row mapping)."""
+    get = product.get if isinstance(product, dict) else lambda key: getattr(product, key)
+    colors = get("colors") or []
+    primary_image = get("image")
+    if not primary_image and colors and colors[0].get("images"):
+        primary_image = colors[0]["images"][0]
+    discount = get("discountPercent")
+    return {
+        "product_id": get("id"),
+        "category": get("category"),
+        "name": get("name"),
+        "price": get("price"),
+        "effective_price": models.effective_price(get("price"), discount),
+        "is_discounted": bool(discount and discount > 0),
+        "color_count": len(colors),
+        "primary_image": primary_image,
+    }
+
+
+def refresh(conn, products):
+    """Upsert the listing rows for `products` (ORM objects or dicts)."""
+    rows = [listing_row(p) for p in products]
+    if not rows:
+        return
+    stmt = upsert_insert(conn.dialect.name, models.ProductListing.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["product_id"],
+        set_={column: stmt.excluded[column] for column in rows[0] if column != "product_id"},
+    )
+    conn.execute(stmt, rows)
+
+
+def remove(conn, product_ids):
+    listing = models.ProductListing.__table__
+    conn.execute(delete(listing).where(listing.c.product_id.in_(list(product_ids))))
+
+
+def rebuild(conn):
+    products = models.Product.__table__
+    conn.execute(delete(models.ProductListing.__table__))
+    last_id = 0
+    while True:
+        chunk = conn.execute(
+            select(products).where(products.c.id > last_id).order_by(products.c.id).limit(REBUILD_CHUNK)
+        ).mappings().all()
+        if not chunk:
+            break
+        conn.execute(insert(models.ProductListing.__table__), [listing_row(dict(row)) for row in chunk])
+        last_id = chunk[-1]["id"]
+
+
+def init_listings(engine):
+    """Back-fill the read model if it has drifted from `products`, e.g. on
+    first start after upgrading."""
+    with engine.begin() as conn:
+        listed = conn.execute(select(func.count()).select_from(models.ProductListing.__table__)).scalar()
+        total = conn.execute(select(func.count()).select_from(models.Product.__table__)).scalar()
+        if listed != total:
+            rebuild(conn)
+
+
+# --- ORM hooks ---
+
+@event.listens_for(models.Product, "after_insert")
+@event.listens_for(models.Product, "after_update")
+def _refresh_listing(mapper, connection, target):
+    refresh(connection, [target])
+
+
+@event.listens_for(models.Product, "after_delete")
+def _remove_listing(mapper, connection, target):
+    remove(connection, [target.id])
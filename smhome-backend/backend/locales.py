@@ -0,0 +1,235 @@
+"""Catalog locales.
+
+Products are stored in DEFAULT_LOCALE with prices in CATALOG_CURRENCY.
+Every other locale is a row in `locales` (currency, conversion rate, number
+format) plus optional `product_translations` rows. Requests pick a locale
+from Accept-Language; the answer is cached per header value, and each
+(locale, slice) of the catalog is serialized once per catalog version by
+the catalog cache, so a request costs the same whichever locale it asks for.
+
+Responses in the default locale are unchanged. Other locales overlay the
+translated name and description, keep `category` as the filter key with the
+translated `categoryLabel` beside it, and add `localPrice`; `price` and
+`effectivePrice` stay in the catalog currency because the cart and checkout
+charge in it.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session, object_session
+
+import invalidation
+import models
+from catalog_cache import catalog_cache
+
+DEFAULT_LOCALE = os.getenv("CATALOG_LOCALE", "en").lower()
+CATALOG_CURRENCY = os.getenv("CATALOG_CURRENCY", "USD")
+NEGOTIATION_CACHE_SIZE = 1024
+INVALIDATION_TOPIC = "locales"
+
+# Responses vary by locale, so shared caches must key on the header
+VARY_HEADERS = {"Vary": "Accept-Language"}
+
+# The languages the storefront ships (src/locales), written the local way but
+# still priced in the catalog currency; set a currency and rate per locale
+# with PUT /admin/locales/{code}.
+SEED_LOCALES = [
+    {"code": "es", "currency": CATALOG_CURRENCY, "rate": 1.0, "decimals": 2,
+     "decimal_separator": ",", "group_separator": ".", "price_format": "{amount} US$"},
+    {"code": "fr", "currency": CATALOG_CURRENCY, "rate": 1.0, "decimals": 2,
+     "decimal_separator": ",", "group_separator": " ", "price_format": "{amount} $US"},
+    {"code": "vi", "currency": CATALOG_CURRENCY, "rate": 1.0, "decimals": 2,
+     "decimal_separator": ",", "group_separator": ".", "price_format": "{amount} US$"},
+]
+
+
+class LocaleSettings(NamedTuple):
+    code: str
+    currency: str
+    rate: float
+    decimals: int
+    decimal_separator: str
+    group_separator: str
+    price_format: str
+
+    def convert(self, amount: float) -> float:
+        return round(amount * self.rate, self.decimals)
+
+    def format(self, amount: float) -> str:
+        number = f"{amount:,.{self.decimals}f}".translate(
+            {ord(","): self.group_separator, ord("."): self.decimal_separator}
+        )
+        return self.price_format.replace("{amount}", number)
+
+    def local_price(self, price: float, effective_price: Optional[float]) -> dict:
+        price = self.convert(price)
+        effective = self.convert(effective_price) if effective_price is not None else None
+        return {
+            "currency": self.currency,
+            "price": price,
+            "effectivePrice": effective,
+            "formatted": self.format(price),
+            "formattedEffective": self.format(effective) if effective is not None else None,
+        }
+
+
+def parse_accept_language(header: str) -> list:
+    """Language tags in preference order, lower-cased; q=0 tags dropped."""
+    ranked = []
+    for position, part in enumerate(header.split(",")):
+        tag, _, params = part.strip().partition(";")
+        tag = tag.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        if tag and quality > 0:
+            ranked.append((-quality, position, tag))
+    return [tag for _, _, tag in sorted(ranked)]
+
+
+class LocaleRegistry:
+    """The locales in the database and the Accept-Language values seen so
+    far, mapped to the locale each one resolves to."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._locales: Dict[str, LocaleSettings] = {}
+        self._negotiated: "OrderedDict[str, str]" = OrderedDict()
+
+    def load(self, rows: Iterable):
+        locales = {row.code.lower(): LocaleSettings(row.code.lower(), *row[1:]) for row in rows}
+        locales.pop(DEFAULT_LOCALE, None)
+        with self._lock:
+            self._version += 1
+            self._locales = locales
+            self._negotiated.clear()
+
+    def get(self, code: str) -> Optional[LocaleSettings]:
+        return self._locales.get(code)
+
+    def negotiate(self, accept_language: Optional[str]) -> str:
+        if not accept_language:
+            return DEFAULT_LOCALE
+        with self._lock:
+            code = self._negotiated.get(accept_language)
+            if code is not None:
+                self._negotiated.move_to_end(accept_language)
+                return code
+            version = self._version
+        code = self._choose(parse_accept_language(accept_language))
+        with self._lock:
+            # Not kept if the locales were reloaded meanwhile
+            if version == self._version:
+                self._negotiated[accept_language] = code
+                while len(self._negotiated) > NEGOTIATION_CACHE_SIZE:
+                    self._negotiated.popitem(last=False)
+        return code
+
+    def _choose(self, tags: list) -> str:
+        for tag in tags:
+            if tag == "*":
+                return DEFAULT_LOCALE
+            for candidate in (tag, tag.split("-")[0]):
+                if candidate == DEFAULT_LOCALE or candidate in self._locales:
+                    return candidate
+        return DEFAULT_LOCALE
+
+
+registry = LocaleRegistry()
+
+
+def negotiate(accept_language: Optional[str]) -> str:
+    return registry.negotiate(accept_language)
+
+
+# --- Queries ---
+
+def locales_query():
+    Locale = models.Locale
+    return select(
+        Locale.code, Locale.currency, Locale.rate, Locale.decimals,
+        Locale.decimal_separator, Locale.group_separator, Locale.price_format,
+    )
+
+
+def translations_query(locale: str, category: Optional[str] = None, product_ids: Optional[Iterable[int]] = None):
+    Translation = models.ProductTranslation
+    stmt = select(Translation.product_id, Translation.name, Translation.description, Translation.category).where(
+        Translation.locale == locale
+    )
+    if category is not None:
+        stmt = stmt.join(models.Product, models.Product.id == Translation.product_id).where(
+            models.Product.category == category
+        )
+    if product_ids is not None:
+        stmt = stmt.where(Translation.product_id.in_(list(product_ids)))
+    return stmt
+
+
+# --- Localizing ---
+
+def localize(products: list, settings: LocaleSettings, translations: Iterable) -> list:
+    """Overlay `(product_id, name, description, category)` translation rows
+    on ProductResponse-shaped dicts and add the local prices."""
+    translated = {row[0]: row[1:] for row in translations}
+    for product in products:
+        name, description, category = translated.get(product["id"], (None, None, None))
+        if name:
+            product["name"] = name
+        if description:
+            product["description"] = description
+        product["categoryLabel"] = category or product["category"]
+        product["localPrice"] = settings.local_price(product["price"], product["effectivePrice"])
+    return products
+
+
+# --- Startup and invalidation ---
+
+def load(engine):
+    with engine.connect() as conn:
+        registry.load(conn.execute(locales_query()).all())
+
+
+def init_locales(engine):
+    """Seed the storefront's locales on first start, then load them."""
+    with engine.begin() as conn:
+        if not conn.execute(select(func.count()).select_from(models.Locale.__table__)).scalar():
+            conn.execute(insert(models.Locale.__table__), SEED_LOCALES)
+    load(engine)
+
+
+def _reload(key: Optional[str]):
+    load(models.engine)
+    # Cached payloads hold converted prices; drop the ones built before the reload
+    catalog_cache.bump()
+
+
+invalidation.subscribe(INVALIDATION_TOPIC, _reload)
+
+
+@event.listens_for(models.Locale, "after_insert")
+@event.listens_for(models.Locale, "after_update")
+@event.listens_for(models.Locale, "after_delete")
+def _mark_locales_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["locales_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _reload_on_commit(session):
+    if session.info.pop("locales_dirty", False):
+        invalidation.publish(INVALIDATION_TOPIC)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session):
+    session.info.pop("locales_dirty", None)
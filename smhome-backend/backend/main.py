@@ -1,22 +1,76 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+# First, so the startup report counts the time spent importing everything else
+import startup
+import asyncio
+import tempfile
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
-from typing import List
+from typing import List, Literal, Optional
 import models
-from jose import JWTError, jwt
+import catalog
+import search
+import catalog_io
+import locales
+from catalog_cache import Uncacheable, catalog_cache, cached_response
+from principals import Principal
 import schemas
-from models import SessionLocal, init_db
-from fastapi.security import OAuth2PasswordBearer
-import bcrypt
+import queries
+import serializers
+from compression import CompressionMiddleware
+import metrics
+import profiler
+import cart
+import orders
+import pricing
+import popularity
+import invalidation
+import events
+import favorites
+import related
+import database
+from models import SessionLocal
+from auth import oauth2_scheme, token_for
+import auth
+from fastapi.concurrency import run_in_threadpool
+import passwords
 
 
 
 # --- App Setup ---
-app = FastAPI(title="SMHome Furniture Backend")
-SECRET_KEY = "supersecretkey"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    timer = startup.StartupTimer()
+    with timer.phase("schema"):
+        startup.prepare_schema(models.engine)
+    database.log_engine_settings(models.engine)
+    # Before the catalog is warmed, so no write from another worker slips in between
+    with timer.phase("invalidation"):
+        invalidation.start(models.engine)
+    with timer.phase("pool"):
+        startup.warm_pool(models.engine)
+        if database.DB_MODE == "async":
+            await startup.warm_async_pool()
+    if startup.WARM_CATALOG:
+        with timer.phase("catalog"):
+            startup.warm_catalog(models.engine)
+    with timer.phase("background"):
+        background = [
+            asyncio.create_task(orders.sweep_forever()),
+            asyncio.create_task(related.refresh_forever(models.engine)),
+        ]
+        popularity.start(models.engine)
+    timer.report()
+    yield
+    for task in background:
+        task.cancel()
+    await asyncio.to_thread(popularity.stop)
+    await asyncio.to_thread(invalidation.stop)
+    passwords.shutdown()
+    await database.dispose_async_engine()
+
+app = FastAPI(title="SMHome Furniture Backend", lifespan=lifespan)
 
 # CORS Configuration
 origins = [
@@ -30,7 +84,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+# Outermost, so compressed bodies carry the CORS headers too
+app.add_middleware(CompressionMiddleware)
+# Wraps everything above, so it counts the bytes actually sent
+metrics.install(app)
 
 # --- Dependency ---
 def get_db():
@@ -41,448 +100,57 @@ def get_db():
         db.close()
 
 # --- Auth Utilities ---
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Passwords are hashed and checked in passwords.py
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    payload, principal = auth.resolve_token(token)
+    if principal is not None:
+        return principal
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+    # Legacy tokens (no uid) and users changed since the token was issued
+    if payload.get("uid") is not None:
+        user = db.get(models.User, payload["uid"])
+    else:
+        user = db.execute(queries.user_by_email(payload["sub"])).scalars().first()
+    return auth.remember(user, payload)
 
+# --- Routes: Auth ---
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/signin")
+def find_user_by_email(db: Session, email: str):
+    return db.execute(queries.user_by_email(email)).scalars().first()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if user is None:
-        raise credentials_exception
+def save_user(db: Session, user: models.User):
+    db.add(user)
+    db.commit()
+    db.refresh(user)
     return user
 
-# --- Auth Utilities (Bcrypt) ---
-def verify_password(plain_password, hashed_password):
-    # bcrypt.checkpw expects bytes
-    return bcrypt.checkpw(
-        plain_password.encode('utf-8'), 
-        hashed_password.encode('utf-8')
-    )
-
-def get_password_hash(password):
-    # Generate salt and hash
-    pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed_bytes = bcrypt.hashpw(pwd_bytes, salt)
-    return hashed_bytes.decode('utf-8')
-
-def create_access_token(data: dict):
-    to_encode = data.copy()
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-# --- Seed Data (Converted from mockProducts.ts) ---
-MOCK_PRODUCTS = [
-  {
-    "id": 1,
-    "name": 'Modern Sofa',
-    "price": 599.99,
-    "image": 'https://www.ikea.com/us/en/images/products/uppland-sofa-blekinge-white__0818565_pe774487_s5.jpg?f=xl',
-    "description": 'A sleek, comfortable sofa for modern living rooms.',
-    "category": 'Living Room',
-    "discountPercent": 20,
-    "colors": [
-      {
-        "name": 'White',
-        "hex": '#ffffff',
-        "images": ['https://www.ikea.com/us/en/images/products/uppland-sofa-blekinge-white__0818565_pe774487_s5.jpg?f=xl'],
-      },
-      {
-        "name": 'Midnight Blue',
-        "hex": '#1e3a8a',
-        "images": ['https://www.ikea.com/us/en/images/products/uppland-sofa-kilanda-dark-blue__1194843_pe902111_s5.jpg?f=xl'],
-      },
-      {
-        "name": 'Forest Green',
-        "hex": '#166534',
-        "images": ['https://www.ikea.com/us/en/images/products/uppland-sofa-hakebo-gray-green__1194851_pe902101_s5.jpg?f=xl'],
-      },
-    ],
-  },
-  {
-    "id": 2,
-    "name": 'Wooden Dining Table',
-    "price": 299.99,
-    "image": 'https://www.ikea.com/us/en/images/products/tonstad-table-brown-stained-oak-veneer__1393503_pe966259_s5.jpg?f=xl',
-    "description": 'A sturdy dining table crafted from high-quality oak with elegant brass-plated details.',
-    "category": 'Kitchen',
-    "colors": [
-      {
-        "name": 'Natural Oak',
-        "hex": '#d4a574',
-        "images": [
-          'https://www.ikea.com/us/en/images/products/tonstad-table-brown-stained-oak-veneer__1393503_pe966259_s5.jpg?f=xl',
-          'https://www.ikea.com/us/en/images/products/tonstad-table-brown-stained-oak-veneer__1393504_pe966260_s5.jpg?f=xl',
-        ],
-      },
-      {
-        "name": 'Dark Walnut',
-        "hex": '#5d4037',
-        "images": [
-          'https://www.ikea.com/us/en/images/products/tonstad-table-dark-walnut__1393505_pe966261_s5.jpg?f=xl',
-        ],
-      },
-    ],
-  },
-  {
-    "id": 3,
-    "name": 'Cozy Armchair',
-    "price": 199.99,
-    "image": 'https://www.ikea.com/us/en/images/products/ekenaeset-armchair-kilanda-light-beige__1109687_pe870153_s5.jpg?f=xl',
-    "description": 'A plush armchair ideal for relaxing evenings.',
-    "category": 'Living Room',
-    "discountPercent": 20,
-    "colors": [
-      {
-        "name": 'Cream Beige',
-        "hex": '#f5f5dc',
-        "images": ['https://www.ikea.com/us/en/images/products/ekenaeset-armchair-kilanda-light-beige__1109687_pe870153_s5.jpg?f=xl', 'https://www.ikea.com/us/en/images/products/ekenaeset-armchair-kilanda-light-beige__1179060_pe895831_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/ekenaeset-armchair-kilanda-light-beige__1110707_pe870568_s5.jpg?f=xl']
-      },
-      {
-        "name": 'Gray Turquoise',
-        "hex": '#5E7D7E',
-        "images": ['https://www.ikea.com/us/en/images/products/ekenaeset-armchair-kelinge-gray-turquoise__1109684_pe870150_s5.jpg?f=xl', 'https://www.ikea.com/us/en/images/products/ekenaeset-armchair-kelinge-gray-turquoise__1179059_pe895832_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/ekenaeset-armchair-kelinge-gray-turquoise__1109682_pe870149_s5.jpg?f=xl']
-      },
-    ],
-  },
-  {
-    "id": 4,
-    "name": 'Bathroom mirrors',
-    "price": 339.00,
-    "image": 'https://www.ikea.com/us/en/images/products/faxaelven-mirror-cabinet-w-built-in-lighting-oak-effect__1198705_pe904180_s5.jpg?f=xl',
-    "description": 'Mirror cabinet w built-in lighting, effect.',
-    "category": 'Bathroom',
-    "discountPercent": 20,
-    "colors": [
-      {
-        "name": 'Oak effect',
-        "hex": '#D8B589',
-        "images": ['https://www.ikea.com/us/en/images/products/faxaelven-mirror-cabinet-w-built-in-lighting-oak-effect__1198705_pe904180_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/faxaelven-mirror-cabinet-w-built-in-lighting-oak-effect__1256646_pe925199_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/faxaelven-mirror-cabinet-w-built-in-lighting-oak-effect__1356222_pe953329_s5.jpg?f=xl'] 
-      },
-      {
-        "name": 'Brown Oak effect',
-        "hex": '#87633A',
-        "images": ['https://www.ikea.com/us/en/images/products/faxaelven-mirror-cabinet-w-built-in-lighting-brown-oak-effect__1198704_pe904179_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/faxaelven-mirror-cabinet-w-built-in-lighting-brown-oak-effect__1256640_pe925194_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/faxaelven-mirror-cabinet-w-built-in-lighting-brown-oak-effect__1356220_pe953331_s5.jpg?f=xl']
-      },
-      {
-        "name": 'White',
-        "hex": '#ffffffff',
-        "images": ['https://www.ikea.com/us/en/images/products/faxaelven-mirror-cabinet-w-built-in-lighting-white__1198706_pe904181_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/faxaelven-mirror-cabinet-w-built-in-lighting-white__1256558_pe925116_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/faxaelven-mirror-cabinet-w-built-in-lighting-white__1356215_pe953326_s5.jpg?f=xl']
-
-      },
-    ],
-  },
-  {
-    "id": 5,
-    "name": 'Upholstered Beds',
-    "price": 299.00,
-    "image": 'https://www.ikea.com/us/en/images/products/ramnefjaell-upholstered-bed-frame-kilanda-light-beige-luroey__1258172_pe927371_s5.jpg?f=xl',
-    "description": 'upholstered beds are available in colors and styles to suit every sleeper’s personal preference.',
-    "category": 'Bedroom',
-    "colors": [
-      {
-        "name": 'Kilanda light beige',
-        "hex": '#90533174',
-        "images": ['https://www.ikea.com/us/en/images/products/ramnefjaell-upholstered-bed-frame-kilanda-light-beige-luroey__1258172_pe927371_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/ramnefjaell-upholstered-bed-frame-kilanda-light-beige-luroey__1258175_pe927363_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/ramnefjaell-upholstered-bed-frame-kilanda-light-beige-luroey__1258195_pe927382_s5.jpg?f=xl'] 
-      },
-      {
-        "name": 'Klovsta gray/white',
-        "hex": '#cac6c789',
-        "images": ['https://www.ikea.com/us/en/images/products/ramnefjaell-upholstered-bed-frame-klovsta-gray-white-luroey__1258176_pe927373_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/ramnefjaell-upholstered-bed-frame-klovsta-gray-white-luroey__1258179_pe927365_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/ramnefjaell-upholstered-bed-frame-klovsta-gray-white-luroey__1258198_pe927384_s5.jpg?f=xl']
-      },
-    ],
-  },
-  {
-    "id": 6,
-    "name": 'Chest of drawers',
-    "price": 129.00,
-    "image": 'https://www.ikea.com/gb/en/images/products/malm-chest-of-6-drawers-white__0484891_pe621335_s5.jpg?f=xxs',
-    "description": 'Your clothes deserve better than the chair. Upgrade to a stylish chest of drawers and give your space the storage it deserves.',
-    "category": 'Bedroom',
-    "colors": [
-      {
-        "name": 'White',
-        "hex": '#ffffffda',
-        "images": ['https://www.ikea.com/gb/en/images/products/malm-chest-of-6-drawers-white__0484891_pe621335_s5.jpg?f=xl','https://www.ikea.com/gb/en/images/products/malm-chest-of-6-drawers-white__1436508_pe984232_s5.jpg?f=xl'] 
-      },
-      {
-        "name": 'White stained oak veneer',
-        "hex": '#e8bd93ff',
-        "images": ['https://www.ikea.com/gb/en/images/products/malm-chest-of-6-drawers-white-stained-oak-veneer__1154558_pe886138_s5.jpg?f=xl','https://www.ikea.com/gb/en/images/products/malm-chest-of-6-drawers-white-stained-oak-veneer__1436515_pe984226_s5.jpg?f=xl']
-      },
-    ],
-  },
-  {
-    "id": 7,
-    "name": 'METOD kitchens combinations',
-    "price": 1233.00,
-    "image": 'https://www.ikea.com/gb/en/images/products/metod-kitchen-white-veddinge-white__1457725_pe992788_s5.jpg?f=xl',
-    "description": 'Planned with all the functions you need for storing, cooking, preparing food and washing up.',
-    "category": 'Kitchen',
-    "colors": [
-      {
-        "name": 'White',
-        "hex": '#ffffff',
-        "images": ['https://www.ikea.com/gb/en/images/products/metod-kitchen-white-veddinge-white__1457725_pe992788_s5.jpg?f=xl','https://www.ikea.com/gb/en/images/products/metod-kitchen-white-veddinge-white__1473627_pe997835_s5.jpg?f=xl'] 
-      },
-    ],
-  },
-  {
-    "id": 8,
-    "name": 'French door fridge/freezer',
-    "price": 999.00,
-    "image": 'https://www.ikea.com/gb/en/images/products/ribbenas-french-door-fridge-freezer-ikea-700-freestanding-stainless-steel__1354036_pe952439_s5.jpg?f=xl',
-    "description": 'French door design with two side-by-side doors up top and pull-out freezer drawers below makes it easy to find and reach all your delicacies.',
-    "category": 'Kitchen',
-    "colors": [
-      {
-        "name": 'Stainless steel',
-        "hex": '#dfe5eaff',
-        "images": ['https://www.ikea.com/gb/en/images/products/ribbenas-french-door-fridge-freezer-ikea-700-freestanding-stainless-steel__1354036_pe952439_s5.jpg?f=xl','https://www.ikea.com/gb/en/images/products/ribbenas-french-door-fridge-freezer-ikea-700-freestanding-stainless-steel__1354035_pe952441_s5.jpg?f=xl','https://www.ikea.com/gb/en/images/products/ribbenas-french-door-fridge-freezer-ikea-700-freestanding-stainless-steel__1341642_pe948862_s5.jpg?f=xl','https://www.ikea.com/gb/en/images/products/ribbenas-french-door-fridge-freezer-ikea-700-freestanding-stainless-steel__1337613_pe947940_s5.jpg?f=xl','https://www.ikea.com/gb/en/images/products/ribbenas-french-door-fridge-freezer-ikea-700-freestanding-stainless-steel__1337630_pe947967_s5.jpg?f=xl','https://www.ikea.com/gb/en/images/products/ribbenas-french-door-fridge-freezer-ikea-700-freestanding-stainless-steel__1337639_pe947975_s5.jpg?f=xl'] 
-      },
-      {
-        "name": 'Black stainless steel',
-        "hex": '#6e7275ff',
-        "images": ['https://www.ikea.com/gb/en/images/products/ribbenas-french-door-fridge-freezer-ikea-700-freestanding-black-stainless-steel__1354034_pe952440_s5.jpg?f=xl','https://www.ikea.com/gb/en/images/products/ribbenas-french-door-fridge-freezer-ikea-700-freestanding-black-stainless-steel__1354033_pe952442_s5.jpg?f=xl','https://www.ikea.com/gb/en/images/products/ribbenas-french-door-fridge-freezer-ikea-700-freestanding-black-stainless-steel__1341641_pe948861_s5.jpg?f=xl','https://www.ikea.com/gb/en/images/products/ribbenas-french-door-fridge-freezer-ikea-700-freestanding-black-stainless-steel__1337612_pe947946_s5.jpg?f=xl','https://www.ikea.com/gb/en/images/products/ribbenas-french-door-fridge-freezer-ikea-700-freestanding-black-stainless-steel__1337629_pe947966_s5.jpg?f=xl','https://www.ikea.com/gb/en/images/products/ribbenas-french-door-fridge-freezer-ikea-700-freestanding-black-stainless-steel__1337638_pe947974_s5.jpg?f=xl']
-      },
-    ],
-  },
-  {
-    "id": 9,
-    "name": 'Bathroom vanity with sink & faucet',
-    "price": 579.00,
-    "image": 'https://www.ikea.com/us/en/images/products/aengsjoen-orrsjoen-bathroom-vanity-with-sink-faucet-oak-effect__1217244_pe912641_s5.jpg?f=xl',
-    "description": 'Generous, full drawer storage capacity for all your essentials as piping is led through the back and not via a cut-out in the drawers. Drawers open all the way for a good overview.',
-    "category": 'Bathroom',
-    "discountPercent": 20,
-    "colors": [
-      {
-        "name": 'Oak effect',
-        "hex": '#D8B589',
-        "images": ['https://www.ikea.com/us/en/images/products/aengsjoen-orrsjoen-bathroom-vanity-with-sink-faucet-oak-effect__1217244_pe912641_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/aengsjoen-orrsjoen-bathroom-vanity-with-sink-faucet-oak-effect__1256583_pe925140_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/aengsjoen-orrsjoen-bathroom-vanity-with-sink-faucet-oak-effect__1242631_pe920327_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/aengsjoen-orrsjoen-bathroom-vanity-with-sink-faucet-oak-effect__1241502_pe919813_s5.jpg?f=xl'] 
-      },
-      {
-        "name": 'Brown oak effect',
-        "hex": '#A18D80',
-        "images": ['https://www.ikea.com/us/en/images/products/aengsjoen-orrsjoen-bathroom-vanity-with-sink-faucet-brown-oak-effect__1217241_pe912644_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/aengsjoen-orrsjoen-bathroom-vanity-with-sink-faucet-brown-oak-effect__1256580_pe925138_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/aengsjoen-orrsjoen-bathroom-vanity-with-sink-faucet-brown-oak-effect__1242635_pe920323_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/aengsjoen-orrsjoen-bathroom-vanity-with-sink-faucet-brown-oak-effect__1241502_pe919813_s5.jpg?f=xl']
-      },
-      {
-        "name": 'High gloss white',
-        "hex": '#FFFDFA',
-        "images": ['https://www.ikea.com/us/en/images/products/aengsjoen-orrsjoen-bathroom-vanity-with-sink-faucet-high-gloss-white__1217246_pe912642_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/aengsjoen-orrsjoen-bathroom-vanity-with-sink-faucet-high-gloss-white__1256585_pe925146_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/aengsjoen-orrsjoen-bathroom-vanity-with-sink-faucet-high-gloss-white__1242633_pe920325_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/aengsjoen-orrsjoen-bathroom-vanity-with-sink-faucet-high-gloss-white__1241502_pe919813_s5.jpg?f=xl']
-      },
-    ],
-  },
-  {
-    "id": 10,
-    "name": 'Room darkening curtains',
-    "price": 59.99,
-    "image": 'https://www.ikea.com/us/en/images/products/vilborg-room-darkening-curtains-1-pair-beige-with-heading-tape__0598849_pe677835_s5.jpg?f=xl',
-    "description": 'Densely woven curtains in a timeless color – great with most interiors and make your room feel cozy. Easy to hang and perfect to close when you want to protect against peering eyes, heat or cold draughts.',
-    "category": 'Living Room',
-    "colors": [
-      {
-        "name": 'Beige',
-        "hex": '#F5F5DC',
-        "images": ['https://www.ikea.com/us/en/images/products/vilborg-room-darkening-curtains-1-pair-beige-with-heading-tape__0598849_pe677835_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vilborg-room-darkening-curtains-1-pair-beige-with-heading-tape__0205042_pe360063_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vilborg-room-darkening-curtains-1-pair-beige-with-heading-tape__0886411_pe606129_s5.jpg?f=xl'] 
-      },
-      {
-        "name": 'Grey',
-        "hex": '#808080',
-        "images": ['https://www.ikea.com/us/en/images/products/vilborg-room-darkening-curtains-1-pair-gray__0594844_pe675879_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vilborg-room-darkening-curtains-1-pair-gray__1187779_pe899268_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vilborg-room-darkening-curtains-1-pair-gray__1187778_pe899269_s5.jpg?f=xl']
-      },
-    ],
-  },
-  {
-    "id": 11,
-    "name": 'Ceiling Lights',
-    "price": 249.99,
-    "image": 'https://www.ikea.com/us/en/images/products/stockholm-2025-pendant-lamp-glass-brass-plated__1285162_pe933235_s5.jpg?f=xl',
-    "description": 'Whether you hang this chandelier over the dining table or in the living room, it will be an eye-catcher with its glass cylinders and brass-plated details.',
-    "category": 'Living Room',
-    "colors": [
-      {
-        "name": 'Pendant lamp, glass/brass plated',
-        "hex": '#F6E7D3',
-        "images": ['https://www.ikea.com/us/en/images/products/stockholm-2025-pendant-lamp-glass-brass-plated__1285162_pe933235_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/stockholm-2025-pendant-lamp-glass-brass-plated__1426339_ph203276_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/stockholm-2025-pendant-lamp-glass-brass-plated__1426337_ph203249_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/stockholm-2025-pendant-lamp-glass-brass-plated__1426340_ph203126_s5.jpg?f=xl'] 
-      },
-    ],
-  },
-  {
-    "id": 12,
-    "name": 'OFELIA VASS Comforter set',
-    "price": 79.99,
-    "image": 'https://www.ikea.com/us/en/images/products/luktvicker-comforter-set-white__1302513_pe938065_s5.jpg?f=xl',
-    "description": 'A set in timeless green with a waffle structure where the comforter’s wonderfully soft cotton shell breathes and its fluffy filling feels like a soft embrace.',
-    "category": 'Bedroom',
-    "colors": [
-      {
-        "name": 'Green',
-        "hex": '#02320cff',
-        "images": ['https://www.ikea.com/us/en/images/products/luktvicker-comforter-set-green__1302522_pe938074_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/luktvicker-comforter-set-green__1302536_pe938037_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/luktvicker-comforter-set-green__1297976_pe935966_s5.jpg?f=xl'] 
-      },
-      {
-        "name": 'White',
-        "hex": '#FFFFFF',
-        "images": ['https://www.ikea.com/us/en/images/products/luktvicker-comforter-set-white__1302513_pe938065_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/luktvicker-comforter-set-white__1302526_pe938076_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/luktvicker-comforter-set-white__1297974_pe935964_s5.jpg?f=xl']
-      },
-    ],
-  },
-  {
-    "id": 13,
-    "name": 'HEDFRYLE Comforter set',
-    "price": 39.99,
-    "image": 'https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-white-beige__1302512_pe938064_s5.jpg?f=xl',
-    "description": 'This set offers several color combinations, so you can easily find an expression that suits your bedroom. It also has a wonderfully soft brushed surface – and a surprisingly low price.',
-    "category": 'Bedroom',
-    "colors": [
-      {
-        "name": 'Pink',
-        "hex": '#FFC0CB',
-        "images": ['https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-pink__1304054_pe938622_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-pink__1304030_pe938598_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-pink__1299176_pe936486_s5.jpg?f=xl'] 
-      },
-      {
-        "name": 'Blue',
-        "hex": '#081a8eff',
-        "images": ['https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-blue__1302532_pe938033_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-blue__1302540_pe938041_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-blue__1298019_pe936008_s5.jpg?f=xl']
-      },
-      {
-        "name": 'Green',
-        "hex": '#488e47ff',
-        "images": ['https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-green__1302556_pe938057_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-green__1302517_pe938069_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-green__1298016_pe936005_s5.jpg?f=xl']
-      },
-      {
-        "name": 'Grey',
-        "hex": '#808080',
-        "images": ['https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-gray__1302550_pe938051_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-gray__1302555_pe938056_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-gray__1298024_pe936009_s5.jpg?f=xl']
-      },
-      {
-        "name": 'White',
-        "hex": '#ffffff',
-        "images": ['https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-white-beige__1302512_pe938064_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-white-beige__1302525_pe938026_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/hedfryle-comforter-set-white-beige__1298769_pe936280_s5.jpg?f=xl']
-      },
-    ],
-  },
-  {
-    "id": 14,
-    "name": 'VAGSJON Bath towels',
-    "price": 6.99,
-    "image": 'https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-light-beige__0933953_pe792303_s5.jpg?f=xl',
-    "description": 'The combination of solid terry and stripes gives you an appealing towel with great function. The solid terry is soft against your skin and the woven stripes are both absorbent and dry quickly.',
-    "category": 'Bathroom',
-    "colors": [
-      {
-        "name": 'Light beige',
-        "hex": '#EAD2A8',
-        "images": ['https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-light-beige__0933953_pe792303_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-light-beige__1135788_pe879143_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-light-beige__0933955_pe792305_s5.jpg?f=xl'] 
-      },
-      {
-        "name": 'Light green',
-        "hex": '#94f2b0ff',
-        "images": ['https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-light-green__1396506_pe967320_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-light-green__1434818_pe983977_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-light-green__1412686_pe974054_s5.jpg?f=xl']
-      },
-      {
-        "name": 'Bright blue',
-        "hex": '#0c60fcff',
-        "images": ['https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-bright-blue__1215159_pe911877_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-bright-blue__1215152_pe911870_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-bright-blue__1215134_pe911852_s5.jpg?f=xl'] 
-      },
-      {
-        "name": 'Dark grey',
-        "hex": '#635d5dff',
-        "images": ['https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-dark-gray__0604997_pe681580_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-dark-gray__1135791_pe879146_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-dark-gray__0887462_pe646607_s5.jpg?f=xl'] 
-      },
-      {
-        "name": 'Bright pink',
-        "hex": '#ed2e68ff',
-        "images": ['https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-bright-pink__1215154_pe911872_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-bright-pink__1215155_pe911873_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/vagsjoen-bath-towel-bright-pink__1215137_pe911855_s5.jpg?f=xl'] 
-      },
-    ],
-  },
-  {
-    "id": 15,
-    "name": 'SLANHOSTMAL Bath towels',
-    "price": 7.99,
-    "image": 'https://www.ikea.com/us/en/images/products/slanhoestmal-bath-towel-black-light-beige-stripe__1255900_pe924773_s5.jpg?f=xl',
-    "description": 'We love stripes! The iconic pattern is simple, yet bold and gives your bathroom a lift. Medium-thick (374 g/m²) SLÅNHÖSTMAL towel in 100% cotton, is absorbent and a perfect choice for an easy refresh.',
-    "category": 'Bathroom',
-    "colors": [
-      {
-        "name": 'Black/light beige stripe',
-        "hex": '#F5F5DC',
-        "images": ['https://www.ikea.com/us/en/images/products/slanhoestmal-bath-towel-black-light-beige-stripe__1255900_pe924773_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/slanhoestmal-bath-towel-black-light-beige-stripe__1255898_pe924771_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/slanhoestmal-bath-towel-black-light-beige-stripe__1255924_pe924797_s5.jpg?f=xl'] 
-      },
-      {
-        "name": 'Orange/pink stripe',
-        "hex": '#F1C9BC',
-        "images": ['https://www.ikea.com/us/en/images/products/slanhoestmal-bath-towel-orange-pink-stripe__1255891_pe924764_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/slanhoestmal-bath-towel-orange-pink-stripe__1255889_pe924762_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/slanhoestmal-bath-towel-orange-pink-stripe__1255915_pe924804_s5.jpg?f=xl']
-      },
-    ],
-  },
-  {
-    "id": 16,
-    "name": 'ROCKAN Bathrobe',
-    "price": 39.99,
-    "image": 'https://www.ikea.com/us/en/images/products/rockan-bathrobe-white__1135537_pe879096_s5.jpg?f=xl',
-    "description": 'A comfy fit for those long, lazy mornings at home – with soft terry on both sides, adjustable belt loops, practical side pockets and sleeves that are easy to move around in.',
-    "category": 'Bathroom',
-    "colors": [
-      {
-        "name": 'White',
-        "hex": '#FFFFFF',
-        "images": ['https://www.ikea.com/us/en/images/products/rockan-bathrobe-white__1135537_pe879096_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/rockan-bathrobe-white__0887699_pe675791_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/rockan-bathrobe-white__1135536_pe879099_s5.jpg?f=xl'] 
-      },
-      {
-        "name": 'Grey',
-        "hex": '#808080',
-        "images": ['https://www.ikea.com/us/en/images/products/rockan-bathrobe-gray__1265427_pe927661_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/rockan-bathrobe-gray__0885588_pe675794_s5.jpg?f=xl','https://www.ikea.com/us/en/images/products/rockan-bathrobe-gray__1135533_pe879100_s5.jpg?f=xl']
-      },
-    ],
-  },
-]
-# --- Routes: Auth ---
-
+# Auth handlers are async so bcrypt waits on its own pool rather than holding
+# a threadpool slot; the short DB calls still go through the threadpool.
 @app.post("/auth/signup", response_model=schemas.UserResponse)
-def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(find_user_by_email, db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await passwords.hash_password(user.password)
     username = user.email.split('@')[0]
     
     new_user = models.User(email=user.email, hashed_password=hashed_password, username=username)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    return await run_in_threadpool(save_user, db, new_user)
 
 @app.post("/auth/signin", response_model=schemas.Token)
-def signin(user: schemas.UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+async def signin(user: schemas.UserLogin, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(find_user_by_email, db, user.email)
+    if not db_user or not await passwords.verify_password(user.password, db_user.hashed_password):
         raise HTTPException(status_code=400, detail="Invalid credentials")
+
+    # Transparently upgrade hashes made with a different cost factor
+    if passwords.needs_rehash(db_user.hashed_password):
+        db_user.hashed_password = await passwords.hash_password(user.password)
+        db_user = await run_in_threadpool(save_user, db, db_user)
     
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = token_for(db_user)
     return {
         "access_token": access_token, 
         "token_type": "bearer", 
@@ -492,83 +160,372 @@ def signin(user: schemas.UserLogin, db: Session = Depends(get_db)):
 # --- Routes: Products ---
 
 @app.get("/products", response_model=List[schemas.ProductResponse])
-def get_products(db: Session = Depends(get_db)):
-    return db.query(models.Product).all()
+def get_products(
+    category: Optional[str] = None,
+    discounted: bool = False,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sort: Literal["id", "name", "price", "effective_price"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=catalog.MAX_PAGE_SIZE),
+    shape: Literal["full", "compact"] = "full",
+    if_none_match: Optional[str] = Header(None),
+    accept_language: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    # The full list and plain category slices are served from the catalog cache.
+    if not (discounted or min_price is not None or max_price is not None or cursor or limit) \
+            and sort == "id" and order == "asc":
+        locale = locales.negotiate(accept_language)
+        category = category or None
+        def build():
+            rows = db.execute(catalog.product_listing_query(category=category)).all()
+            if not rows and category is not None:
+                # Not a category we have; don't spend cache entries on it
+                raise Uncacheable(catalog.serialize_products(rows, shape, locale))
+            translations = ()
+            if locale != locales.DEFAULT_LOCALE:
+                translations = db.execute(locales.translations_query(locale, category=category)).all()
+            return catalog.serialize_products(rows, shape, locale, translations)
+        cached = catalog_cache.get_or_build(("products", locale, category, shape), build)
+        return cached_response(cached, if_none_match, locales.VARY_HEADERS)
+
+    # Without a limit the whole (filtered) list is returned, as before.
+    if cursor and limit is None:
+        limit = catalog.DEFAULT_PAGE_SIZE
+    try:
+        stmt = catalog.product_listing_query(
+            category=category,
+            discounted=discounted,
+            min_price=min_price,
+            max_price=max_price,
+            sort=sort,
+            order=order,
+            cursor=cursor,
+            limit=limit,
+        )
+    except catalog.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    products = [serializers.product_dict(row) for row in db.execute(stmt)]
+    products, next_cursor = catalog.split_page(products, sort, limit)
+    locale = locales.negotiate(accept_language)
+    translations = ()
+    if locale != locales.DEFAULT_LOCALE and products:
+        product_ids = [product["id"] for product in products]
+        translations = db.execute(locales.translations_query(locale, product_ids=product_ids)).all()
+    headers = dict(locales.VARY_HEADERS)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return serializers.json_response(catalog.encode_products(products, shape, locale, translations), headers)
+
+@app.get("/products/search", response_model=List[schemas.ProductResponse])
+def search_products(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(search.DEFAULT_LIMIT, ge=1, le=search.MAX_LIMIT),
+    shape: Literal["full", "compact"] = "full",
+    db: Session = Depends(get_db),
+):
+    stmt = search.search_products_query(q, limit, db.bind.dialect.name)
+    rows = db.execute(stmt).all() if stmt is not None else []
+    return serializers.json_response(catalog.serialize_products(rows, shape))
+
+@app.get("/products/export")
+def export_products():
+    # NDJSON straight off a streaming cursor; the catalog is never held in memory
+    return StreamingResponse(catalog_io.export_products(models.engine), media_type="application/x-ndjson")
+
+@app.get("/products/popular", response_model=List[schemas.ProductResponse])
+def get_popular_products(
+    kind: Literal["trending", "best_sellers"] = "trending",
+    limit: int = Query(12, ge=1, le=popularity.SNAPSHOT_SIZE),
+    shape: Literal["full", "compact"] = "full",
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    # Ranked ids from the flusher's snapshot; the products themselves are
+    # current, and cached until the next catalog write
+    product_ids = popularity.snapshot.get(kind, limit)
+    def build():
+        rows = {row.id: row for row in db.execute(queries.products(product_ids))}
+        return catalog.serialize_products([rows[i] for i in product_ids if i in rows], shape)
+    cached = catalog_cache.get_or_build(("popular", product_ids, shape), build)
+    return cached_response(cached, if_none_match)
+
+@app.get("/products/{product_id}/related", response_model=List[schemas.ProductResponse])
+def get_related_products(
+    product_id: int,
+    limit: int = Query(related.TOP_K, ge=1, le=related.TOP_K),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    def build():
+        rows = db.execute(queries.related_products(product_id, limit)).all()
+        if not rows and db.execute(catalog.product_query(product_id)).first() is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return catalog.serialize_products(rows)
+    cached = catalog_cache.get_or_build(("related", related.generation, product_id, limit), build)
+    return cached_response(cached, if_none_match)
 
 @app.get("/products/{product_id}", response_model=schemas.ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
+def get_product(product_id: int, if_none_match: Optional[str] = Header(None),
+                accept_language: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    locale = locales.negotiate(accept_language)
+    def build():
+        row = db.execute(catalog.product_query(product_id)).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Product not found")
+        translations = ()
+        if locale != locales.DEFAULT_LOCALE:
+            translations = db.execute(locales.translations_query(locale, product_ids=[product_id])).all()
+        return catalog.serialize_product(row, locale, translations)
+    cached = catalog_cache.get_or_build(("product", locale, product_id), build)
+    popularity.counters.incr(product_id, "views")
+    return cached_response(cached, if_none_match, locales.VARY_HEADERS)
+
+# --- Routes: Metrics ---
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+# --- Routes: Admin ---
+
+@app.post("/admin/products/import", dependencies=[Depends(auth.require_admin)])
+async def import_products(request: Request, format: Literal["ndjson", "csv"] = "ndjson", strict: bool = False):
+    # Spool the upload first so the import runs on a plain file in the threadpool
+    with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+
+        def run():
+            records = catalog_io.READERS[format](catalog_io.text_stream(upload))
+            return catalog_io.import_products(models.engine, records, strict=strict)
+
+        try:
+            return await run_in_threadpool(run)
+        except catalog_io.CatalogImportError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+@app.post("/admin/profile", dependencies=[Depends(auth.require_admin)])
+async def profile_worker(
+    seconds: float = Query(10, gt=0, le=profiler.MAX_SECONDS),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    format: Literal["json", "collapsed"] = "json",
+    all_threads: bool = False,
+):
+    # Samples this worker process only; the sampler blocks a threadpool thread, not the loop
+    try:
+        result = await run_in_threadpool(profiler.profile, app, seconds, interval_ms / 1000, all_threads)
+    except profiler.ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed_text(result))
+    return result
 
 # --- Routes: Cart (Now safe because get_current_user is defined above) ---
 
 @app.get("/cart", response_model=List[schemas.CartItemResponse])
-def get_cart(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return current_user.cart_items
+def get_cart(current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    return serializers.json_response(serializers.cart_body(db.execute(queries.cart_items(current_user.id))))
+
+@app.get("/cart/summary", response_model=schemas.CartSummary)
+def get_cart_summary(voucher: Optional[str] = None, current_user: Principal = Depends(get_current_user),
+                     db: Session = Depends(get_db)):
+    # Totals only; unit prices come from the price book, so a warm book costs one small query
+    lines = db.execute(queries.cart_lines(current_user.id)).all()
+    prices, missing, version = pricing.price_book.lookup({line.product_id for line in lines})
+    if missing:
+        prices.update(pricing.price_book.fill(version, db.execute(queries.product_prices(missing))))
+    summary = pricing.summarize(lines, prices, voucher)
+    return serializers.json_response(serializers.encode_one(summary, schemas.CartSummary))
+
+def check_products_exist(db: Session, product_ids):
+    if product_ids and len(db.execute(queries.existing_product_ids(product_ids)).all()) != len(product_ids):
+        raise HTTPException(status_code=404, detail="Product not found")
 
 @app.post("/cart", response_model=schemas.CartItemResponse)
-def add_to_cart(item: schemas.CartItemCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    # Check if item exists in cart
-    existing = db.query(models.CartItem).filter(
-        models.CartItem.user_id == current_user.id,
-        models.CartItem.product_id == item.product_id
+def add_to_cart(item: schemas.CartItemCreate, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    check_products_exist(db, {item.product_id})
+    # Single INSERT ... ON CONFLICT DO UPDATE; concurrent adds can't duplicate the line
+    dialect = db.get_bind().dialect.name
+    db.execute(cart.add_statement(dialect, current_user.id, item.product_id, item.quantity, item.selected_color))
+    db.commit()
+    popularity.counters.incr(item.product_id, "cart_adds", item.quantity)
+    row = db.execute(
+        queries.cart_item(current_user.id, item.product_id, cart.color_key(item.selected_color))
     ).first()
-    
-    if existing:
-        existing.quantity += item.quantity
-        db.commit()
-        db.refresh(existing)
-        return existing
-    
-    # Create new item
-    new_item = models.CartItem(
-        user_id=current_user.id,
-        product_id=item.product_id,
-        quantity=item.quantity,
-        selected_color=item.selected_color
-    )
-    db.add(new_item)
+    line = serializers.cart_item_dict(row)
+    events.publish(current_user.id, "cart.item", line)
+    return serializers.json_response(serializers.encode_one(line, schemas.CartItemResponse))
+
+@app.patch("/cart", response_model=List[schemas.CartItemResponse])
+def update_cart(patch: schemas.CartPatch, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    # Applies every operation in one transaction and returns the resulting cart
+    check_products_exist(db, {op.product_id for op in patch.operations if op.op != "remove"})
+    dialect = db.get_bind().dialect.name
+    for op in patch.operations:
+        db.execute(cart.operation_statement(dialect, current_user.id, op))
     db.commit()
-    db.refresh(new_item)
-    return new_item
+    for op in patch.operations:
+        if op.op == "add":
+            popularity.counters.incr(op.product_id, "cart_adds", op.quantity)
+    items = [serializers.cart_item_dict(row) for row in db.execute(queries.cart_items(current_user.id))]
+    for event_type, data in cart.operation_events(patch.operations, items):
+        events.publish(current_user.id, event_type, data)
+    return serializers.json_response(serializers.encode_list(items, schemas.CartItemResponse))
 
 @app.delete("/cart/{product_id}")
-def remove_from_cart(product_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db.query(models.CartItem).filter(
+def remove_from_cart(product_id: int, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    removed = db.query(models.CartItem).filter(
         models.CartItem.user_id == current_user.id,
         models.CartItem.product_id == product_id
     ).delete()
     db.commit()
+    if removed:
+        events.publish(current_user.id, "cart.removed", cart.removed_event(product_id))
     return {"message": "Item removed"}
 
 # --- Routes: Favorites ---
 
 @app.get("/favorites", response_model=List[schemas.FavoriteResponse])
-def get_favorites(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return current_user.favorites
+def get_favorites(current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    return serializers.json_response(serializers.favorites_body(db.execute(queries.favorites(current_user.id))))
+
+def favorite_id_set(db: Session, user_id: int):
+    return favorites.favorite_ids.get_or_load(
+        user_id, lambda: db.execute(favorites.ids_statement(user_id)).scalars().all()
+    )
+
+@app.get("/favorites/ids", response_model=schemas.FavoriteIds)
+def get_favorite_ids(current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    # Just the product ids, from the per-user set; enough to draw the hearts on a grid
+    ids = favorite_id_set(db, current_user.id)
+    return serializers.json_response(serializers.encode_one({"product_ids": sorted(ids)}, schemas.FavoriteIds))
+
+@app.post("/favorites/contains", response_model=schemas.FavoriteIds)
+def favorites_contain(query: schemas.FavoriteIdsQuery, current_user: Principal = Depends(get_current_user),
+                      db: Session = Depends(get_db)):
+    ids = favorite_id_set(db, current_user.id)
+    found = [product_id for product_id in dict.fromkeys(query.product_ids) if product_id in ids]
+    return serializers.json_response(serializers.encode_one({"product_ids": found}, schemas.FavoriteIds))
 
 @app.post("/favorites", response_model=schemas.FavoriteResponse)
-def add_favorite(fav: schemas.FavoriteCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    existing = db.query(models.Favorite).filter(
-        models.Favorite.user_id == current_user.id,
-        models.Favorite.product_id == fav.product_id
-    ).first()
-    if existing:
-        return existing
-    
-    new_fav = models.Favorite(user_id=current_user.id, product_id=fav.product_id)
-    db.add(new_fav)
+def add_favorite(fav: schemas.FavoriteCreate, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    check_products_exist(db, {fav.product_id})
+    # Single INSERT ... ON CONFLICT DO NOTHING; favoriting twice is a no-op
+    dialect = db.get_bind().dialect.name
+    added = db.execute(favorites.add_statement(dialect, current_user.id, fav.product_id)).rowcount == 1
     db.commit()
-    db.refresh(new_fav)
-    return new_fav
+    favorite = serializers.favorite_dict(db.execute(queries.favorite_item(current_user.id, fav.product_id)).first())
+    if added:
+        favorites.favorite_added(current_user.id, fav.product_id)
+        popularity.counters.incr(fav.product_id, "favorites")
+        events.publish(current_user.id, "favorite.added", favorite)
+    return serializers.json_response(serializers.encode_one(favorite, schemas.FavoriteResponse))
 
 @app.delete("/favorites/{product_id}")
-def remove_favorite(product_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db.query(models.Favorite).filter(
+def remove_favorite(product_id: int, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    removed = db.query(models.Favorite).filter(
         models.Favorite.user_id == current_user.id,
         models.Favorite.product_id == product_id
     ).delete()
     db.commit()
-    return {"message": "Favorite removed"}
\ No newline at end of file
+    if removed:
+        favorites.favorite_removed(current_user.id, product_id)
+        events.publish(current_user.id, "favorite.removed", {"product_id": product_id})
+    return {"message": "Favorite removed"}
+
+# --- Routes: Events ---
+
+def get_stream_user(authorization: Optional[str] = Header(None), token: Optional[str] = None) -> Principal:
+    # EventSource can't send headers, so browsers pass the token as ?token=
+    scheme, _, credentials = (authorization or "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        token = credentials
+    if not token:
+        raise auth.credentials_exception()
+    with SessionLocal() as db:
+        return get_current_user(token, db)
+
+@app.get("/events")
+async def stream_events(last_event_id: Optional[str] = Header(None), current_user: Principal = Depends(get_stream_user)):
+    # Cart and favorites deltas for this user, as Server-Sent Events (see events.py)
+    return StreamingResponse(
+        events.stream(current_user.id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- Routes: Orders ---
+
+def get_order(db: Session, user_id: int, order_id: int):
+    order = db.execute(queries.order(user_id, order_id)).scalars().first()
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+@app.post("/checkout", response_model=schemas.OrderResponse)
+def checkout(voucher: Optional[str] = None, current_user: Principal = Depends(get_current_user),
+             db: Session = Depends(get_db)):
+    try:
+        order_id = orders.checkout(db, current_user.id, voucher)
+    except orders.CheckoutError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc))
+    events.publish(current_user.id, "cart.cleared", {})
+    return get_order(db, current_user.id, order_id)
+
+@app.get("/orders", response_model=List[schemas.OrderResponse])
+def list_orders(current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    return db.execute(queries.orders(current_user.id)).scalars().all()
+
+@app.get("/orders/{order_id}", response_model=schemas.OrderResponse)
+def read_order(order_id: int, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    return get_order(db, current_user.id, order_id)
+
+@app.post("/orders/{order_id}/pay", response_model=schemas.OrderResponse)
+def pay_order(order_id: int, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    try:
+        orders.pay(db, current_user.id, order_id)
+    except orders.CheckoutError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc))
+    return get_order(db, current_user.id, order_id)
+
+@app.post("/orders/{order_id}/cancel", response_model=schemas.OrderResponse)
+def cancel_order(order_id: int, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    try:
+        orders.cancel(db, current_user.id, order_id)
+    except orders.CheckoutError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc))
+    return get_order(db, current_user.id, order_id)
+
+@app.put("/admin/inventory/{product_id}", response_model=schemas.InventoryResponse,
+         dependencies=[Depends(auth.require_admin)])
+def set_inventory(product_id: int, stock: schemas.InventoryUpdate, db: Session = Depends(get_db)):
+    check_products_exist(db, {product_id})
+    dialect = db.get_bind().dialect.name
+    if db.execute(orders.set_stock_statement(dialect, product_id, stock.on_hand)).rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Stock can't go below the reserved quantity")
+    db.commit()
+    return db.execute(queries.inventory(product_id)).scalars().first()
+
+@app.put("/admin/locales/{code}", response_model=schemas.LocaleResponse,
+         dependencies=[Depends(auth.require_admin)])
+def set_locale(code: str, settings: schemas.LocaleUpdate, db: Session = Depends(get_db)):
+    code = code.lower()
+    if code == locales.DEFAULT_LOCALE:
+        raise HTTPException(status_code=400, detail="The catalog locale has no settings")
+    # Every worker reloads its locales once this commits
+    locale = db.merge(models.Locale(code=code, **settings.model_dump()))
+    db.commit()
+    return locale
+
+# --- Async Routes ---
+if database.DB_MODE == "async":
+    import routes_async
+    routes_async.install(app)
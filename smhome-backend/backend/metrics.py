@@ -0,0 +1,226 @@
+"""Per-route request metrics in Prometheus text format.
+
+Set METRICS=0 to turn everything off: the middleware and the SQLAlchemy
+hooks are then never installed, so requests pay nothing for it.
+
+SLOW_REQUEST_MS > 0 additionally logs requests slower than the threshold
+(a SLOW_REQUEST_SAMPLE fraction of them) to the `smhome.slow` logger, with
+the SQL statements they ran.
+"""
+import bisect
+import logging
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_ENABLED = os.getenv("METRICS", "1") != "0"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+SLOW_REQUEST_SAMPLE = float(os.getenv("SLOW_REQUEST_SAMPLE", "1.0"))
+# Statements kept per request for the slow log
+MAX_LOGGED_STATEMENTS = 50
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = "<unmatched>"
+
+logger = logging.getLogger("smhome.slow")
+
+
+class RequestStats:
+    """Work attributed to the request being served in the current context.
+
+    The object is shared, not copied, by the threadpool and asyncio tasks a
+    request fans out to, so their DB and bcrypt time add up here.
+    """
+    __slots__ = ("queries", "db_seconds", "bcrypt_seconds", "statements")
+
+    def __init__(self, capture_statements: bool):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.bcrypt_seconds = 0.0
+        self.statements: Optional[List[str]] = [] if capture_statements else None
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request() -> Optional[RequestStats]:
+    """The stats of the request being served here, or None outside one
+    (background threads, startup, the invalidation listener)."""
+    return _current.get()
+
+
+class RouteMetrics:
+    __slots__ = ("requests", "errors", "latency_sum", "buckets", "queries", "db_seconds",
+                 "bcrypt_seconds", "response_bytes")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.bcrypt_seconds = 0.0
+        self.response_bytes = 0
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self._statuses: Dict[Tuple[str, str, int], int] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats,
+                response_bytes: int, error: bool):
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = RouteMetrics()
+            metrics.requests += 1
+            metrics.errors += error
+            metrics.latency_sum += seconds
+            metrics.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            metrics.queries += stats.queries
+            metrics.db_seconds += stats.db_seconds
+            metrics.bcrypt_seconds += stats.bcrypt_seconds
+            metrics.response_bytes += response_bytes
+            key = (method, route, status)
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._statuses.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            routes = sorted(self._routes.items())
+            statuses = sorted(self._statuses.items())
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        family("http_requests_total", "counter", "Requests by route and status.")
+        for (method, route, status), count in statuses:
+            lines.append(f'http_requests_total{{{_labels(method, route)},status="{status}"}} {count}')
+
+        family("http_request_errors_total", "counter", "Requests that raised an unhandled exception.")
+        for (method, route), m in routes:
+            lines.append(f"http_request_errors_total{{{_labels(method, route)}}} {m.errors}")
+
+        family("http_request_duration_seconds", "histogram", "Request latency.")
+        for (method, route), m in routes:
+            labels = _labels(method, route)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, m.buckets):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {m.requests}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {m.latency_sum:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {m.requests}")
+
+        for name, attr, help_text in (
+            ("db_queries_total", "queries", "SQL statements executed."),
+            ("db_query_seconds_total", "db_seconds", "Time spent executing SQL."),
+            ("bcrypt_seconds_total", "bcrypt_seconds", "Time spent hashing or verifying passwords."),
+            ("http_response_bytes_total", "response_bytes", "Response body bytes sent."),
+        ):
+            family(name, "counter", help_text)
+            for (method, route), m in routes:
+                value = getattr(m, attr)
+                value = f"{value:.6f}" if isinstance(value, float) else value
+                lines.append(f"{name}{{{_labels(method, route)}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(method: str, route: str) -> str:
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}"'
+
+
+registry = Registry()
+
+
+# --- Hooks ---
+
+def record_bcrypt(seconds: float):
+    stats = _current.get()
+    if stats is not None:
+        stats.bcrypt_seconds += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info.get("query_start")
+    if started:
+        stats.db_seconds += time.perf_counter() - started.pop()
+    stats.queries += 1
+    if stats.statements is not None and len(stats.statements) < MAX_LOGGED_STATEMENTS:
+        stats.statements.append(" ".join(statement.split()))
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and attributes it to its route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats(capture_statements=SLOW_REQUEST_MS > 0)
+        token = _current.set(stats)
+        status, sent, error = 500, 0, False
+
+        async def send_counted(message):
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_counted)
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            route = scope.get("route")
+            route = getattr(route, "path", None) or UNMATCHED_ROUTE
+            registry.observe(scope["method"], route, status, elapsed, stats, sent, error)
+            if SLOW_REQUEST_MS > 0 and elapsed * 1000 >= SLOW_REQUEST_MS and random.random() < SLOW_REQUEST_SAMPLE:
+                logger.warning(
+                    "slow request %s %s -> %s in %.1f ms (%d queries, %.1f ms SQL, %.1f ms bcrypt)\n  %s",
+                    scope["method"], scope["path"], status, elapsed * 1000, stats.queries,
+                    stats.db_seconds * 1000, stats.bcrypt_seconds * 1000,
+                    "\n  ".join(stats.statements or ()),
+                )
+
+
+def install(app):
+    """Add the middleware and SQL hooks; a no-op when METRICS=0."""
+    if not METRICS_ENABLED:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,101 @@
+import json
+
+from sqlalchemy import inspect, text
+
+import cart
+import orders
+
+# Idempotent, in-place upgrades for databases created before a column or
+# constraint existed; create_all() only ever adds missing tables.
+
+
+def upgrade(engine):
+    with engine.begin() as conn:
+        _cart_items_color_key(conn)
+        _favorites_unique(conn)
+        _related_refresh_lease(conn)
+        _order_price_breakdown(conn)
+        _inventory_rows(conn)
+
+
+def _has_index(conn, table: str, name: str) -> bool:
+    return any(ix["name"] == name for ix in inspect(conn).get_indexes(table))
+
+
+def _cart_items_color_key(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("cart_items")}
+    if "color_key" not in columns:
+        conn.exec_driver_sql("ALTER TABLE cart_items ADD COLUMN color_key VARCHAR NOT NULL DEFAULT ''")
+        rows = conn.execute(text("SELECT id, selected_color FROM cart_items WHERE selected_color IS NOT NULL")).all()
+        for row_id, selected_color in rows:
+            value = cart.color_key(_load_json(selected_color))
+            conn.execute(text("UPDATE cart_items SET color_key = :key WHERE id = :id"), {"key": value, "id": row_id})
+
+    if not _has_index(conn, "cart_items", "uq_cart_items_line"):
+        # Fold duplicate lines into the oldest one before enforcing uniqueness
+        conn.exec_driver_sql("""
+            UPDATE cart_items SET quantity = (
+                SELECT SUM(d.quantity) FROM cart_items AS d
+                WHERE d.user_id = cart_items.user_id
+                  AND d.product_id = cart_items.product_id
+                  AND d.color_key = cart_items.color_key
+            )
+            WHERE id IN (
+                SELECT MIN(id) FROM cart_items
+                GROUP BY user_id, product_id, color_key HAVING COUNT(*) > 1
+            )
+        """)
+        conn.exec_driver_sql("""
+            DELETE FROM cart_items WHERE id NOT IN (
+                SELECT MIN(id) FROM cart_items GROUP BY user_id, product_id, color_key
+            )
+        """)
+        conn.exec_driver_sql(
+            "CREATE UNIQUE INDEX uq_cart_items_line ON cart_items (user_id, product_id, color_key)"
+        )
+
+
+def _favorites_unique(conn):
+    if not _has_index(conn, "favorites", "uq_favorites_user_product"):
+        conn.exec_driver_sql("""
+            DELETE FROM favorites WHERE id NOT IN (
+                SELECT MIN(id) FROM favorites GROUP BY user_id, product_id
+            )
+        """)
+        conn.exec_driver_sql(
+            "CREATE UNIQUE INDEX uq_favorites_user_product ON favorites (user_id, product_id)"
+        )
+
+
+def _related_refresh_lease(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("related_state")}
+    if "lease_owner" not in columns:
+        conn.exec_driver_sql("ALTER TABLE related_state ADD COLUMN lease_owner VARCHAR")
+        conn.exec_driver_sql("ALTER TABLE related_state ADD COLUMN lease_until TIMESTAMP")
+    if not _has_index(conn, "related_products", "ix_related_products_related_id"):
+        conn.exec_driver_sql("CREATE INDEX ix_related_products_related_id ON related_products (related_id)")
+
+
+def _order_price_breakdown(conn):
+    columns = {c["name"] for c in inspect(conn).get_columns("orders")}
+    if "subtotal" in columns:
+        return
+    for name in ("subtotal", "discount_total", "shipping", "voucher_discount", "tax"):
+        conn.exec_driver_sql(f"ALTER TABLE orders ADD COLUMN {name} FLOAT NOT NULL DEFAULT 0")
+    conn.exec_driver_sql("ALTER TABLE orders ADD COLUMN voucher VARCHAR")
+    # Older orders were charged the sum of their lines and nothing else
+    conn.exec_driver_sql("UPDATE orders SET subtotal = total")
+
+
+def _inventory_rows(conn):
+    # Products from before inventory existed (or added outside an import)
+    conn.execute(orders.stock_missing_statement())
+
+
+def _load_json(value):
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
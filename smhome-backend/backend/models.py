@@ -1,10 +1,11 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, JSON, Date, DateTime, ForeignKey, Index, CheckConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from database import DATABASE_URL, make_engine
 
 # Database Setup
-SQLALCHEMY_DATABASE_URL = "sqlite:///./furniture_store.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -32,6 +33,68 @@ class Product(Base):
     discountPercent = Column(Integer, nullable=True)
     colors = Column(JSON) 
 
+    @property
+    def effectivePrice(self):
+        return effective_price(self.price, self.discountPercent)
+
+def effective_price(price, discount_percent):
+    """Price after discount, rounded to cents."""
+    if price is None:
+        return None
+    if not discount_percent or discount_percent <= 0:
+        return round(price, 2)
+    return round(price * (100 - discount_percent) / 100, 2)
+
+class ProductTranslation(Base):
+    """A product's name, description and category label in another locale;
+    fields left null fall back to the product's own."""
+    __tablename__ = "product_translations"
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    locale = Column(String, primary_key=True)
+    name = Column(String, nullable=True)
+    description = Column(String, nullable=True)
+    category = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_product_translations_locale", "locale"),
+    )
+
+class Locale(Base):
+    """A catalog locale: the currency its prices are shown in, the rate from
+    the catalog currency, and how amounts are written (see locales.py)."""
+    __tablename__ = "locales"
+    code = Column(String, primary_key=True)
+    currency = Column(String, nullable=False)
+    rate = Column(Float, nullable=False, default=1.0)
+    decimals = Column(Integer, nullable=False, default=2)
+    decimal_separator = Column(String, nullable=False, default=".")
+    group_separator = Column(String, nullable=False, default=",")
+    # "{amount}" is replaced by the formatted number
+    price_format = Column(String, nullable=False)
+
+class ProductListing(Base):
+    """Denormalized read model of `products` for listing queries, kept in
+    sync by listings.py. Every listing filter/sort is covered by an index."""
+    __tablename__ = "product_listings"
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    category = Column(String)
+    name = Column(String)
+    price = Column(Float)
+    effective_price = Column(Float)
+    is_discounted = Column(Boolean, nullable=False, default=False)
+    color_count = Column(Integer, nullable=False, default=0)
+    primary_image = Column(String)
+
+    __table_args__ = (
+        Index("ix_listings_category", "category"),
+        Index("ix_listings_category_price", "category", "price"),
+        Index("ix_listings_category_effective_price", "category", "effective_price"),
+        Index("ix_listings_category_name", "category", "name"),
+        Index("ix_listings_discounted_category_effective_price", "is_discounted", "category", "effective_price"),
+        Index("ix_listings_price", "price"),
+        Index("ix_listings_effective_price", "effective_price"),
+    )
+
 class CartItem(Base):
     __tablename__ = "cart_items"
     id = Column(Integer, primary_key=True, index=True)
@@ -39,6 +102,11 @@ class CartItem(Base):
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Integer, default=1)
     selected_color = Column(JSON, nullable=True) # Stores the specific color choice
+    color_key = Column(String, nullable=False, default="", server_default="") # Normalized selected_color, see cart.color_key
+
+    __table_args__ = (
+        Index("uq_cart_items_line", "user_id", "product_id", "color_key", unique=True),
+    )
 
     user = relationship("User", back_populates="cart_items")
     product = relationship("Product")
@@ -49,8 +117,138 @@ class Favorite(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     product_id = Column(Integer, ForeignKey("products.id"))
 
+    __table_args__ = (
+        Index("uq_favorites_user_product", "user_id", "product_id", unique=True),
+    )
+
     user = relationship("User", back_populates="favorites")
     product = relationship("Product")
 
+class Inventory(Base):
+    """Stock per product. `reserved` units are held by pending orders, so only
+    `on_hand - reserved` can be sold. Imports and upgrades give every product
+    a row (see orders.INITIAL_STOCK); one without a row can't be sold."""
+    __tablename__ = "inventory"
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    on_hand = Column(Integer, nullable=False, default=0)
+    reserved = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        CheckConstraint("reserved >= 0 AND reserved <= on_hand", name="ck_inventory_reserved"),
+    )
+
+class Order(Base):
+    __tablename__ = "orders"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(String, nullable=False, default="pending") # pending -> paid | cancelled | expired
+    # Priced at checkout by pricing.summarize(), as GET /cart/summary showed it
+    subtotal = Column(Float, nullable=False, default=0)
+    discount_total = Column(Float, nullable=False, default=0)
+    shipping = Column(Float, nullable=False, default=0)
+    voucher = Column(String, nullable=True)
+    voucher_discount = Column(Float, nullable=False, default=0)
+    tax = Column(Float, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False) # When an unpaid reservation lapses
+    paid_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_orders_user_id", "user_id"),
+        Index("ix_orders_status_expires_at", "status", "expires_at"),
+    )
+
+    lines = relationship("OrderLine", back_populates="order", order_by="OrderLine.id")
+
+class OrderLine(Base):
+    """A cart line frozen at checkout, priced from the product at that time."""
+    __tablename__ = "order_lines"
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    selected_color = Column(JSON, nullable=True)
+    unit_price = Column(Float, nullable=False) # After discount
+    discount_percent = Column(Integer, nullable=True)
+    line_total = Column(Float, nullable=False)
+
+    order = relationship("Order", back_populates="lines")
+
+# --- Related products (built by related.py) ---
+
+class RelatedProduct(Base):
+    """Top-K suggestions per product, in rank order."""
+    __tablename__ = "related_products"
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    related_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=False)
+
+    __table_args__ = (
+        # Finds the products suggesting a changed one
+        Index("ix_related_products_related_id", "related_id"),
+    )
+
+class ProductPair(Base):
+    """How many users have both products in their favorites or cart; stored
+    in both directions."""
+    __tablename__ = "product_pairs"
+    product_id = Column(Integer, primary_key=True)
+    other_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_product_pairs_product_count", "product_id", "count"),
+    )
+
+class RelatedBasket(Base):
+    """Each user's favorited/carted products as of the last refresh."""
+    __tablename__ = "related_baskets"
+    user_id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, primary_key=True)
+
+class RelatedCatalog(Base):
+    """Each product's category and price as of the last refresh."""
+    __tablename__ = "related_catalog"
+    product_id = Column(Integer, primary_key=True)
+    category = Column(String)
+    effective_price = Column(Float)
+
+class RelatedState(Base):
+    """The suggestions' generation, and the lease held by the worker
+    refreshing them."""
+    __tablename__ = "related_state"
+    id = Column(Integer, primary_key=True)
+    generation = Column(Integer, nullable=False, default=0)
+    lease_owner = Column(String, nullable=True)
+    lease_until = Column(DateTime, nullable=True)
+
+class ProductActivity(Base):
+    """Daily view/favorite/add-to-cart counts per product, written in batches
+    by popularity.py."""
+    __tablename__ = "product_activity"
+    product_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    views = Column(Integer, nullable=False, default=0)
+    favorites = Column(Integer, nullable=False, default=0)
+    cart_adds = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_product_activity_day", "day"),
+    )
+
+class CacheInvalidation(Base):
+    """Cache invalidation messages between workers; see invalidation.py."""
+    __tablename__ = "cache_invalidations"
+    id = Column(Integer, primary_key=True)
+    origin = Column(String, nullable=False)
+    topic = Column(String, nullable=False)
+    key = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+    # Ids must never be reused once pruned, or workers would skip messages
+    __table_args__ = {"sqlite_autoincrement": True}
+
 def init_db():
     Base.metadata.create_all(bind=engine)
\ No newline at end of file
@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, exists, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+import models
+import pricing
+import queries
+from database import upsert_insert
+
+logger = logging.getLogger("smhome.orders")
+
+# Checkout reserves stock for the order's lines; payment turns the
+# reservation into a sale, and cancellation or expiry hands it back.
+#
+# Stock only ever moves through conditional UPDATEs (`... WHERE on_hand -
+# reserved >= :qty`), so concurrent checkouts can't oversell. Order status
+# moves the same way (`... WHERE status = 'pending'`), so a reservation is
+# released or consumed exactly once even when the sweeper races a payment.
+#
+# Every product has an inventory row: catalog imports create one for each
+# new product, and the schema upgrade for products that predate inventory,
+# each starting at INITIAL_STOCK; PUT /admin/inventory/{id} sets it after.
+INITIAL_STOCK = int(os.getenv("INITIAL_STOCK", "100"))
+RESERVATION_MINUTES = float(os.getenv("RESERVATION_MINUTES", "15"))
+SWEEP_INTERVAL_SECONDS = float(os.getenv("ORDER_SWEEP_SECONDS", "30"))
+SWEEP_BATCH = 500
+
+Inventory = models.Inventory
+Order = models.Order
+
+
+class CheckoutError(Exception):
+    status_code = 400
+
+
+class EmptyCart(CheckoutError):
+    def __init__(self):
+        super().__init__("Cart is empty")
+
+
+class OutOfStock(CheckoutError):
+    status_code = 409
+
+    def __init__(self, product_id: int):
+        super().__init__(f"Not enough stock for product {product_id}")
+        self.product_id = product_id
+
+
+class OrderNotFound(CheckoutError):
+    status_code = 404
+
+    def __init__(self):
+        super().__init__("Order not found")
+
+
+class InvalidOrderState(CheckoutError):
+    status_code = 409
+
+
+def utcnow() -> datetime:
+    # Stored naive, in UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# --- Statements ---
+
+def reserve_statement(product_id: int, quantity: int):
+    return (
+        update(Inventory)
+        .where(Inventory.product_id == product_id, Inventory.on_hand - Inventory.reserved >= quantity)
+        .values(reserved=Inventory.reserved + quantity)
+    )
+
+
+def release_statement(product_id: int, quantity: int):
+    return (
+        update(Inventory)
+        .where(Inventory.product_id == product_id)
+        .values(reserved=Inventory.reserved - quantity)
+    )
+
+
+def consume_statement(product_id: int, quantity: int):
+    return (
+        update(Inventory)
+        .where(Inventory.product_id == product_id)
+        .values(on_hand=Inventory.on_hand - quantity, reserved=Inventory.reserved - quantity)
+    )
+
+
+def transition_statement(order_id: int, to_status: str, *conditions, **values):
+    return (
+        update(Order)
+        .where(Order.id == order_id, Order.status == "pending", *conditions)
+        .values(status=to_status, **values)
+    )
+
+
+def set_stock_statement(dialect_name: str, product_id: int, on_hand: int):
+    """Upsert the stock level; refused (rowcount 0) below what is reserved."""
+    stmt = upsert_insert(dialect_name, Inventory.__table__).values(product_id=product_id, on_hand=on_hand, reserved=0)
+    return stmt.on_conflict_do_update(
+        index_elements=["product_id"],
+        set_={"on_hand": stmt.excluded.on_hand},
+        where=Inventory.__table__.c.reserved <= stmt.excluded.on_hand,
+    )
+
+
+def stock_missing_statement(product_ids: Optional[Iterable[int]] = None, on_hand: int = INITIAL_STOCK):
+    """Give each product (of `product_ids`, or all) without an inventory row
+    one holding `on_hand` units; products that have one are left alone."""
+    Product = models.Product
+    products = select(Product.id, literal(on_hand), literal(0)).where(
+        ~exists().where(Inventory.product_id == Product.id)
+    )
+    if product_ids is not None:
+        products = products.where(Product.id.in_(list(product_ids)))
+    return insert(Inventory).from_select(["product_id", "on_hand", "reserved"], products)
+
+
+def _quantities(lines) -> Counter:
+    needed = Counter()
+    for line in lines:
+        needed[line.product_id] += line.quantity
+    return needed
+
+
+# --- Operations ---
+# Each takes a sync Session and commits; the async routes call them through
+# AsyncSession.run_sync(). Every operation writes before it reads, so on
+# SQLite the write lock is taken first and the reads happen inside it.
+
+def checkout(db: Session, user_id: int, voucher_code: Optional[str] = None) -> int:
+    """Turn the user's cart into a pending order in one transaction and
+    return its id, priced exactly as GET /cart/summary prices the cart.
+    Raises EmptyCart or OutOfStock, leaving nothing changed."""
+    now = utcnow()
+    order = Order(user_id=user_id, status="pending", total=0, created_at=now,
+                  expires_at=now + timedelta(minutes=RESERVATION_MINUTES))
+    try:
+        db.add(order)
+        db.flush()
+
+        Product, CartItem = models.Product, models.CartItem
+        lines = db.execute(
+            select(CartItem.id, CartItem.product_id, CartItem.quantity, CartItem.selected_color)
+            .join(Product, Product.id == CartItem.product_id)
+            .where(CartItem.user_id == user_id)
+            .order_by(CartItem.id)
+        ).all()
+        if not lines:
+            raise EmptyCart()
+
+        # One decrement per product, in id order so concurrent checkouts
+        # take row locks in the same order on databases that have them
+        needed = _quantities(lines)
+        for product_id in sorted(needed):
+            if db.execute(reserve_statement(product_id, needed[product_id])).rowcount != 1:
+                raise OutOfStock(product_id)
+
+        prices, missing, version = pricing.price_book.lookup(needed)
+        if missing:
+            prices.update(pricing.price_book.fill(version, db.execute(queries.product_prices(missing))))
+        summary = pricing.summarize(
+            [(line.id, line.product_id, line.quantity) for line in lines], prices, voucher_code
+        )
+        colors = {line.id: line.selected_color for line in lines}
+        for priced in summary["lines"]:
+            db.add(models.OrderLine(
+                order_id=order.id,
+                product_id=priced["product_id"],
+                quantity=priced["quantity"],
+                selected_color=colors[priced["id"]],
+                unit_price=priced["unit_price"],
+                discount_percent=priced["discount_percent"],
+                line_total=priced["line_total"],
+            ))
+        for name in ("subtotal", "discount_total", "shipping", "voucher", "voucher_discount", "tax", "total"):
+            setattr(order, name, summary[name])
+        db.execute(delete(CartItem).where(CartItem.id.in_([line.id for line in lines])))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return order.id
+
+
+def _finish(db: Session, user_id: int, order_id: int, to_status: str, apply, *conditions, **values):
+    try:
+        moved = db.execute(transition_statement(order_id, to_status, Order.user_id == user_id, *conditions, **values))
+        if moved.rowcount != 1:
+            status = db.execute(
+                select(Order.status).where(Order.id == order_id, Order.user_id == user_id)
+            ).scalar()
+            if status is None:
+                raise OrderNotFound()
+            raise InvalidOrderState(f"Order is {status}" if status != "pending" else "Reservation has expired")
+        lines = db.execute(select(models.OrderLine).where(models.OrderLine.order_id == order_id)).scalars().all()
+        for product_id, quantity in _quantities(lines).items():
+            db.execute(apply(product_id, quantity))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def pay(db: Session, user_id: int, order_id: int):
+    """Record payment for a pending order, turning its reservation into a
+    sale. Payment capture itself is out of scope here."""
+    now = utcnow()
+    _finish(db, user_id, order_id, "paid", consume_statement, Order.expires_at > now, paid_at=now)
+
+
+def cancel(db: Session, user_id: int, order_id: int):
+    _finish(db, user_id, order_id, "cancelled", release_statement)
+
+
+def expire_reservations(db: Session, now: datetime = None) -> int:
+    """Expire up to SWEEP_BATCH lapsed pending orders, returning their stock."""
+    now = now or utcnow()
+    due = db.execute(
+        select(Order.id, Order.user_id)
+        .where(Order.status == "pending", Order.expires_at <= now)
+        .order_by(Order.expires_at)
+        .limit(SWEEP_BATCH)
+    ).all()
+    expired = 0
+    for order_id, user_id in due:
+        try:
+            _finish(db, user_id, order_id, "expired", release_statement, Order.expires_at <= now)
+            expired += 1
+        except InvalidOrderState:
+            # Paid or cancelled since we looked
+            pass
+    return expired
+
+
+async def sweep_forever(session_factory=models.SessionLocal, interval: float = SWEEP_INTERVAL_SECONDS):
+    """Background task: expire lapsed reservations every `interval` seconds.
+    Safe to run in every worker; each order is only ever expired once."""
+    def sweep():
+        with session_factory() as db:
+            return expire_reservations(db)
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            expired = await asyncio.to_thread(sweep)
+            if expired:
+                logger.info("expired %d unpaid orders", expired)
+        except Exception:
+            logger.exception("reservation sweep failed")
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import metrics
+
+# bcrypt releases the GIL while hashing, so a small dedicated thread pool
+# keeps login bursts off the threadpool that serves catalog requests.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+
+# --- Sync primitives ---
+
+# bcrypt is imported on first use, keeping it out of worker boot
+
+def hash_password_sync(password: str, rounds: Optional[int] = None) -> str:
+    import bcrypt
+
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def verify_password_sync(password: str, hashed_password: str) -> bool:
+    import bcrypt
+
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+    except ValueError:
+        # Malformed hash in the database
+        return False
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with a cost other than BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+# --- Async API (runs on the bcrypt pool) ---
+
+async def _run(func, *args):
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+    finally:
+        # Includes time queued behind other logins, which is what callers feel
+        metrics.record_bcrypt(time.perf_counter() - started)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(hash_password_sync, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await _run(verify_password_sync, password, hashed_password)
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
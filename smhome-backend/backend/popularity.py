@@ -0,0 +1,188 @@
+"""Write-behind popularity counters and the /products/popular snapshot.
+
+Requests only bump an in-memory counter. A flusher thread folds the pending
+increments into `product_activity` (one row per product per day) with one
+batched upsert every POPULARITY_FLUSH_SECONDS, or sooner once
+POPULARITY_FLUSH_SIZE increments are waiting. It also rebuilds the ranked
+lists that GET /products/popular serves from memory, and flushes whatever
+is left on shutdown.
+
+The snapshot holds only the ranked product ids. The routes serialize those
+products through the catalog cache, so an edited price or name shows up at
+once rather than at the next rebuild.
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+
+import models
+from database import upsert_insert
+
+logger = logging.getLogger("smhome.popularity")
+
+FLUSH_SECONDS = float(os.getenv("POPULARITY_FLUSH_SECONDS", "5"))
+FLUSH_SIZE = int(os.getenv("POPULARITY_FLUSH_SIZE", "10000"))
+REFRESH_SECONDS = float(os.getenv("POPULARITY_REFRESH_SECONDS", "60"))
+RETENTION_DAYS = 90
+# Products kept per ranking; also the largest `limit` served
+SNAPSHOT_SIZE = 50
+
+FIELDS = ("views", "favorites", "cart_adds")
+
+# ranking -> (days looked back, weight per field)
+RANKINGS = {
+    "trending": (7, {"views": 1, "favorites": 3, "cart_adds": 5}),
+    "best_sellers": (30, {"cart_adds": 1}),
+}
+
+Activity = models.ProductActivity
+
+
+def today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+class CounterBuffer:
+    """Thread-safe pending increments keyed by (product, day, field)."""
+
+    def __init__(self, flush_size: int = FLUSH_SIZE):
+        self.flush_size = flush_size
+        self.flush_wanted = threading.Event()
+        self._lock = threading.Lock()
+        self._pending: Counter = Counter()
+        self._size = 0
+
+    def incr(self, product_id: int, field: str, amount: int = 1):
+        with self._lock:
+            self._pending[(product_id, today(), field)] += amount
+            self._size += 1
+            if self._size >= self.flush_size:
+                self.flush_wanted.set()
+
+    def drain(self) -> Counter:
+        with self._lock:
+            pending, self._pending, self._size = self._pending, Counter(), 0
+        return pending
+
+    def restore(self, pending: Counter):
+        """Put back increments whose flush failed."""
+        with self._lock:
+            self._pending.update(pending)
+            self._size += len(pending)
+
+    def flush(self, engine) -> int:
+        pending = self.drain()
+        if not pending:
+            return 0
+        rows: Dict[tuple, dict] = {}
+        for (product_id, day, field), amount in pending.items():
+            row = rows.setdefault((product_id, day), {"product_id": product_id, "day": day,
+                                                      **{name: 0 for name in FIELDS}})
+            row[field] += amount
+        try:
+            with engine.begin() as conn:
+                stmt = upsert_insert(conn.dialect.name, Activity.__table__)
+                table = Activity.__table__
+                conn.execute(stmt.on_conflict_do_update(
+                    index_elements=["product_id", "day"],
+                    set_={name: table.c[name] + stmt.excluded[name] for name in FIELDS},
+                ), list(rows.values()))
+        except Exception:
+            self.restore(pending)
+            raise
+        return len(rows)
+
+
+counters = CounterBuffer()
+
+
+# --- Snapshot ---
+
+class PopularSnapshot:
+    def __init__(self):
+        self._lists: Dict[str, List[int]] = {name: [] for name in RANKINGS}
+        self.built_at: Optional[float] = None
+
+    def get(self, ranking: str, limit: int) -> Tuple[int, ...]:
+        return tuple(self._lists[ranking][:limit])
+
+    def refresh(self, engine):
+        lists = {}
+        with engine.connect() as conn:
+            for name, (days, weights) in RANKINGS.items():
+                score = sum(Activity.__table__.c[field] * weight for field, weight in weights.items())
+                lists[name] = conn.execute(
+                    select(Activity.product_id)
+                    .join(models.Product, models.Product.id == Activity.product_id)
+                    .where(Activity.day >= today() - timedelta(days=days - 1))
+                    .group_by(Activity.product_id)
+                    .having(func.sum(score) > 0)
+                    .order_by(func.sum(score).desc(), Activity.product_id)
+                    .limit(SNAPSHOT_SIZE)
+                ).scalars().all()
+        # Swapped in whole, so readers never see a half-built ranking
+        self._lists = lists
+        self.built_at = time.time()
+
+    def prune(self, engine):
+        with engine.begin() as conn:
+            conn.execute(delete(Activity).where(Activity.day < today() - timedelta(days=RETENTION_DAYS)))
+
+
+snapshot = PopularSnapshot()
+
+
+# --- Flusher ---
+
+class Flusher(threading.Thread):
+    def __init__(self, engine, buffer: CounterBuffer = counters):
+        super().__init__(name="popularity-flusher", daemon=True)
+        self.engine = engine
+        self.buffer = buffer
+        self._stopping = threading.Event()
+
+    def run(self):
+        next_refresh = 0.0
+        while not self._stopping.is_set():
+            self.buffer.flush_wanted.wait(FLUSH_SECONDS)
+            self.buffer.flush_wanted.clear()
+            try:
+                self.buffer.flush(self.engine)
+                if time.monotonic() >= next_refresh:
+                    snapshot.refresh(self.engine)
+                    snapshot.prune(self.engine)
+                    next_refresh = time.monotonic() + REFRESH_SECONDS
+            except Exception:
+                logger.exception("popularity flush failed")
+
+    def stop(self):
+        self._stopping.set()
+        self.buffer.flush_wanted.set()
+        self.join()
+        try:
+            self.buffer.flush(self.engine)
+        except Exception:
+            logger.exception("final popularity flush failed")
+
+
+_flusher: Optional[Flusher] = None
+
+
+def start(engine):
+    global _flusher
+    if _flusher is None:
+        _flusher = Flusher(engine)
+        _flusher.start()
+
+
+def stop():
+    global _flusher
+    if _flusher is not None:
+        _flusher.stop()
+        _flusher = None
@@ -0,0 +1,127 @@
+import os
+import threading
+from typing import Dict, Iterable, NamedTuple, Optional
+
+import models
+from catalog_cache import catalog_cache
+
+# Cart pricing, mirroring the rules the cart page used to apply in the
+# browser: product discounts, flat-rate shipping and the shop vouchers, plus
+# sales tax on the discounted goods.
+SHIPPING_FLAT = float(os.getenv("SHIPPING_FLAT", "9.99"))
+TAX_RATE = float(os.getenv("TAX_RATE", "0"))
+PRICE_BOOK_SIZE = 100_000
+
+
+class Voucher(NamedTuple):
+    code: str
+    amount_off: float = 0.0
+    free_shipping: bool = False
+
+
+VOUCHERS = {
+    "FREESHIP": Voucher("FREESHIP", amount_off=15.00, free_shipping=True),
+}
+
+
+def find_voucher(code: Optional[str]) -> Optional[Voucher]:
+    if not code:
+        return None
+    return VOUCHERS.get(code.strip().upper())
+
+
+class UnitPrice(NamedTuple):
+    list_price: float
+    discount_percent: Optional[int]
+    unit_price: float
+
+
+def unit_price(price: float, discount_percent: Optional[int]) -> UnitPrice:
+    return UnitPrice(round(price, 2), discount_percent, models.effective_price(price, discount_percent))
+
+
+class PriceBook:
+    """Per-product rule results, valid for one catalog version.
+
+    Lookups made after a product write see a newer catalog_cache version and
+    start from an empty book, the same way cached catalog responses are
+    invalidated.
+    """
+
+    def __init__(self, maxsize: int = PRICE_BOOK_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._version = -1
+        self._prices: Dict[int, UnitPrice] = {}
+
+    def lookup(self, product_ids: Iterable[int]):
+        """Return `(prices, missing_ids, version)`; load the missing ones and
+        pass them to `fill()` with the same version."""
+        version = catalog_cache.version
+        with self._lock:
+            if self._version != version:
+                self._version, self._prices = version, {}
+            prices, missing = {}, set()
+            for product_id in product_ids:
+                found = self._prices.get(product_id)
+                if found is None:
+                    missing.add(product_id)
+                else:
+                    prices[product_id] = found
+        return prices, missing, version
+
+    def fill(self, version: int, rows) -> Dict[int, UnitPrice]:
+        """Price `(id, price, discountPercent)` rows and remember the results
+        if the catalog hasn't changed since `lookup()`."""
+        priced = {row[0]: unit_price(row[1], row[2]) for row in rows}
+        with self._lock:
+            if version == self._version == catalog_cache.version:
+                if len(self._prices) + len(priced) > self.maxsize:
+                    self._prices = {}
+                self._prices.update(priced)
+        return priced
+
+
+price_book = PriceBook()
+
+
+def summarize(lines, prices: Dict[int, UnitPrice], voucher_code: Optional[str] = None) -> dict:
+    """Cart totals from `(cart item id, product id, quantity)` lines.
+    Lines whose product has gone are left out."""
+    voucher = find_voucher(voucher_code)
+    priced_lines = []
+    item_count, subtotal, discount_total = 0, 0.0, 0.0
+    for item_id, product_id, quantity in lines:
+        price = prices.get(product_id)
+        if price is None:
+            continue
+        line_total = round(price.unit_price * quantity, 2)
+        item_count += quantity
+        subtotal += line_total
+        discount_total += round((price.list_price - price.unit_price) * quantity, 2)
+        priced_lines.append({
+            "id": item_id,
+            "product_id": product_id,
+            "quantity": quantity,
+            "list_price": price.list_price,
+            "discount_percent": price.discount_percent,
+            "unit_price": price.unit_price,
+            "line_total": line_total,
+        })
+
+    subtotal = round(subtotal, 2)
+    shipping = SHIPPING_FLAT if priced_lines and not (voucher and voucher.free_shipping) else 0.0
+    voucher_discount = min(voucher.amount_off, subtotal + shipping) if voucher and priced_lines else 0.0
+    # Tax is charged on the goods after the voucher, not on shipping
+    tax = round(max(0.0, subtotal - voucher_discount) * TAX_RATE, 2)
+    return {
+        "lines": priced_lines,
+        "item_count": item_count,
+        "subtotal": subtotal,
+        "discount_total": round(discount_total, 2),
+        "shipping": shipping,
+        "voucher": voucher.code if voucher and priced_lines else None,
+        "voucher_discount": round(voucher_discount, 2),
+        "tax": tax,
+        "total": round(max(0.0, subtotal + shipping - voucher_discount) + tax, 2),
+    }
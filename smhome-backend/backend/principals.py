@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+import invalidation
+import models
+
+PRINCIPAL_CACHE_SIZE = 10_000
+PRINCIPAL_CACHE_TTL_SECONDS = 300
+
+
+class Principal(NamedTuple):
+    """The authenticated caller, as much as the routes need of a User."""
+    id: int
+    email: str
+    username: str
+
+    @classmethod
+    def from_user(cls, user: "models.User") -> "Principal":
+        return cls(user.id, user.email, user.username)
+
+
+class PrincipalCache:
+    """Bounded LRU of resolved principals keyed by user id.
+
+    Each entry lives until the earlier of the cache TTL and the token's own
+    `exp`. `invalidate()` evicts a user and remembers when it happened, so
+    tokens issued before the change are re-checked against the database
+    instead of being trusted from their claims.
+    """
+
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_SIZE, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS,
+                 token_lifetime: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.token_lifetime = token_lifetime
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._changed_at: "OrderedDict[int, float]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal: Principal, token_exp: Optional[float] = None):
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._entries[principal.id] = (principal, expires_at)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        now = time.time()
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._changed_at[user_id] = now
+            self._changed_at.move_to_end(user_id)
+            # Once every token issued before a change has expired, the
+            # change marker no longer matters.
+            horizon = now - self.token_lifetime
+            while self._changed_at:
+                oldest_id, changed = next(iter(self._changed_at.items()))
+                if changed >= horizon:
+                    break
+                del self._changed_at[oldest_id]
+
+    def changed_since(self, user_id: int, issued_at: Optional[float]) -> bool:
+        changed = self._changed_at.get(user_id)
+        return changed is not None and (issued_at is None or issued_at <= changed)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._changed_at.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+# --- Invalidation ---
+# Same pattern as the catalog cache: mark the session on write, act on commit.
+
+INVALIDATION_TOPIC = "user"
+
+invalidation.subscribe(INVALIDATION_TOPIC, lambda key: principal_cache.invalidate(int(key)))
+
+
+def _mark_user_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and target.id is not None:
+        session.info.setdefault("changed_users", set()).add(target.id)
+
+
+event.listen(models.User, "after_update", _mark_user_changed)
+event.listen(models.User, "after_delete", _mark_user_changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    for user_id in session.info.pop("changed_users", ()):
+        invalidation.publish(INVALIDATION_TOPIC, str(user_id))
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session):
+    session.info.pop("changed_users", None)
@@ -0,0 +1,108 @@
+"""Time-boxed statistical profiler for a live worker.
+
+A sampler thread snapshots every thread's Python stack with
+sys._current_frames() at a fixed interval. Samples are folded into collapsed
+stacks (`frame;frame;frame count`, the input format of flamegraph.pl and
+speedscope) and attributed to the route or dependency whose function is on
+the stack. Routes are matched by their endpoint's code object, so this works
+for sync routes on the threadpool and async ones on the event loop alike.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+MIN_INTERVAL = 0.001
+MAX_STACK_DEPTH = 128
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_busy = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _targets(app) -> Dict[object, str]:
+    """Map endpoint and dependency code objects to a label."""
+    targets = {}
+
+    def add_dependencies(dependant):
+        for dependency in dependant.dependencies:
+            call = getattr(dependency.call, "__code__", None)
+            if call is not None and call not in targets:
+                targets[call] = f"dependency:{dependency.call.__name__}"
+            add_dependencies(dependency)
+
+    for route in app.routes:
+        endpoint = getattr(route, "endpoint", None)
+        code = getattr(endpoint, "__code__", None)
+        if code is None:
+            continue
+        methods = ",".join(sorted(getattr(route, "methods", None) or ()))
+        targets[code] = f"{methods} {route.path}".strip()
+        dependant = getattr(route, "dependant", None)
+        if dependant is not None:
+            add_dependencies(dependant)
+    return targets
+
+
+def profile(app, seconds: float, interval: float, all_threads: bool = False) -> dict:
+    """Sample for `seconds` (capped at PROFILE_MAX_SECONDS) and return the
+    collapsed stacks with a per-route breakdown. Blocks the calling thread;
+    only one profile runs at a time."""
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy("a profile is already running")
+    try:
+        seconds = min(max(seconds, 0.0), MAX_SECONDS)
+        interval = max(interval, MIN_INTERVAL)
+        targets = _targets(app)
+        stacks: Counter = Counter()
+        routes: Counter = Counter()
+        own = {threading.get_ident()}
+        samples = 0
+
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id in own:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(frame)
+                    frame = frame.f_back
+                if not (all_threads or any(f.f_code.co_filename.startswith(_APP_DIR) for f in frames)):
+                    continue
+                # Innermost match wins, so a dependency beats its route
+                attributed = next((targets[f.f_code] for f in frames if f.f_code in targets), None)
+                # Very deep stacks lose their innermost frames, never the root
+                labels = [_frame_label(f) for f in reversed(frames[-MAX_STACK_DEPTH:])]
+                stacks[";".join(labels)] += 1
+                routes[attributed or "<other>"] += 1
+            samples += 1
+            time.sleep(interval)
+        elapsed = time.perf_counter() - started
+    finally:
+        _busy.release()
+
+    return {
+        "seconds": round(elapsed, 3),
+        "interval_ms": interval * 1000,
+        "samples": samples,
+        "routes": dict(routes.most_common()),
+        "collapsed": "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()),
+    }
+
+
+def collapsed_text(result: dict) -> str:
+    return result["collapsed"] + "\n" if result["collapsed"] else ""
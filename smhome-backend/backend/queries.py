@@ -0,0 +1,96 @@
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+import models
+from serializers import PRODUCT_COLUMNS
+
+# Statements shared by the sync routes in main.py and the async ones in
+# routes_async.py.
+
+
+def user_by_email(email: str):
+    return select(models.User).where(models.User.email == email)
+
+
+def cart_items(user_id: int):
+    # One joined SELECT of plain rows for every line and its product,
+    # however large the cart (layout: serializers.cart_item_dict)
+    return (
+        select(models.CartItem.id, models.CartItem.quantity, models.CartItem.selected_color, *PRODUCT_COLUMNS)
+        .join(models.Product, models.Product.id == models.CartItem.product_id)
+        .where(models.CartItem.user_id == user_id)
+        .order_by(models.CartItem.id)
+    )
+
+
+def cart_item(user_id: int, product_id: int, color_key: str = ""):
+    return cart_items(user_id).where(
+        models.CartItem.product_id == product_id,
+        models.CartItem.color_key == color_key,
+    )
+
+
+def cart_lines(user_id: int):
+    # Just the numbers pricing needs (see pricing.summarize)
+    return (
+        select(models.CartItem.id, models.CartItem.product_id, models.CartItem.quantity)
+        .where(models.CartItem.user_id == user_id)
+        .order_by(models.CartItem.id)
+    )
+
+
+def product_prices(product_ids):
+    return select(models.Product.id, models.Product.price, models.Product.discountPercent).where(
+        models.Product.id.in_(product_ids)
+    )
+
+
+def products(product_ids):
+    return select(*PRODUCT_COLUMNS).where(models.Product.id.in_(product_ids))
+
+
+def existing_product_ids(product_ids):
+    return select(models.Product.id).where(models.Product.id.in_(product_ids))
+
+
+def favorites(user_id: int):
+    # Layout: serializers.favorite_dict
+    return (
+        select(models.Favorite.id, *PRODUCT_COLUMNS)
+        .join(models.Product, models.Product.id == models.Favorite.product_id)
+        .where(models.Favorite.user_id == user_id)
+        .order_by(models.Favorite.id)
+    )
+
+
+def favorite_item(user_id: int, product_id: int):
+    return favorites(user_id).where(models.Favorite.product_id == product_id)
+
+
+def orders(user_id: int):
+    return (
+        select(models.Order)
+        .options(selectinload(models.Order.lines))
+        .where(models.Order.user_id == user_id)
+        .order_by(models.Order.id.desc())
+        .execution_options(populate_existing=True)
+    )
+
+
+def order(user_id: int, order_id: int):
+    return orders(user_id).where(models.Order.id == order_id)
+
+
+def inventory(product_id: int):
+    return select(models.Inventory).where(models.Inventory.product_id == product_id).execution_options(populate_existing=True)
+
+
+def related_products(product_id: int, limit: int):
+    # One range read of the precomputed list (see related.py)
+    return (
+        select(*PRODUCT_COLUMNS)
+        .join(models.RelatedProduct, models.RelatedProduct.related_id == models.Product.id)
+        .where(models.RelatedProduct.product_id == product_id)
+        .order_by(models.RelatedProduct.rank)
+        .limit(limit)
+    )
@@ -0,0 +1,443 @@
+"""Related-product suggestions.
+
+A periodic job turns favorites and carts into co-occurrence counts ("people
+who saved this also saved ...") and blends them with the same-category
+products nearest in price, keeping the top RELATED_TOP_K per product in
+`related_products`. Serving a product's suggestions is then one primary-key
+range read.
+
+Refreshes are incremental. Every user's basket (favorites + cart) and every
+product's category and price are snapshotted, and only what differs from
+the snapshot is reprocessed: changed baskets adjust the pair counts by
+their difference, and only the products they touch, the products nearest
+in price to a changed one, and whatever was suggesting it are re-ranked.
+
+    python related.py           # incremental refresh
+    python related.py --full    # rebuild from scratch
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+import uuid
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import islice, permutations
+
+from sqlalchemy import delete, except_, func, or_, select, union, update
+
+import invalidation
+import models
+from database import upsert_insert
+
+logger = logging.getLogger("smhome.related")
+
+TOP_K = int(os.getenv("RELATED_TOP_K", "12"))
+REFRESH_SECONDS = float(os.getenv("RELATED_REFRESH_SECONDS", "600"))
+# Pairs grow quadratically; larger baskets count their first MAX_BASKET products
+MAX_BASKET = 50
+CHUNK = 500
+# Each user adds up to MAX_BASKET * (MAX_BASKET - 1) pair updates, so
+# baskets are written a few users per transaction
+USER_CHUNK = 25
+# A refresh that stops renewing its lease for this long is taken over
+LEASE_SECONDS = 120
+WRITE_PAUSE = 0.01
+
+# Each user holding both products adds 1 to a pair. A same-category product
+# scores at most CATEGORY_WEIGHT + PRICE_WEIGHT = 1 on price closeness, so
+# any co-occurrence ranks above pure similarity.
+CATEGORY_WEIGHT = 0.5
+PRICE_WEIGHT = 0.5
+
+Listing = models.ProductListing
+Related = models.RelatedProduct
+Pair = models.ProductPair
+Basket = models.RelatedBasket
+Snapshot = models.RelatedCatalog
+
+# Last generation this process has seen; see observe()
+generation = 0
+
+
+def _chunks(items, size: int = CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# --- Baskets -> pair counts ---
+
+def _current_baskets():
+    return union(
+        select(models.Favorite.user_id, models.Favorite.product_id)
+        .where(models.Favorite.user_id.is_not(None), models.Favorite.product_id.is_not(None)),
+        select(models.CartItem.user_id, models.CartItem.product_id)
+        .where(models.CartItem.user_id.is_not(None), models.CartItem.product_id.is_not(None)),
+    ).subquery()
+
+
+def _changed_users(conn) -> list:
+    current = _current_baskets()
+    now = select(current.c.user_id, current.c.product_id)
+    before = select(Basket.user_id, Basket.product_id)
+    added = except_(now, before).subquery()
+    removed = except_(before, now).subquery()
+    return conn.execute(union(select(added.c.user_id), select(removed.c.user_id))).scalars().all()
+
+
+def _load_baskets(conn, stmt) -> dict:
+    baskets = defaultdict(list)
+    for user_id, product_id in conn.execute(stmt):
+        baskets[user_id].append(product_id)
+    return baskets
+
+
+def _pairs(product_ids):
+    return permutations(sorted(product_ids)[:MAX_BASKET], 2)
+
+
+def _apply_baskets(conn, user_ids) -> set:
+    """Move pair counts from each user's snapshot to their current basket;
+    returns the products whose counts changed."""
+    current = _current_baskets()
+    before = _load_baskets(conn, select(Basket.user_id, Basket.product_id).where(Basket.user_id.in_(user_ids)))
+    now = _load_baskets(conn, select(current.c.user_id, current.c.product_id).where(current.c.user_id.in_(user_ids)))
+
+    deltas = Counter()
+    for user_id in user_ids:
+        deltas.subtract(_pairs(before.get(user_id, ())))
+        deltas.update(_pairs(now.get(user_id, ())))
+    deltas = {pair: delta for pair, delta in deltas.items() if delta}
+
+    if deltas:
+        stmt = upsert_insert(conn.dialect.name, Pair.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["product_id", "other_id"],
+            set_={"count": Pair.__table__.c.count + stmt.excluded.count},
+        )
+        conn.execute(stmt, [{"product_id": a, "other_id": b, "count": delta} for (a, b), delta in deltas.items()])
+        for ids in _chunks({a for a, _ in deltas}):
+            conn.execute(delete(Pair).where(Pair.product_id.in_(ids), Pair.count <= 0))
+
+    conn.execute(delete(Basket).where(Basket.user_id.in_(user_ids)))
+    rows = [{"user_id": user_id, "product_id": product_id}
+            for user_id, product_ids in now.items() for product_id in product_ids]
+    if rows:
+        conn.execute(Basket.__table__.insert(), rows)
+    return {a for a, _ in deltas}
+
+
+# --- Catalog changes ---
+
+def _catalog_changes(conn):
+    """Products added or re-priced/re-categorised since the snapshot, as
+    `(product_id, category, effective_price)`, and the ids of products gone."""
+    changed = conn.execute(
+        select(Listing.product_id, Listing.category, Listing.effective_price)
+        .outerjoin(Snapshot, Snapshot.product_id == Listing.product_id)
+        .where(or_(
+            Snapshot.product_id.is_(None),
+            Snapshot.category.is_distinct_from(Listing.category),
+            Snapshot.effective_price.is_distinct_from(Listing.effective_price),
+        ))
+    ).all()
+    gone = conn.execute(
+        select(Snapshot.product_id)
+        .outerjoin(Listing, Listing.product_id == Snapshot.product_id)
+        .where(Listing.product_id.is_(None))
+    ).scalars().all()
+    return changed, gone
+
+
+def _price_neighbours(conn, product_id: int, category, price) -> set:
+    """The products whose nearest-in-price candidates can include this one.
+
+    rank() takes the TOP_K nearest on each side, so a product priced above
+    this one can only reach it if at most TOP_K others sit in between: every
+    candidate is within the TOP_K + 1 nearest prices on either side, plus any
+    product at the same price.
+    """
+    in_category = select(Listing.product_id).where(Listing.category == category, Listing.product_id != product_id)
+    above = conn.execute(
+        select(Listing.effective_price).where(Listing.category == category, Listing.effective_price > price)
+        .order_by(Listing.effective_price).limit(TOP_K + 1)
+    ).scalars().all()
+    below = conn.execute(
+        select(Listing.effective_price).where(Listing.category == category, Listing.effective_price < price)
+        .order_by(Listing.effective_price.desc()).limit(TOP_K + 1)
+    ).scalars().all()
+    low = below[-1] if below else price
+    high = above[-1] if above else price
+    return set(conn.execute(
+        in_category.where(Listing.effective_price >= low, Listing.effective_price <= high)
+    ).scalars())
+
+
+def _catalog_affected(conn, changed, gone) -> set:
+    """The products to re-rank for a catalog change: the changed products,
+    whatever was suggesting a changed or gone product, and the price
+    neighbours each changed product now has. A category where most products
+    changed (e.g. the first refresh) is re-ranked whole instead."""
+    affected = {row[0] for row in changed}
+    for ids in _chunks(affected | set(gone)):
+        affected.update(conn.execute(select(Related.product_id).where(Related.related_id.in_(ids))).scalars())
+
+    by_category = defaultdict(list)
+    for product_id, category, price in changed:
+        if category is not None and price is not None:
+            by_category[category].append((product_id, price))
+    if by_category:
+        sizes = dict(conn.execute(
+            select(Listing.category, func.count()).where(Listing.category.in_(list(by_category)))
+            .group_by(Listing.category)
+        ).all())
+        whole = [category for category, products in by_category.items()
+                 if len(products) * 2 * (TOP_K + 1) >= sizes.get(category, 0)]
+        if whole:
+            affected.update(conn.execute(select(Listing.product_id).where(Listing.category.in_(whole))).scalars())
+        for category, products in by_category.items():
+            if category not in whole:
+                for product_id, price in products:
+                    affected |= _price_neighbours(conn, product_id, category, price)
+    return affected - set(gone)
+
+
+def _apply_catalog(conn, changed, gone):
+    """Drop what is left of gone products and move the snapshot forward."""
+    conn.execute(delete(Related).where(Related.product_id.in_(gone)))
+    conn.execute(delete(Pair).where(or_(Pair.product_id.in_(gone), Pair.other_id.in_(gone))))
+    conn.execute(delete(Snapshot).where(Snapshot.product_id.in_(gone)))
+    if changed:
+        stmt = upsert_insert(conn.dialect.name, Snapshot.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["product_id"],
+            set_={"category": stmt.excluded.category, "effective_price": stmt.excluded.effective_price},
+        )
+        conn.execute(stmt, [{"product_id": row[0], "category": row[1], "effective_price": row[2]} for row in changed])
+
+
+# --- Ranking ---
+
+class PriceIndex:
+    """Each category's `(effective_price, product_id)` listings in order,
+    read once per refresh, so ranking a product needs no queries of its own."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.categories = {}
+
+    def _listings(self, category) -> list:
+        if category not in self.categories:
+            self.categories[category] = [tuple(row) for row in self.conn.execute(
+                select(Listing.effective_price, Listing.product_id)
+                .where(Listing.category == category, Listing.effective_price.is_not(None))
+                .order_by(Listing.effective_price, Listing.product_id)
+            )]
+        return self.categories[category]
+
+    def nearest(self, product_id: int, category, price) -> list:
+        """The TOP_K nearest in price on either side, as `(price, product_id)`."""
+        listings = self._listings(category)
+        start = bisect_left(listings, (price,))
+        above = list(islice((row for row in islice(listings, start, None) if row[1] != product_id), TOP_K))
+        # Below: highest price first, lowest id first within a price
+        below = []
+        end = start
+        while end > 0 and len(below) < TOP_K:
+            begin = bisect_left(listings, (listings[end - 1][0],), 0, end)
+            below.extend(listings[begin:end])
+            end = begin
+        return above + below[:TOP_K]
+
+
+def rank(product_id: int, category, price, co_occurring, index: PriceIndex) -> list:
+    """Top-K `(related_id, score)` for one product, from its top
+    `(other_id, count)` pairs and its price neighbours."""
+    scores = defaultdict(float)
+    for other_id, count in co_occurring:
+        scores[other_id] += count
+
+    if category is not None and price is not None:
+        for other_price, other_id in index.nearest(product_id, category, price):
+            closeness = 1 - min(1.0, abs(other_price - price) / price) if price > 0 else 0.0
+            scores[other_id] += CATEGORY_WEIGHT + PRICE_WEIGHT * closeness
+
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:TOP_K]
+
+
+def _ranked_rows(conn, product_ids, index: PriceIndex) -> list:
+    listings = conn.execute(
+        select(Listing.product_id, Listing.category, Listing.effective_price).where(Listing.product_id.in_(product_ids))
+    ).all()
+    pairs = defaultdict(list)
+    for product_id, other_id, count in conn.execute(
+        select(Pair.product_id, Pair.other_id, Pair.count)
+        .join(Listing, Listing.product_id == Pair.other_id)
+        .where(Pair.product_id.in_(product_ids))
+    ):
+        pairs[product_id].append((other_id, count))
+    rows = []
+    for product_id, category, price in listings:
+        co_occurring = sorted(pairs[product_id], key=lambda pair: (-pair[1], pair[0]))[:TOP_K]
+        rows.extend(
+            {"product_id": product_id, "rank": position, "related_id": related_id, "score": round(score, 4)}
+            for position, (related_id, score) in enumerate(rank(product_id, category, price, co_occurring, index))
+        )
+    return rows
+
+
+# --- Refresh ---
+
+class LeaseLost(RuntimeError):
+    """Another worker took over a refresh that ran past its lease."""
+
+
+def _claim(engine, owner: str):
+    """Take the refresh lease unless another worker holds a live one, so
+    concurrent refreshes (e.g. one per worker) never apply the same basket
+    changes twice; returns (claimed, generation)."""
+    state = models.RelatedState
+    with engine.begin() as conn:
+        stmt = upsert_insert(conn.dialect.name, state.__table__).values(id=1, generation=0)
+        conn.execute(stmt.on_conflict_do_nothing(index_elements=["id"]))
+        now = invalidation.utcnow()
+        claimed = conn.execute(
+            update(state)
+            .where(state.id == 1, or_(state.lease_until.is_(None), state.lease_until < now))
+            .values(lease_owner=owner, lease_until=now + timedelta(seconds=LEASE_SECONDS))
+        ).rowcount == 1
+        return claimed, conn.execute(select(state.generation).where(state.id == 1)).scalar()
+
+
+def _renew(conn, owner: str):
+    """Extend the lease inside a write transaction; the write is abandoned if
+    the lease expired and another worker took it."""
+    state = models.RelatedState
+    renewed = conn.execute(
+        update(state)
+        .where(state.id == 1, state.lease_owner == owner)
+        .values(lease_until=invalidation.utcnow() + timedelta(seconds=LEASE_SECONDS))
+    ).rowcount
+    if renewed != 1:
+        raise LeaseLost(owner)
+
+
+@contextlib.contextmanager
+def _writing(engine, owner: str):
+    with engine.begin() as conn:
+        _renew(conn, owner)
+        yield conn
+    # SQLite writers waiting on busy_timeout only retry now and then; leave
+    # them a gap before the next chunk takes the lock again
+    time.sleep(WRITE_PAUSE)
+
+
+def refresh(engine, full: bool = False) -> dict:
+    """Bring the suggestions up to date and return a short report.
+
+    Everything is read and ranked on a plain connection and written in
+    small transactions (USER_CHUNK users or CHUNK products each), so the
+    database never stays locked for a whole refresh. Pair counts move with
+    the basket snapshot in the same transaction, and the catalog snapshot
+    only moves once its re-ranking is written; a refresh that dies between
+    the two leaves some basket-driven suggestions stale until `--full`.
+    """
+    owner = uuid.uuid4().hex
+    claimed, current = _claim(engine, owner)
+    if not claimed:
+        return {"generation": current, "users": 0, "products": 0}
+
+    affected = set()
+    users = []
+    try:
+        if full:
+            with _writing(engine, owner) as conn:
+                for table in (Pair, Basket, Snapshot):
+                    conn.execute(delete(table))
+                conn.execute(delete(Related).where(Related.product_id.not_in(select(Listing.product_id))))
+
+        with engine.connect() as read:
+            changed, gone = _catalog_changes(read)
+            affected |= _catalog_affected(read, changed, gone)
+            users = _changed_users(read)
+            read.rollback()
+
+            for user_ids in _chunks(users, USER_CHUNK):
+                with _writing(engine, owner) as conn:
+                    affected |= _apply_baskets(conn, user_ids)
+
+            index = PriceIndex(read)
+            for ids in _chunks(sorted(affected - set(gone))):
+                rows = _ranked_rows(read, ids, index)
+                read.rollback()
+                with _writing(engine, owner) as conn:
+                    conn.execute(delete(Related).where(Related.product_id.in_(ids)))
+                    if rows:
+                        conn.execute(Related.__table__.insert(), rows)
+
+        for start in range(0, max(len(changed), len(gone)), CHUNK):
+            with _writing(engine, owner) as conn:
+                _apply_catalog(conn, changed[start:start + CHUNK], gone[start:start + CHUNK])
+        affected |= set(gone)
+    finally:
+        state = models.RelatedState
+        with engine.begin() as conn:
+            if affected:
+                current = conn.execute(select(state.generation).where(state.id == 1)).scalar() + 1
+            conn.execute(
+                update(state).where(state.id == 1, state.lease_owner == owner)
+                .values(generation=current, lease_owner=None, lease_until=None)
+            )
+    return {"generation": current, "users": len(users), "products": len(affected)}
+
+
+def observe(new_generation: int):
+    """Note the generation in the database. It is part of the catalog cache
+    key for suggestions, so a new one misses only those and leaves the other
+    cached catalog responses alone."""
+    global generation
+    generation = new_generation
+
+
+INVALIDATION_TOPIC = "related"
+
+invalidation.subscribe(INVALIDATION_TOPIC, lambda key: observe(int(key)))
+
+
+async def refresh_forever(engine, interval: float = REFRESH_SECONDS):
+    """Background task: refresh now, then every `interval` seconds."""
+    while True:
+        try:
+            report = await asyncio.to_thread(refresh, engine)
+            if report["products"]:
+                logger.info("related products refreshed: %s", report)
+                # The other workers pick up the new generation now, not at their next refresh
+                invalidation.publish(INVALIDATION_TOPIC, str(report["generation"]))
+            else:
+                observe(report["generation"])
+        except Exception:
+            logger.exception("related products refresh failed")
+        await asyncio.sleep(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="discard the snapshots and rebuild everything")
+    args = parser.parse_args(argv)
+    import listings
+
+    models.init_db()
+    listings.init_listings(models.engine)
+    report = refresh(models.engine, full=args.full)
+    if report["products"]:
+        invalidation.publish(INVALIDATION_TOPIC, str(report["generation"]))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Query
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import auth
+import cart
+import catalog
+import events
+import favorites
+import locales
+import models
+import orders
+import passwords
+import popularity
+import pricing
+import queries
+import related
+import schemas
+import search
+import serializers
+from catalog_cache import Uncacheable, catalog_cache, cached_response
+from database import get_async_db
+from principals import Principal
+
+# Async twins of the routes in main.py, served on an AsyncSession when
+# DB_MODE=async. They must stay wire-compatible with the sync versions.
+router = APIRouter()
+
+
+def install(app: FastAPI):
+    """Mount the async routes ahead of the sync ones, dropping each sync
+    route they replace; sync-only routes keep working unchanged."""
+    replaced = {(route.path, method) for route in router.routes for method in route.methods}
+
+    def is_replaced(route):
+        methods = getattr(route, "methods", None) or ()
+        return any((getattr(route, "path", None), method) in replaced for method in methods)
+
+    app.router.routes[:] = list(router.routes) + [r for r in app.router.routes if not is_replaced(r)]
+
+
+async def get_current_user(token: str = Depends(auth.oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    payload, principal = auth.resolve_token(token)
+    if principal is not None:
+        return principal
+
+    if payload.get("uid") is not None:
+        user = await db.get(models.User, payload["uid"])
+    else:
+        user = (await db.execute(queries.user_by_email(payload["sub"]))).scalars().first()
+    return auth.remember(user, payload)
+
+
+# --- Routes: Auth ---
+
+@router.post("/auth/signup", response_model=schemas.UserResponse)
+async def signup(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = (await db.execute(queries.user_by_email(user.email))).scalars().first()
+    if db_user:
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    hashed_password = await passwords.hash_password(user.password)
+    username = user.email.split('@')[0]
+
+    new_user = models.User(email=user.email, hashed_password=hashed_password, username=username)
+    db.add(new_user)
+    await db.commit()
+    return new_user
+
+
+@router.post("/auth/signin", response_model=schemas.Token)
+async def signin(user: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    db_user = (await db.execute(queries.user_by_email(user.email))).scalars().first()
+    if not db_user or not await passwords.verify_password(user.password, db_user.hashed_password):
+        raise HTTPException(status_code=400, detail="Invalid credentials")
+
+    if passwords.needs_rehash(db_user.hashed_password):
+        db_user.hashed_password = await passwords.hash_password(user.password)
+        await db.commit()
+
+    return {
+        "access_token": auth.token_for(db_user),
+        "token_type": "bearer",
+        "user": db_user
+    }
+
+
+# --- Routes: Products ---
+
+@router.get("/products", response_model=List[schemas.ProductResponse])
+async def get_products(
+    category: Optional[str] = None,
+    discounted: bool = False,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sort: Literal["id", "name", "price", "effective_price"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=catalog.MAX_PAGE_SIZE),
+    shape: Literal["full", "compact"] = "full",
+    if_none_match: Optional[str] = Header(None),
+    accept_language: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if not (discounted or min_price is not None or max_price is not None or cursor or limit) \
+            and sort == "id" and order == "asc":
+        locale = locales.negotiate(accept_language)
+        category = category or None
+        async def build():
+            rows = (await db.execute(catalog.product_listing_query(category=category))).all()
+            if not rows and category is not None:
+                raise Uncacheable(catalog.serialize_products(rows, shape, locale))
+            translations = ()
+            if locale != locales.DEFAULT_LOCALE:
+                translations = (await db.execute(locales.translations_query(locale, category=category))).all()
+            return catalog.serialize_products(rows, shape, locale, translations)
+        cached = await catalog_cache.get_or_build_async(("products", locale, category, shape), build)
+        return cached_response(cached, if_none_match, locales.VARY_HEADERS)
+
+    if cursor and limit is None:
+        limit = catalog.DEFAULT_PAGE_SIZE
+    try:
+        stmt = catalog.product_listing_query(
+            category=category,
+            discounted=discounted,
+            min_price=min_price,
+            max_price=max_price,
+            sort=sort,
+            order=order,
+            cursor=cursor,
+            limit=limit,
+        )
+    except catalog.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    products = [serializers.product_dict(row) for row in await db.execute(stmt)]
+    products, next_cursor = catalog.split_page(products, sort, limit)
+    locale = locales.negotiate(accept_language)
+    translations = ()
+    if locale != locales.DEFAULT_LOCALE and products:
+        product_ids = [product["id"] for product in products]
+        translations = (await db.execute(locales.translations_query(locale, product_ids=product_ids))).all()
+    headers = dict(locales.VARY_HEADERS)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return serializers.json_response(catalog.encode_products(products, shape, locale, translations), headers)
+
+
+@router.get("/products/search", response_model=List[schemas.ProductResponse])
+async def search_products(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(search.DEFAULT_LIMIT, ge=1, le=search.MAX_LIMIT),
+    shape: Literal["full", "compact"] = "full",
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = search.search_products_query(q, limit, db.bind.dialect.name)
+    rows = (await db.execute(stmt)).all() if stmt is not None else []
+    return serializers.json_response(catalog.serialize_products(rows, shape))
+
+
+@router.get("/products/popular", response_model=List[schemas.ProductResponse])
+async def get_popular_products(
+    kind: Literal["trending", "best_sellers"] = "trending",
+    limit: int = Query(12, ge=1, le=popularity.SNAPSHOT_SIZE),
+    shape: Literal["full", "compact"] = "full",
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    product_ids = popularity.snapshot.get(kind, limit)
+    async def build():
+        rows = {row.id: row for row in await db.execute(queries.products(product_ids))}
+        return catalog.serialize_products([rows[i] for i in product_ids if i in rows], shape)
+    cached = await catalog_cache.get_or_build_async(("popular", product_ids, shape), build)
+    return cached_response(cached, if_none_match)
+
+
+@router.get("/products/{product_id}/related", response_model=List[schemas.ProductResponse])
+async def get_related_products(
+    product_id: int,
+    limit: int = Query(related.TOP_K, ge=1, le=related.TOP_K),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    async def build():
+        rows = (await db.execute(queries.related_products(product_id, limit))).all()
+        if not rows and (await db.execute(catalog.product_query(product_id))).first() is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return catalog.serialize_products(rows)
+    cached = await catalog_cache.get_or_build_async(("related", related.generation, product_id, limit), build)
+    return cached_response(cached, if_none_match)
+
+
+@router.get("/products/{product_id}", response_model=schemas.ProductResponse)
+async def get_product(product_id: int, if_none_match: Optional[str] = Header(None),
+                      accept_language: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    locale = locales.negotiate(accept_language)
+    async def build():
+        row = (await db.execute(catalog.product_query(product_id))).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Product not found")
+        translations = ()
+        if locale != locales.DEFAULT_LOCALE:
+            translations = (await db.execute(locales.translations_query(locale, product_ids=[product_id]))).all()
+        return catalog.serialize_product(row, locale, translations)
+    cached = await catalog_cache.get_or_build_async(("product", locale, product_id), build)
+    popularity.counters.incr(product_id, "views")
+    return cached_response(cached, if_none_match, locales.VARY_HEADERS)
+
+
+# --- Routes: Cart ---
+
+@router.get("/cart", response_model=List[schemas.CartItemResponse])
+async def get_cart(current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    return serializers.json_response(serializers.cart_body(await db.execute(queries.cart_items(current_user.id))))
+
+
+@router.get("/cart/summary", response_model=schemas.CartSummary)
+async def get_cart_summary(voucher: Optional[str] = None, current_user: Principal = Depends(get_current_user),
+                           db: AsyncSession = Depends(get_async_db)):
+    lines = (await db.execute(queries.cart_lines(current_user.id))).all()
+    prices, missing, version = pricing.price_book.lookup({line.product_id for line in lines})
+    if missing:
+        prices.update(pricing.price_book.fill(version, await db.execute(queries.product_prices(missing))))
+    summary = pricing.summarize(lines, prices, voucher)
+    return serializers.json_response(serializers.encode_one(summary, schemas.CartSummary))
+
+
+async def check_products_exist(db: AsyncSession, product_ids):
+    if product_ids and len((await db.execute(queries.existing_product_ids(product_ids))).all()) != len(product_ids):
+        raise HTTPException(status_code=404, detail="Product not found")
+
+
+@router.post("/cart", response_model=schemas.CartItemResponse)
+async def add_to_cart(item: schemas.CartItemCreate, current_user: Principal = Depends(get_current_user),
+                      db: AsyncSession = Depends(get_async_db)):
+    await check_products_exist(db, {item.product_id})
+    dialect = db.bind.dialect.name
+    await db.execute(cart.add_statement(dialect, current_user.id, item.product_id, item.quantity, item.selected_color))
+    await db.commit()
+    popularity.counters.incr(item.product_id, "cart_adds", item.quantity)
+    row = (await db.execute(
+        queries.cart_item(current_user.id, item.product_id, cart.color_key(item.selected_color))
+    )).first()
+    line = serializers.cart_item_dict(row)
+    events.publish(current_user.id, "cart.item", line)
+    return serializers.json_response(serializers.encode_one(line, schemas.CartItemResponse))
+
+
+@router.patch("/cart", response_model=List[schemas.CartItemResponse])
+async def update_cart(patch: schemas.CartPatch, current_user: Principal = Depends(get_current_user),
+                      db: AsyncSession = Depends(get_async_db)):
+    await check_products_exist(db, {op.product_id for op in patch.operations if op.op != "remove"})
+    dialect = db.bind.dialect.name
+    for op in patch.operations:
+        await db.execute(cart.operation_statement(dialect, current_user.id, op))
+    await db.commit()
+    for op in patch.operations:
+        if op.op == "add":
+            popularity.counters.incr(op.product_id, "cart_adds", op.quantity)
+    items = [serializers.cart_item_dict(row) for row in await db.execute(queries.cart_items(current_user.id))]
+    for event_type, data in cart.operation_events(patch.operations, items):
+        events.publish(current_user.id, event_type, data)
+    return serializers.json_response(serializers.encode_list(items, schemas.CartItemResponse))
+
+
+@router.delete("/cart/{product_id}")
+async def remove_from_cart(product_id: int, current_user: Principal = Depends(get_current_user),
+                           db: AsyncSession = Depends(get_async_db)):
+    removed = (await db.execute(delete(models.CartItem).where(
+        models.CartItem.user_id == current_user.id,
+        models.CartItem.product_id == product_id
+    ))).rowcount
+    await db.commit()
+    if removed:
+        events.publish(current_user.id, "cart.removed", cart.removed_event(product_id))
+    return {"message": "Item removed"}
+
+
+# --- Routes: Favorites ---
+
+@router.get("/favorites", response_model=List[schemas.FavoriteResponse])
+async def get_favorites(current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    return serializers.json_response(serializers.favorites_body(await db.execute(queries.favorites(current_user.id))))
+
+
+async def favorite_id_set(db: AsyncSession, user_id: int):
+    async def load():
+        return (await db.execute(favorites.ids_statement(user_id))).scalars().all()
+    return await favorites.favorite_ids.get_or_load_async(user_id, load)
+
+
+@router.get("/favorites/ids", response_model=schemas.FavoriteIds)
+async def get_favorite_ids(current_user: Principal = Depends(get_current_user),
+                           db: AsyncSession = Depends(get_async_db)):
+    ids = await favorite_id_set(db, current_user.id)
+    return serializers.json_response(serializers.encode_one({"product_ids": sorted(ids)}, schemas.FavoriteIds))
+
+
+@router.post("/favorites/contains", response_model=schemas.FavoriteIds)
+async def favorites_contain(query: schemas.FavoriteIdsQuery, current_user: Principal = Depends(get_current_user),
+                            db: AsyncSession = Depends(get_async_db)):
+    ids = await favorite_id_set(db, current_user.id)
+    found = [product_id for product_id in dict.fromkeys(query.product_ids) if product_id in ids]
+    return serializers.json_response(serializers.encode_one({"product_ids": found}, schemas.FavoriteIds))
+
+
+@router.post("/favorites", response_model=schemas.FavoriteResponse)
+async def add_favorite(fav: schemas.FavoriteCreate, current_user: Principal = Depends(get_current_user),
+                       db: AsyncSession = Depends(get_async_db)):
+    await check_products_exist(db, {fav.product_id})
+    dialect = db.bind.dialect.name
+    added = (await db.execute(favorites.add_statement(dialect, current_user.id, fav.product_id))).rowcount == 1
+    await db.commit()
+    favorite = serializers.favorite_dict((await db.execute(queries.favorite_item(current_user.id, fav.product_id))).first())
+    if added:
+        favorites.favorite_added(current_user.id, fav.product_id)
+        popularity.counters.incr(fav.product_id, "favorites")
+        events.publish(current_user.id, "favorite.added", favorite)
+    return serializers.json_response(serializers.encode_one(favorite, schemas.FavoriteResponse))
+
+
+@router.delete("/favorites/{product_id}")
+async def remove_favorite(product_id: int, current_user: Principal = Depends(get_current_user),
+                          db: AsyncSession = Depends(get_async_db)):
+    removed = (await db.execute(delete(models.Favorite).where(
+        models.Favorite.user_id == current_user.id,
+        models.Favorite.product_id == product_id
+    ))).rowcount
+    await db.commit()
+    if removed:
+        favorites.favorite_removed(current_user.id, product_id)
+        events.publish(current_user.id, "favorite.removed", {"product_id": product_id})
+    return {"message": "Favorite removed"}
+
+
+# --- Routes: Orders ---
+# The order operations are shared with main.py and run on the sync session
+# underneath the AsyncSession.
+
+async def get_order(db: AsyncSession, user_id: int, order_id: int):
+    order = (await db.execute(queries.order(user_id, order_id))).scalars().first()
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+
+async def run_order_operation(db: AsyncSession, operation, *args):
+    try:
+        return await db.run_sync(operation, *args)
+    except orders.CheckoutError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc))
+
+
+@router.post("/checkout", response_model=schemas.OrderResponse)
+async def checkout(voucher: Optional[str] = None, current_user: Principal = Depends(get_current_user),
+                   db: AsyncSession = Depends(get_async_db)):
+    order_id = await run_order_operation(db, orders.checkout, current_user.id, voucher)
+    events.publish(current_user.id, "cart.cleared", {})
+    return await get_order(db, current_user.id, order_id)
+
+
+@router.get("/orders", response_model=List[schemas.OrderResponse])
+async def list_orders(current_user: Principal = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    return (await db.execute(queries.orders(current_user.id))).scalars().all()
+
+
+@router.get("/orders/{order_id}", response_model=schemas.OrderResponse)
+async def read_order(order_id: int, current_user: Principal = Depends(get_current_user),
+                     db: AsyncSession = Depends(get_async_db)):
+    return await get_order(db, current_user.id, order_id)
+
+
+@router.post("/orders/{order_id}/pay", response_model=schemas.OrderResponse)
+async def pay_order(order_id: int, current_user: Principal = Depends(get_current_user),
+                    db: AsyncSession = Depends(get_async_db)):
+    await run_order_operation(db, orders.pay, current_user.id, order_id)
+    return await get_order(db, current_user.id, order_id)
+
+
+@router.post("/orders/{order_id}/cancel", response_model=schemas.OrderResponse)
+async def cancel_order(order_id: int, current_user: Principal = Depends(get_current_user),
+                       db: AsyncSession = Depends(get_async_db)):
+    await run_order_operation(db, orders.cancel, current_user.id, order_id)
+    return await get_order(db, current_user.id, order_id)
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List, Optional, Any
+from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional, Any, Tuple
 
 # --- Auth Schemas ---
 class UserCreate(BaseModel):
@@ -42,13 +43,70 @@ class ProductBase(BaseModel):
 
 class ProductResponse(ProductBase):
     id: int
+    effectivePrice: Optional[float] = None
+    class Config:
+        from_attributes = True
+
+# Compact listing shape: image URLs are indexes into `images`, each of which
+# is a `[prefix index, suffix]` pair (see serializers.compact_products)
+class CompactProductColor(BaseModel):
+    name: str
+    hex: str
+    images: List[int]
+
+class CompactProduct(BaseModel):
+    name: str
+    price: float
+    image: int
+    description: str
+    category: str
+    discountPercent: Optional[int] = None
+    colors: List[CompactProductColor]
+    id: int
+    effectivePrice: Optional[float] = None
+
+class CompactProductList(BaseModel):
+    prefixes: List[str]
+    images: List[Tuple[int, str]]
+    products: List[CompactProduct]
+
+# Products in a locale other than the catalog's (see locales.py): `price` and
+# `effectivePrice` stay in the catalog currency, `localPrice` converts them
+class LocalPrice(BaseModel):
+    currency: str
+    price: float
+    effectivePrice: Optional[float] = None
+    formatted: str
+    formattedEffective: Optional[str] = None
+
+class LocalizedProductResponse(ProductResponse):
+    categoryLabel: str
+    localPrice: LocalPrice
+
+class LocalizedCompactProduct(CompactProduct):
+    categoryLabel: str
+    localPrice: LocalPrice
+
+class LocalizedCompactProductList(CompactProductList):
+    products: List[LocalizedCompactProduct]
+
+class LocaleUpdate(BaseModel):
+    currency: str = Field(..., min_length=3, max_length=3)
+    rate: float = Field(..., gt=0)
+    decimals: int = Field(2, ge=0, le=4)
+    decimal_separator: str = "."
+    group_separator: str = ","
+    price_format: str = Field(..., pattern=r"\{amount\}")
+
+class LocaleResponse(LocaleUpdate):
+    code: str
     class Config:
         from_attributes = True
 
 # --- Cart & Favorite Schemas ---
 class CartItemCreate(BaseModel):
     product_id: int
-    quantity: int = 1
+    quantity: int = Field(1, ge=1)
     selected_color: Optional[Any] = None
 
 class CartItemResponse(BaseModel):
@@ -59,6 +117,41 @@ class CartItemResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class CartOperation(BaseModel):
+    op: Literal["add", "set", "remove"]
+    product_id: int
+    quantity: int = Field(1, ge=0)
+    selected_color: Optional[Any] = None
+
+    @model_validator(mode="after")
+    def check_quantity(self):
+        if self.op == "add" and self.quantity < 1:
+            raise ValueError("add needs a quantity of at least 1")
+        return self
+
+class CartPatch(BaseModel):
+    operations: List[CartOperation] = Field(..., max_length=500)
+
+class CartSummaryLine(BaseModel):
+    id: int
+    product_id: int
+    quantity: int
+    list_price: float
+    discount_percent: Optional[int] = None
+    unit_price: float
+    line_total: float
+
+class CartSummary(BaseModel):
+    lines: List[CartSummaryLine]
+    item_count: int
+    subtotal: float
+    discount_total: float
+    shipping: float
+    voucher: Optional[str] = None
+    voucher_discount: float
+    tax: float
+    total: float
+
 class FavoriteCreate(BaseModel):
     product_id: int
 
@@ -66,4 +159,50 @@ class FavoriteResponse(BaseModel):
     id: int
     product: ProductResponse
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class FavoriteIdsQuery(BaseModel):
+    product_ids: List[int] = Field(..., max_length=500)
+
+class FavoriteIds(BaseModel):
+    product_ids: List[int]
+
+
+# --- Order & Inventory Schemas ---
+class OrderLineResponse(BaseModel):
+    id: int
+    product_id: int
+    quantity: int
+    selected_color: Optional[Any] = None
+    unit_price: float
+    discount_percent: Optional[int] = None
+    line_total: float
+    class Config:
+        from_attributes = True
+
+class OrderResponse(BaseModel):
+    id: int
+    status: str
+    subtotal: float
+    discount_total: float
+    shipping: float
+    voucher: Optional[str] = None
+    voucher_discount: float
+    tax: float
+    total: float
+    created_at: datetime
+    expires_at: datetime
+    paid_at: Optional[datetime] = None
+    lines: List[OrderLineResponse]
+    class Config:
+        from_attributes = True
+
+class InventoryUpdate(BaseModel):
+    on_hand: int = Field(..., ge=0)
+
+class InventoryResponse(BaseModel):
+    product_id: int
+    on_hand: int
+    reserved: int
+    class Config:
+        from_attributes = True
@@ -0,0 +1,154 @@
+import json
+import re
+
+from sqlalchemy import String, case, cast, or_, select, text
+
+import models
+import serializers
+
+# Full-text search runs on SQLite's FTS5 with BM25 ranking. Other databases
+# get a plain case-insensitive substring search (search_fallback_query),
+# ranked by the same column weights; it needs no index and scans products.
+
+# Column weights for bm25(), in declaration order: name, description,
+# category, colors. A hit in the name outranks one buried in the description.
+BM25_WEIGHTS = (10.0, 1.0, 4.0, 2.0)
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+_COLOR_NAMES = "(SELECT group_concat(json_extract(value, '$.name'), ' ') FROM json_each({row}.colors))"
+
+_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, category, colors,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+"""
+
+_TRIGGERS = {
+    "products_fts_ai": f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, category, colors)
+        VALUES (new.id, new.name, new.description, new.category, {_COLOR_NAMES.format(row="new")});
+    END
+    """,
+    "products_fts_ad": """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = old.id;
+    END
+    """,
+    "products_fts_au": f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = old.id;
+        INSERT INTO products_fts(rowid, name, description, category, colors)
+        VALUES (new.id, new.name, new.description, new.category, {_COLOR_NAMES.format(row="new")});
+    END
+    """,
+}
+
+_REBUILD = f"""
+    INSERT INTO products_fts(rowid, name, description, category, colors)
+    SELECT p.id, p.name, p.description, p.category, {_COLOR_NAMES.format(row="p")}
+    FROM products AS p
+"""
+
+
+def init_search(engine):
+    """Create the FTS5 index and its sync triggers, back-filling it if the
+    product table was populated before the index existed."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        conn.exec_driver_sql(_TABLE)
+        for ddl in _TRIGGERS.values():
+            conn.exec_driver_sql(ddl)
+        indexed = conn.exec_driver_sql("SELECT count(*) FROM products_fts").scalar()
+        total = conn.exec_driver_sql("SELECT count(*) FROM products").scalar()
+        if indexed != total:
+            conn.exec_driver_sql("DELETE FROM products_fts")
+            conn.exec_driver_sql(_REBUILD)
+
+
+# --- Bulk writes ---
+# Row-by-row trigger maintenance dominates large imports. Bulk writers drop
+# the triggers inside their own transaction (SQLite DDL is transactional, so
+# no other connection ever sees them missing), reindex each batch with one
+# INSERT ... SELECT, and restore the triggers before committing.
+
+def _has_index(conn) -> bool:
+    return conn.dialect.name == "sqlite" and conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = 'products_fts'"
+    ).first() is not None
+
+
+def suspend_triggers(conn) -> bool:
+    """Drop the sync triggers; returns False if there is no index to maintain."""
+    if not _has_index(conn):
+        return False
+    # pysqlite only opens a transaction implicitly before DML; make sure the
+    # DROPs below are part of one rather than autocommitted.
+    if not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    for name in _TRIGGERS:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+    return True
+
+
+def restore_triggers(conn):
+    if _has_index(conn):
+        for ddl in _TRIGGERS.values():
+            conn.exec_driver_sql(ddl)
+
+
+def reindex(conn, product_ids):
+    if not _has_index(conn):
+        return
+    ids = json.dumps(list(product_ids))
+    conn.exec_driver_sql("DELETE FROM products_fts WHERE rowid IN (SELECT value FROM json_each(?))", (ids,))
+    conn.exec_driver_sql(_REBUILD + " WHERE p.id IN (SELECT value FROM json_each(?))", (ids,))
+
+
+def build_match_query(q: str) -> str:
+    """Turn free text into an FTS5 query where every term must match as a
+    prefix, e.g. `oak tab` -> `"oak"* "tab"*`."""
+    terms = re.findall(r"\w+", q.lower())
+    return " ".join('"%s"*' % term for term in terms)
+
+
+def search_products_query(q: str, limit: int = DEFAULT_LIMIT, dialect: str = "sqlite"):
+    """Return a SELECT of matching product rows (serializers.PRODUCT_COLUMNS)
+    ordered by BM25 rank, or None if the text contains nothing searchable."""
+    if dialect != "sqlite":
+        return search_fallback_query(q, limit)
+    match = build_match_query(q)
+    if not match:
+        return None
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    columns = [attr.property.columns[0] for attr in serializers.PRODUCT_COLUMNS]
+    return text(f"""
+        SELECT {", ".join(f'products."{column.name}"' for column in columns)} FROM products_fts
+        JOIN products ON products.id = products_fts.rowid
+        WHERE products_fts MATCH :match
+        ORDER BY bm25(products_fts, {weights})
+        LIMIT :limit
+    """).bindparams(match=match, limit=limit).columns(*columns)
+
+
+def search_fallback_query(q: str, limit: int = DEFAULT_LIMIT):
+    """search_products_query() for databases without FTS5: every term must
+    appear somewhere in the product, and products rank by the BM25_WEIGHTS
+    of the columns each term was found in."""
+    terms = re.findall(r"\w+", q.lower())
+    if not terms:
+        return None
+    Product = models.Product
+    columns = (Product.name, Product.description, Product.category, cast(Product.colors, String))
+    stmt = select(*serializers.PRODUCT_COLUMNS)
+    score = 0
+    for term in terms:
+        hits = [column.icontains(term, autoescape=True) for column in columns]
+        stmt = stmt.where(or_(*hits))
+        score += sum(case((hit, weight), else_=0) for hit, weight in zip(hits, BM25_WEIGHTS))
+    return stmt.order_by(score.desc(), Product.id).limit(limit)
@@ -0,0 +1,143 @@
+import os
+from typing import List, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+import fastjson
+import models
+import schemas
+
+# Hot read endpoints build plain dicts straight from row tuples and encode
+# them with fastjson, skipping per-row Pydantic validation. The dicts mirror
+# the response schemas field for field; TRUSTED_OUTPUT=0 runs them back
+# through the schemas instead, which is how conformance is checked.
+TRUSTED_OUTPUT = os.getenv("TRUSTED_OUTPUT", "1") != "0"
+
+Product = models.Product
+
+# Selected in ProductResponse field order
+PRODUCT_COLUMNS = (
+    Product.name,
+    Product.price,
+    Product.image,
+    Product.description,
+    Product.category,
+    Product.discountPercent,
+    Product.colors,
+    Product.id,
+)
+_WIDTH = len(PRODUCT_COLUMNS)
+
+
+def product_dict(row, start: int = 0) -> dict:
+    """ProductResponse-shaped dict from PRODUCT_COLUMNS found at `row[start:]`."""
+    name, price, image, description, category, discount, colors, product_id = row[start:start + _WIDTH]
+    return {
+        "name": name,
+        "price": price,
+        "image": image,
+        "description": description,
+        "category": category,
+        "discountPercent": discount,
+        "colors": [
+            {"name": color["name"], "hex": color["hex"], "images": color["images"]}
+            for color in colors or ()
+        ],
+        "id": product_id,
+        "effectivePrice": models.effective_price(price, discount),
+    }
+
+
+def cart_item_dict(row) -> dict:
+    """Row layout: CartItem.id, quantity, selected_color, *PRODUCT_COLUMNS."""
+    return {"id": row[0], "product": product_dict(row, 3), "quantity": row[1], "selected_color": row[2]}
+
+
+def favorite_dict(row) -> dict:
+    """Row layout: Favorite.id, *PRODUCT_COLUMNS."""
+    return {"id": row[0], "product": product_dict(row, 1)}
+
+
+# --- Compact shape ---
+# Every product repeats long image URLs that share a handful of directory
+# prefixes. The compact shape lists each distinct prefix and URL once per
+# response and refers to URLs by index:
+#
+#   {"prefixes": ["https://host/images/"],
+#    "images": [[0, "a.jpg"], [0, "b.jpg"]],
+#    "products": [{..., "image": 0, "colors": [{..., "images": [0, 1]}]}]}
+
+def compact_products(products: list) -> dict:
+    prefixes, prefix_ids, images, image_ids = [], {}, [], {}
+
+    def ref(url: str) -> int:
+        image_id = image_ids.get(url)
+        if image_id is None:
+            cut = url.rfind("/") + 1
+            prefix = url[:cut]
+            prefix_id = prefix_ids.get(prefix)
+            if prefix_id is None:
+                prefix_id = prefix_ids[prefix] = len(prefixes)
+                prefixes.append(prefix)
+            image_id = image_ids[url] = len(images)
+            images.append([prefix_id, url[cut:]])
+        return image_id
+
+    compact = [
+        {
+            **product,
+            "image": ref(product["image"]),
+            "colors": [{**color, "images": [ref(url) for url in color["images"]]} for color in product["colors"]],
+        }
+        for product in products
+    ]
+    return {"prefixes": prefixes, "images": images, "products": compact}
+
+
+# --- Encoding ---
+
+_adapters = {}
+
+
+def _list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    if schema not in _adapters:
+        _adapters[schema] = TypeAdapter(List[schema])
+    return _adapters[schema]
+
+
+def encode_list(items: list, schema: Type[BaseModel]) -> bytes:
+    if TRUSTED_OUTPUT:
+        return fastjson.dumps(items)
+    adapter = _list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(items))
+
+
+def encode_one(item: dict, schema: Type[BaseModel]) -> bytes:
+    if TRUSTED_OUTPUT:
+        return fastjson.dumps(item)
+    return schema.model_validate(item).model_dump_json().encode("utf-8")
+
+
+def json_response(body: bytes, headers: dict = None) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def products_body(rows, shape: str = "full") -> bytes:
+    return encode_products([product_dict(row) for row in rows], shape)
+
+
+def encode_products(products: list, shape: str = "full", localized: bool = False) -> bytes:
+    """`localized` products carry the fields added by locales.localize()."""
+    if shape == "compact":
+        schema = schemas.LocalizedCompactProductList if localized else schemas.CompactProductList
+        return encode_one(compact_products(products), schema)
+    return encode_list(products, schemas.LocalizedProductResponse if localized else schemas.ProductResponse)
+
+
+def cart_body(rows) -> bytes:
+    return encode_list([cart_item_dict(row) for row in rows], schemas.CartItemResponse)
+
+
+def favorites_body(rows) -> bytes:
+    return encode_list([favorite_dict(row) for row in rows], schemas.FavoriteResponse)
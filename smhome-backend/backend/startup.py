@@ -0,0 +1,155 @@
+"""Worker startup: schema setup, warm-up and the startup timing report.
+
+With SCHEMA_SETUP=startup (the default) every worker creates and upgrades
+the schema as it boots, as it always has. With SCHEMA_SETUP=cli that is a
+separate deploy step, run once before the workers start, and a worker only
+checks that the tables exist:
+
+    python startup.py init    create or upgrade the schema, back-fill read models
+    python startup.py seed    init, then load the sample catalog into an empty database
+
+Either way each worker opens its pooled connections and serializes the
+default catalog listings before it accepts requests, then logs how long
+each phase took on the `smhome.startup` logger.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import time
+from typing import List, Tuple
+
+# Taken before main.py imports anything else, so the report includes the
+# time spent importing the app
+IMPORT_STARTED = time.perf_counter()
+
+from sqlalchemy import func, inspect, select
+
+import catalog
+import database
+import listings
+import locales
+import migrations
+import models
+import search
+from catalog_cache import catalog_cache
+
+logger = logging.getLogger("smhome.startup")
+
+SCHEMA_SETUP = os.getenv("SCHEMA_SETUP", "startup").lower()
+WARM_CONNECTIONS = min(int(os.getenv("WARM_CONNECTIONS", "4")), database.DB_POOL_SIZE)
+WARM_CATALOG = os.getenv("WARM_CATALOG", "1") != "0"
+
+
+class StartupTimer:
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = [("import", time.perf_counter() - IMPORT_STARTED)]
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def report(self):
+        total = sum(seconds for _, seconds in self.phases)
+        logger.info("worker ready in %.0f ms: %s", total * 1000,
+                    ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases))
+
+
+# --- Schema ---
+
+def init_schema(engine):
+    models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+    search.init_search(engine)
+    listings.init_listings(engine)
+    locales.init_locales(engine)
+
+
+def check_schema(engine):
+    """Fail fast when SCHEMA_SETUP=cli and `python startup.py init` hasn't run."""
+    missing = set(models.Base.metadata.tables) - set(inspect(engine).get_table_names())
+    if missing:
+        raise RuntimeError(
+            f"database schema is missing {', '.join(sorted(missing))}; run `python startup.py init` first"
+        )
+    locales.load(engine)
+
+
+def prepare_schema(engine):
+    if SCHEMA_SETUP == "cli":
+        check_schema(engine)
+    else:
+        init_schema(engine)
+
+
+def seed_catalog(engine) -> dict:
+    """Load the sample catalog if there are no products yet."""
+    import catalog_io
+    import sample_catalog
+
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(models.Product.__table__)).scalar():
+            return {"imported": 0, "skipped": 0, "errors": []}
+    return catalog_io.import_products(engine, enumerate(sample_catalog.PRODUCTS, 1), strict=True)
+
+
+# --- Warm-up ---
+
+def warm_pool(engine, connections: int = WARM_CONNECTIONS):
+    """Open pooled connections up front, so the first requests don't each
+    pay for connecting (and, on SQLite, for the per-connection pragmas)."""
+    with contextlib.ExitStack() as stack:
+        for _ in range(connections):
+            stack.enter_context(engine.connect()).exec_driver_sql("SELECT 1")
+
+
+async def warm_async_pool(connections: int = WARM_CONNECTIONS):
+    engine = database.get_async_engine()
+    async with contextlib.AsyncExitStack() as stack:
+        for _ in range(connections):
+            conn = await stack.enter_async_context(engine.connect())
+            await conn.exec_driver_sql("SELECT 1")
+
+
+def warm_catalog(engine) -> int:
+    """Serialize the full listing and each category slice in the default
+    locale into the catalog cache, as GET /products would; returns how many
+    bodies were built."""
+    Listing = models.ProductListing
+    with engine.connect() as conn:
+        categories = conn.execute(
+            select(Listing.category).where(Listing.category.is_not(None)).distinct()
+        ).scalars().all()
+        for category in [None, *categories]:
+            stmt = catalog.product_listing_query(category=category)
+            catalog_cache.get_or_build(
+                ("products", locales.DEFAULT_LOCALE, category, "full"),
+                lambda: catalog.serialize_products(conn.execute(stmt).all()),
+            )
+    return len(categories) + 1
+
+
+# --- CLI ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["init", "seed"])
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    timer = StartupTimer()
+    with timer.phase("schema"):
+        init_schema(models.engine)
+    if args.command == "seed":
+        with timer.phase("seed"):
+            print(json.dumps(seed_catalog(models.engine), indent=2))
+    logger.info("done: %s", ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timer.phases[1:]))
+
+
+if __name__ == "__main__":
+    main()
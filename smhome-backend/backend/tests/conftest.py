@@ -0,0 +1,51 @@
+"""Runs the app in-process against a throwaway SQLite database seeded with
+the sample catalog. The backend modules import each other by bare name, so
+the backend directory goes on sys.path, and the settings they read at
+import time are set before anything imports them."""
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+_database_dir = tempfile.mkdtemp(prefix="smhome-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+# In-process bus: no polling queries running alongside the requests under test
+os.environ["INVALIDATION_BACKEND"] = "local"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ["ADMIN_TOKEN"] = "test-admin-token"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import models  # noqa: E402
+import startup  # noqa: E402
+
+_emails = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as client:
+        startup.seed_catalog(models.engine)
+        yield client
+
+
+@pytest.fixture
+def make_user(client):
+    """Sign up a new user and return their Authorization headers."""
+    def make_user() -> dict:
+        email = f"user{next(_emails)}@example.com"
+        assert client.post("/auth/signup", json={"email": email, "password": "password"}).status_code == 200
+        token = client.post("/auth/signin", json={"email": email, "password": "password"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+    return make_user
+
+
+@pytest.fixture
+def admin_headers() -> dict:
+    return {"X-Admin-Token": os.environ["ADMIN_TOKEN"]}
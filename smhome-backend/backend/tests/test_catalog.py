@@ -0,0 +1,89 @@
+import base64
+import json
+
+import pytest
+
+import catalog
+import models
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("sort, value", [
+    ("id", 7), ("name", "Oak Desk"), ("price", 19.99), ("price", 100), ("effective_price", None),
+])
+def test_cursor_round_trip(sort, value):
+    assert catalog.decode_cursor(catalog.encode_cursor(value, 7), sort) == (value, 7)
+
+
+@pytest.mark.parametrize("sort, cursor", [
+    ("name", "not base64 json!"),
+    ("name", raw_cursor({"a": 1})),
+    ("name", raw_cursor([{"a": 1}, 1])),
+    ("name", raw_cursor(["Oak", 1, 2])),
+    ("name", raw_cursor(["Oak", "1"])),
+    ("name", raw_cursor(["Oak", 1.5])),
+    ("name", raw_cursor(["Oak", True])),
+    ("name", raw_cursor([3, 1])),
+    ("price", raw_cursor(["cheap", 1])),
+    ("price", raw_cursor([False, 1])),
+    ("id", raw_cursor([[1], 1])),
+])
+def test_malformed_cursor_is_rejected(sort, cursor):
+    with pytest.raises(catalog.InvalidCursor):
+        catalog.decode_cursor(cursor, sort)
+
+
+def test_malformed_cursor_is_a_bad_request(client):
+    response = client.get("/products", params={"sort": "name", "limit": 2, "cursor": raw_cursor([{"a": 1}, 1])})
+    assert response.status_code == 400
+
+
+def page_ids(client, params: dict) -> list:
+    seen, params = [], dict(params, limit=3)
+    while True:
+        response = client.get("/products", params=params)
+        assert response.status_code == 200
+        seen.extend(product["id"] for product in response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    return seen
+
+
+@pytest.mark.parametrize("sort", ["id", "name", "price", "effective_price"])
+def test_pages_follow_the_cursor(client, sort):
+    everything = client.get("/products", params={"sort": sort, "limit": catalog.MAX_PAGE_SIZE}).json()
+    assert page_ids(client, {"sort": sort}) == [product["id"] for product in everything]
+
+
+@pytest.fixture
+def unpriced(client):
+    """Two products without a price, removed again afterwards."""
+    with models.SessionLocal() as db:
+        products = [models.Product(name=f"Unpriced {n}", price=None, category="Unpriced", colors=[]) for n in (1, 2)]
+        db.add_all(products)
+        db.commit()
+        ids = [product.id for product in products]
+        yield ids
+        for product in products:
+            db.delete(product)
+        db.commit()
+
+
+@pytest.mark.parametrize("sort", ["price", "effective_price"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_continue_past_null_prices(client, unpriced, sort, order):
+    everything = client.get("/products", params={"sort": sort, "order": order, "limit": catalog.MAX_PAGE_SIZE}).json()
+    ids = [product["id"] for product in everything]
+    assert set(unpriced) <= set(ids)
+    # Unpriced products come after the priced ones, or first when descending
+    assert sorted(ids.index(product_id) for product_id in unpriced) == (
+        [0, 1] if order == "desc" else [len(ids) - 2, len(ids) - 1]
+    )
+    assert page_ids(client, {"sort": sort, "order": order}) == ids
+    assert page_ids(client, {"sort": sort, "order": order, "category": "Unpriced"}) == (
+        unpriced if order == "asc" else unpriced[::-1]
+    )
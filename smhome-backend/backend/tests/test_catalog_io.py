@@ -0,0 +1,128 @@
+"""Catalog import and export round trips, run against a database of their
+own so the shared test catalog is left alone."""
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import func, select, text
+
+import catalog_io
+import database
+import listings
+import migrations
+import models
+import search
+from catalog_cache import catalog_cache
+
+PRODUCTS = [
+    {"id": 1, "name": "Oak Desk", "price": 249.0, "image": "desk.jpg", "description": "Solid oak.",
+     "category": "Office", "discountPercent": None,
+     "colors": [{"name": "Oak", "hex": "#c8a165", "images": ["desk-oak.jpg"]}]},
+    {"id": 2, "name": "Linen Sofa", "price": 899.5, "image": "sofa.jpg", "description": "Three seats, washable covers.",
+     "category": "Living Room", "discountPercent": 15, "colors": [],
+     "translations": {"fr": {"name": "Canapé en lin", "description": None, "category": "Salon"}}},
+    {"id": 3, "name": "Bath Stool", "price": 39.99, "image": "stool.jpg", "description": "Teak.",
+     "category": "Bathroom", "discountPercent": None, "colors": []},
+]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = database.make_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+    search.init_search(engine)
+    listings.init_listings(engine)
+    yield engine
+    engine.dispose()
+
+
+def exported(engine) -> list:
+    return [json.loads(line) for line in catalog_io.export_products(engine)]
+
+
+def ndjson(records) -> io.StringIO:
+    return io.StringIO("".join(json.dumps(record) + "\n" for record in records))
+
+
+def count(engine, table) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+def test_ndjson_round_trip(engine):
+    report = catalog_io.import_products(engine, catalog_io.read_ndjson(ndjson(PRODUCTS)))
+    assert report == {"imported": 3, "skipped": 0, "errors": []}
+    assert exported(engine) == PRODUCTS
+
+    # Importing the export again changes nothing
+    again = "".join(line.decode() for line in catalog_io.export_products(engine))
+    catalog_io.import_products(engine, catalog_io.read_ndjson(io.StringIO(again)))
+    assert exported(engine) == PRODUCTS
+
+
+def test_csv_round_trip(engine):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=catalog_io.PRODUCT_COLUMNS + ["translations"])
+    writer.writeheader()
+    for product in PRODUCTS:
+        writer.writerow({
+            **product,
+            "colors": json.dumps(product["colors"]),
+            "translations": json.dumps(product["translations"]) if "translations" in product else "",
+        })
+    out.seek(0)
+
+    report = catalog_io.import_products(engine, catalog_io.read_csv(out))
+    assert report["imported"] == 3
+    assert exported(engine) == PRODUCTS
+
+
+def test_import_keeps_read_models_in_step(engine):
+    catalog_io.import_products(engine, catalog_io.read_ndjson(ndjson(PRODUCTS)))
+    assert count(engine, models.ProductListing.__table__) == 3
+    assert count(engine, models.Inventory.__table__) == 3
+    with engine.connect() as conn:
+        found = conn.execute(text("SELECT rowid FROM products_fts WHERE products_fts MATCH 'sofa'")).scalars().all()
+    assert found == [2]
+
+
+def test_records_without_an_id_are_appended(engine):
+    catalog_io.import_products(engine, catalog_io.read_ndjson(ndjson(PRODUCTS)))
+    new = {key: value for key, value in PRODUCTS[0].items() if key != "id"}
+    catalog_io.import_products(engine, catalog_io.read_ndjson(ndjson([new])))
+    assert [product["id"] for product in exported(engine)] == [1, 2, 3, 4]
+
+
+def test_explicit_id_never_overwrites_an_assigned_one(engine):
+    unnamed = {key: value for key, value in PRODUCTS[0].items() if key != "id"}
+    records = [unnamed, dict(PRODUCTS[1], id=1), dict(PRODUCTS[2], id=2)]
+    report = catalog_io.import_products(engine, catalog_io.read_ndjson(ndjson(records)))
+
+    assert report["imported"] == 2 and report["skipped"] == 1
+    assert report["errors"][0]["line"] == 2
+    assert "already given to the record on line 1" in report["errors"][0]["error"]
+    assert [product["name"] for product in exported(engine)] == ["Oak Desk", "Bath Stool"]
+
+    with pytest.raises(catalog_io.CatalogImportError):
+        catalog_io.import_products(engine, catalog_io.read_ndjson(ndjson([unnamed, dict(unnamed, id=3)])), strict=True)
+
+
+def test_invalid_records_are_reported_and_skipped(engine):
+    source = io.StringIO(json.dumps(PRODUCTS[0]) + "\nnot json\n" + json.dumps({"id": 9, "name": "No price"}) + "\n")
+    report = catalog_io.import_products(engine, catalog_io.read_ndjson(source))
+    assert report["imported"] == 1 and report["skipped"] == 2
+    assert [error["line"] for error in report["errors"]] == [2, 3]
+
+
+def test_failed_import_keeps_committed_batches_and_invalidates(engine):
+    before = catalog_cache.version
+    records = [(1, PRODUCTS[0]), (2, PRODUCTS[1]), (3, {"id": 3, "name": "No price"})]
+    with pytest.raises(catalog_io.CatalogImportError):
+        catalog_io.import_products(engine, records, batch_size=1, transaction_rows=1, strict=True)
+
+    # The transactions committed before the bad record stay, and caches built
+    # from the old catalog are dropped all the same
+    assert [product["id"] for product in exported(engine)] == [1, 2]
+    assert catalog_cache.version > before
@@ -0,0 +1,86 @@
+"""Negotiated gzip/brotli responses, their weak ETags, and the memo of
+compressed bodies never serving one encoding for another."""
+import gzip
+
+import pytest
+
+import compression
+
+brotli = pytest.importorskip("brotli")
+
+
+@pytest.mark.parametrize("header, encoding", [
+    (None, None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("br;q=0, gzip;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("*", "br"),
+    ("*;q=0", None),
+    ("br;q=junk, gzip", "gzip"),
+])
+def test_negotiate(header, encoding):
+    assert compression.negotiate(header) == encoding
+
+
+def test_memo_is_keyed_by_encoding():
+    bodies = compression.CompressedBodies()
+    body = b'{"name":"sofa"}' * 200
+    gzipped = bodies.get_or_compress('"v1"', body, "gzip")
+    brotlied = bodies.get_or_compress('"v1"', body, "br")
+    assert gzip.decompress(gzipped) == brotli.decompress(brotlied) == body
+    assert bodies.get_or_compress('"v1"', body, "gzip") is gzipped
+    assert bodies.get_or_compress('"v1"', body, "br") is brotlied
+
+
+def test_memo_is_bounded():
+    bodies = compression.CompressedBodies(maxsize=2)
+    for version in range(3):
+        bodies.get_or_compress(f'"v{version}"', b"x" * 2000, "gzip")
+    assert list(bodies._entries) == [('"v1"', "gzip"), ('"v2"', "gzip")]
+
+
+def get(client, accept_encoding: str, **headers):
+    return client.get("/products", headers={"Accept-Encoding": accept_encoding, **headers})
+
+
+def test_catalog_is_compressed_as_negotiated(client):
+    plain = get(client, "identity")
+    assert "content-encoding" not in plain.headers
+    assert not plain.headers["ETag"].startswith("W/")
+    assert len(plain.content) >= compression.COMPRESS_MIN_SIZE
+
+    for accept, encoding in (("gzip", "gzip"), ("gzip, br", "br")):
+        response = get(client, accept)
+        assert response.headers["content-encoding"] == encoding
+        assert response.headers["ETag"] == "W/" + plain.headers["ETag"]
+        assert "Accept-Encoding" in response.headers["Vary"]
+        # The client has already decoded it
+        assert response.content == plain.content
+
+
+def test_weak_etag_revalidates(client):
+    etag = get(client, "gzip").headers["ETag"]
+    assert etag.startswith("W/")
+    assert get(client, "gzip", **{"If-None-Match": etag}).status_code == 304
+    assert get(client, "br", **{"If-None-Match": etag}).status_code == 304
+
+
+def test_an_encoding_is_only_served_to_clients_accepting_it(client):
+    etag = get(client, "identity").headers["ETag"]
+    gzipped, brotlied = get(client, "gzip"), get(client, "br")
+    # Again, now that both are memoized
+    assert get(client, "gzip").headers["content-encoding"] == "gzip"
+    assert get(client, "br").headers["content-encoding"] == "br"
+    assert "content-encoding" not in get(client, "identity").headers
+
+    memo = compression.compressed_bodies._entries
+    assert gzip.decompress(memo[(etag, "gzip")]) == gzipped.content
+    assert brotli.decompress(memo[(etag, "br")]) == brotlied.content
+
+
+def test_small_bodies_are_left_alone(client, make_user):
+    response = client.get("/favorites/ids", headers={"Accept-Encoding": "gzip", **make_user()})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
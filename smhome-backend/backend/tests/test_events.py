@@ -0,0 +1,47 @@
+import asyncio
+
+import events
+
+
+def resume(hub: events.EventHub, user_id: int, last_event_id):
+    async def subscribe():
+        subscription, replay, position = hub.subscribe(user_id, last_event_id)
+        hub.unsubscribe(subscription)
+        return replay, position
+    return asyncio.run(subscribe())
+
+
+def test_resume_on_the_same_worker_replays_what_was_missed():
+    hub = events.EventHub()
+    hub.deliver(1, {"type": "favorite.added", "data": {"product_id": 1}})
+    _, position = resume(hub, 1, None)
+    hub.deliver(1, {"type": "favorite.added", "data": {"product_id": 2}})
+    hub.deliver(2, {"type": "favorite.added", "data": {"product_id": 3}})
+    hub.deliver(1, {"type": "favorite.removed", "data": {"product_id": 1}})
+
+    replay, _ = resume(hub, 1, position)
+    assert [(event["type"], event["data"]) for event in replay] == [
+        ("favorite.added", {"product_id": 2}), ("favorite.removed", {"product_id": 1}),
+    ]
+    assert resume(hub, 1, replay[-1]["id"])[0] == []
+
+
+def test_resume_from_another_worker_resets():
+    first, second = events.EventHub(), events.EventHub()
+    for hub in (first, second):
+        hub.deliver(1, {"type": "cart.cleared", "data": {}})
+    _, position = resume(first, 1, None)
+
+    replay, _ = resume(second, 1, position)
+    assert [event["type"] for event in replay] == ["reset"]
+
+
+def test_resume_from_before_the_backlog_resets(monkeypatch):
+    monkeypatch.setattr(events, "BACKLOG_SIZE", 2)
+    hub = events.EventHub()
+    _, position = resume(hub, 1, None)
+    for product_id in range(3):
+        hub.deliver(1, {"type": "favorite.added", "data": {"product_id": product_id}})
+
+    assert [event["type"] for event in resume(hub, 1, position)[0]] == ["reset"]
+    assert [event["type"] for event in resume(hub, 1, "garbage")[0]] == ["reset"]
@@ -0,0 +1,86 @@
+"""/favorites/ids is served from the per-user id set, which follows this
+worker's adds and removes and is dropped when another worker writes."""
+from sqlalchemy import delete, select
+
+import favorites
+import invalidation
+import models
+
+
+def favorite_ids(client, headers: dict) -> list:
+    response = client.get("/favorites/ids", headers=headers)
+    assert response.status_code == 200
+    return response.json()["product_ids"]
+
+
+def add(client, headers: dict, product_id: int) -> dict:
+    response = client.post("/favorites", json={"product_id": product_id}, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def user_id_of(favorite: dict) -> int:
+    with models.engine.connect() as conn:
+        return conn.execute(select(models.Favorite.user_id).where(models.Favorite.id == favorite["id"])).scalar()
+
+
+def test_ids_follow_adds_and_removes(client, make_user):
+    headers = make_user()
+    assert favorite_ids(client, headers) == []
+
+    for product_id in (5, 2, 8):
+        add(client, headers, product_id)
+    add(client, headers, 2)
+    assert favorite_ids(client, headers) == [2, 5, 8]
+
+    assert client.delete("/favorites/5", headers=headers).status_code == 200
+    assert client.delete("/favorites/5", headers=headers).status_code == 200
+    assert favorite_ids(client, headers) == [2, 8]
+
+    contains = client.post("/favorites/contains", json={"product_ids": [8, 5, 2, 8]}, headers=headers)
+    assert contains.json()["product_ids"] == [8, 2]
+    assert [favorite["product"]["id"] for favorite in client.get("/favorites", headers=headers).json()] == [2, 8]
+
+
+def test_ids_are_served_from_the_cache(client, make_user):
+    headers = make_user()
+    user_id = user_id_of(add(client, headers, 3))
+    assert favorite_ids(client, headers) == [3]
+    assert favorites.favorite_ids.get(user_id) == frozenset({3})
+
+    # A write this worker didn't see doesn't show until the set is dropped
+    with models.engine.begin() as conn:
+        conn.execute(delete(models.Favorite).where(models.Favorite.user_id == user_id))
+    assert favorite_ids(client, headers) == [3]
+
+
+def test_other_workers_changes_arrive_over_the_bus(client, make_user, monkeypatch):
+    headers = make_user()
+    user_id = user_id_of(add(client, headers, 4))
+    assert favorite_ids(client, headers) == [4]
+
+    bus = invalidation.DatabaseBus(models.engine)
+    bus.open()
+    # Another worker adds a favorite and broadcasts it
+    with models.engine.begin() as conn:
+        conn.execute(favorites.add_statement(conn.dialect.name, user_id, 6))
+    with monkeypatch.context() as patch:
+        patch.setattr(invalidation, "ORIGIN", "other-worker")
+        bus.write([(favorites.INVALIDATION_TOPIC, str(user_id))])
+    bus.poll()
+
+    assert favorites.favorite_ids.get(user_id) is None
+    assert favorite_ids(client, headers) == [4, 6]
+
+
+def test_a_set_loaded_during_a_change_is_not_kept():
+    cache = favorites.FavoriteIdCache()
+
+    def load():
+        # A write commits while the ids are being read
+        cache.added(1, 9)
+        return [7]
+
+    assert cache.get_or_load(1, load) == frozenset({7})
+    assert cache.get(1) is None
+    assert cache.get_or_load(1, lambda: [7, 9]) == frozenset({7, 9})
@@ -0,0 +1,248 @@
+"""Invalidations reach the other workers over each bus, and a worker skips
+its own. Redis runs against a minimal in-process server speaking the Redis
+protocol (HELLO, PUBLISH and SUBSCRIBE; RESP2 or RESP3)."""
+import queue
+import socketserver
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete, select
+
+import fastjson
+import invalidation
+import models
+
+Message = models.CacheInvalidation
+
+
+@pytest.fixture
+def received(monkeypatch):
+    """Keys dispatched on the "test" topic, in arrival order."""
+    keys = queue.Queue()
+    monkeypatch.setitem(invalidation._handlers, "test", [keys.put])
+    return keys
+
+
+def drained(keys: queue.Queue) -> list:
+    found = []
+    while not keys.empty():
+        found.append(keys.get_nowait())
+    return found
+
+
+# --- Database ---
+
+@pytest.fixture
+def bus(client):
+    with models.engine.begin() as conn:
+        conn.execute(delete(Message))
+    bus = invalidation.DatabaseBus(models.engine)
+    bus.open()
+    return bus
+
+
+def write_as(monkeypatch, bus, origin: str, messages: list):
+    """Write `messages` as the worker `origin` would."""
+    with monkeypatch.context() as patch:
+        patch.setattr(invalidation, "ORIGIN", origin)
+        bus.write(messages)
+
+
+def test_database_bus_delivers_other_workers_messages(monkeypatch, bus, received):
+    write_as(monkeypatch, bus, "other-worker", [("test", "a"), ("test", "b")])
+    bus.write([("test", "own")])
+    bus.poll()
+    assert drained(received) == ["a", "b"]
+    bus.poll()
+    assert drained(received) == []
+
+
+def test_database_bus_starts_after_existing_messages(monkeypatch, bus, received):
+    write_as(monkeypatch, bus, "other-worker", [("test", "old")])
+    late = invalidation.DatabaseBus(models.engine)
+    late.open()
+    late.poll()
+    assert drained(received) == []
+
+
+def test_database_bus_picks_up_ids_committed_out_of_order(bus, received):
+    cursor = bus._cursor
+    now = invalidation.utcnow()
+
+    def insert(message_id: int, key: str):
+        with models.engine.begin() as conn:
+            conn.execute(Message.__table__.insert(), [
+                {"id": message_id, "origin": "other-worker", "topic": "test", "key": key, "created_at": now}
+            ])
+
+    insert(cursor + 2, "second")
+    bus.poll()
+    insert(cursor + 1, "first")
+    bus.poll()
+    assert drained(received) == ["second", "first"]
+
+
+def test_database_bus_prunes_expired_messages(monkeypatch, bus, received):
+    write_as(monkeypatch, bus, "other-worker", [("test", "fresh")])
+    with models.engine.begin() as conn:
+        conn.execute(Message.__table__.insert(), [{
+            "origin": "other-worker", "topic": "test", "key": "stale",
+            "created_at": invalidation.utcnow() - timedelta(seconds=invalidation.RETENTION_SECONDS + 1),
+        }])
+    bus.poll()
+    with models.engine.connect() as conn:
+        assert conn.execute(select(Message.key)).scalars().all() == ["fresh"]
+
+
+def test_bus_worker_polls_and_flushes_on_stop(monkeypatch, bus, received):
+    assert invalidation.POLL_SECONDS == 0.02
+    worker = invalidation.BusWorker(bus)
+    worker.start()
+    try:
+        write_as(monkeypatch, bus, "other-worker", [("test", "remote")])
+        assert received.get(timeout=1) == "remote"
+    finally:
+        worker.outbox.put(("test", "queued"))
+        worker.stop()
+    with models.engine.connect() as conn:
+        sent = conn.execute(select(Message.key).where(Message.origin == invalidation.ORIGIN)).scalars().all()
+    assert sent == ["queued"]
+
+
+def test_publish_runs_local_handlers_and_queues_for_the_bus(monkeypatch, received):
+    worker = invalidation.BusWorker(bus=None)
+    monkeypatch.setattr(invalidation, "_worker", worker)
+    invalidation.publish("test", "k")
+    invalidation.publish("test", "quiet", local=False)
+    assert drained(received) == ["k"]
+    assert worker._take(None) == [("test", "k"), ("test", "quiet")]
+
+
+# --- Redis ---
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), RedisConnection)
+        self.lock = threading.Lock()
+        self.channels = defaultdict(set)
+
+    @property
+    def url(self) -> str:
+        return "redis://%s:%d/0" % self.server_address
+
+
+class RedisConnection(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+        # Pub/sub frames are arrays in RESP2 and pushes in RESP3
+        self.push = b"*"
+
+    def send(self, *items):
+        with self.write_lock:
+            self.wfile.write(b"".join(items))
+            self.wfile.flush()
+
+    def read_command(self) -> list:
+        header = self.rfile.readline()
+        if not header:
+            return []
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        server = self.server
+        try:
+            while True:
+                args = self.read_command()
+                if not args:
+                    return
+                command = args[0].upper()
+                if command == b"HELLO":
+                    self.push = b">" if args[1:2] == [b"3"] else b"*"
+                    proto = b"3" if self.push == b">" else b"2"
+                    self.send(b"%1\r\n", bulk(b"proto"), b":" + proto + b"\r\n")
+                elif command == b"SUBSCRIBE":
+                    for channel in args[1:]:
+                        with server.lock:
+                            server.channels[channel].add(self)
+                        self.send(self.push + b"3\r\n", bulk(b"subscribe"), bulk(channel), b":1\r\n")
+                elif command == b"UNSUBSCRIBE":
+                    for channel in args[1:]:
+                        with server.lock:
+                            server.channels[channel].discard(self)
+                        self.send(self.push + b"3\r\n", bulk(b"unsubscribe"), bulk(channel), b":0\r\n")
+                elif command == b"PUBLISH":
+                    channel, payload = args[1:3]
+                    with server.lock:
+                        subscribers = list(server.channels[channel])
+                    for subscriber in subscribers:
+                        subscriber.send(subscriber.push + b"3\r\n", bulk(b"message"), bulk(channel), bulk(payload))
+                    self.send(b":%d\r\n" % len(subscribers))
+                elif command == b"PING":
+                    self.send(b"+PONG\r\n")
+                else:
+                    # CLIENT SETINFO and the like
+                    self.send(b"+OK\r\n")
+        finally:
+            with server.lock:
+                for subscribers in server.channels.values():
+                    subscribers.discard(self)
+
+
+def bulk(value: bytes) -> bytes:
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+@pytest.fixture
+def redis_url():
+    pytest.importorskip("redis")
+    server = RedisStandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.url
+    server.shutdown()
+    server.server_close()
+
+
+def test_redis_bus_delivers_other_workers_messages(redis_url, received):
+    import redis
+
+    bus = invalidation.RedisBus(redis_url)
+    bus.open()
+    observer = redis.Redis.from_url(redis_url)
+    wire = observer.pubsub(ignore_subscribe_messages=True)
+    wire.subscribe(invalidation.CHANNEL)
+    try:
+        time.sleep(0.1)
+        bus.write([("test", "own")])
+        observer.publish(invalidation.CHANNEL, fastjson.dumps({"origin": "other-worker", "topic": "test", "key": "theirs"}))
+
+        assert received.get(timeout=2) == "theirs"
+        # Delivered in order, so the worker's own message was seen and skipped
+        assert drained(received) == []
+        deadline = time.monotonic() + 2
+        sent = None
+        while sent is None and time.monotonic() < deadline:
+            # The subscribe confirmation comes back as None
+            sent = wire.get_message(timeout=0.1)
+        assert fastjson.loads(sent["data"]) == {"origin": invalidation.ORIGIN, "topic": "test", "key": "own"}
+    finally:
+        wire.close()
+        observer.close()
+        bus.close()
+
+
+def test_redis_backend_needs_the_package(monkeypatch):
+    monkeypatch.setattr(invalidation, "redis", None)
+    with pytest.raises(RuntimeError):
+        invalidation.RedisBus("redis://localhost")
+
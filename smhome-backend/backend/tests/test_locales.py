@@ -0,0 +1,150 @@
+"""Accept-Language negotiation, locale number formats, and catalog
+responses cached and served per locale."""
+from typing import NamedTuple
+
+import pytest
+
+import locales
+import models
+from catalog_cache import catalog_cache
+
+
+class LocaleRow(NamedTuple):
+    code: str
+    currency: str
+    rate: float
+    decimals: int
+    decimal_separator: str
+    group_separator: str
+    price_format: str
+
+
+FR = LocaleRow("fr", "EUR", 0.5, 2, ",", " ", "{amount} €")
+JA = LocaleRow("JA", "JPY", 150.0, 0, ".", ",", "¥{amount}")
+
+
+@pytest.mark.parametrize("header, tags", [
+    ("fr", ["fr"]),
+    ("fr-CA,fr;q=0.9,en;q=0.8", ["fr-ca", "fr", "en"]),
+    ("en;q=0.5, es, vi;q=0.8", ["es", "vi", "en"]),
+    ("es, vi", ["es", "vi"]),
+    ("de;q=0, fr", ["fr"]),
+    ("fr;q=high, es", ["es"]),
+    (" , ", []),
+])
+def test_parse_accept_language(header, tags):
+    assert locales.parse_accept_language(header) == tags
+
+
+@pytest.fixture
+def registry():
+    registry = locales.LocaleRegistry()
+    registry.load([FR, JA])
+    return registry
+
+
+@pytest.mark.parametrize("header, locale", [
+    (None, locales.DEFAULT_LOCALE),
+    ("", locales.DEFAULT_LOCALE),
+    ("fr", "fr"),
+    ("FR-ca", "fr"),
+    ("ja-JP;q=0.8, fr;q=0.9", "fr"),
+    ("de, ja", "ja"),
+    ("de, *", locales.DEFAULT_LOCALE),
+    ("de, it", locales.DEFAULT_LOCALE),
+    (f"{locales.DEFAULT_LOCALE}, fr", locales.DEFAULT_LOCALE),
+])
+def test_negotiate(registry, header, locale):
+    assert registry.negotiate(header) == locale
+
+
+def test_negotiation_is_remembered_until_reload(registry):
+    assert registry.negotiate("ja") == "ja"
+    assert registry._negotiated == {"ja": "ja"}
+    registry.load([FR])
+    assert registry._negotiated == {}
+    assert registry.negotiate("ja") == locales.DEFAULT_LOCALE
+
+
+def test_negotiation_cache_is_bounded(monkeypatch, registry):
+    monkeypatch.setattr(locales, "NEGOTIATION_CACHE_SIZE", 2)
+    for header in ("fr", "ja", "fr-ca"):
+        registry.negotiate(header)
+    assert list(registry._negotiated) == ["ja", "fr-ca"]
+
+
+def test_default_locale_has_no_settings(registry):
+    registry.load([FR, FR._replace(code=locales.DEFAULT_LOCALE)])
+    assert registry.get(locales.DEFAULT_LOCALE) is None
+
+
+@pytest.mark.parametrize("row, amount, formatted", [
+    (FR, 1234567.5, "1 234 567,50 €"),
+    (FR, 0.5, "0,50 €"),
+    (JA, 1234567.0, "¥1,234,567"),
+    (locales.SEED_LOCALES[0], 1999.99, "1.999,99 US$"),
+])
+def test_format(row, amount, formatted):
+    settings = locales.LocaleSettings(**row) if isinstance(row, dict) else locales.LocaleSettings(*row)
+    assert settings.format(amount) == formatted
+
+
+def test_local_price_converts_and_rounds():
+    settings = locales.LocaleSettings(*JA._replace(code="ja"))
+    assert settings.local_price(19.99, None) == {
+        "currency": "JPY", "price": 2998.0, "effectivePrice": None,
+        "formatted": "¥2,998", "formattedEffective": None,
+    }
+
+
+# --- Responses ---
+
+@pytest.fixture
+def french_name(client):
+    """A French name for product 1, removed again afterwards."""
+    with models.SessionLocal() as db:
+        db.merge(models.ProductTranslation(product_id=1, locale="fr", name="Produit un"))
+        db.commit()
+        yield "Produit un"
+        db.query(models.ProductTranslation).filter_by(product_id=1, locale="fr").delete()
+        db.commit()
+
+
+def varies_by_language(response) -> bool:
+    return "Accept-Language" in [value.strip() for value in response.headers["Vary"].split(",")]
+
+
+def first_product(client, accept_language=None):
+    headers = {"Accept-Language": accept_language} if accept_language else {}
+    response = client.get("/products", headers=headers)
+    assert response.status_code == 200
+    return response, response.json()[0]
+
+
+def test_each_locale_is_cached_and_served_separately(client, french_name):
+    default_response, default = first_product(client)
+    french_response, french = first_product(client, "fr-FR,fr;q=0.9")
+
+    assert french["name"] == french_name and default["name"] != french_name
+    assert "localPrice" in french and "localPrice" not in default
+    assert varies_by_language(default_response) and varies_by_language(french_response)
+    assert default_response.headers["ETag"] != french_response.headers["ETag"]
+
+    keys = set(catalog_cache._entries)
+    assert ("products", "fr", None, "full") in keys
+    assert ("products", locales.DEFAULT_LOCALE, None, "full") in keys
+
+    # Another header resolving to the same locale shares its entry
+    again, _ = first_product(client, "fr")
+    assert again.headers["ETag"] == french_response.headers["ETag"]
+
+
+def test_single_product_and_pages_vary_by_locale(client, french_name):
+    single = client.get("/products/1", headers={"Accept-Language": "fr"})
+    assert single.json()["name"] == french_name
+    assert varies_by_language(single)
+    assert ("product", "fr", 1) in set(catalog_cache._entries)
+
+    page = client.get("/products", params={"limit": 1}, headers={"Accept-Language": "fr"})
+    assert page.json()[0]["name"] == french_name
+    assert varies_by_language(page)
@@ -0,0 +1,35 @@
+"""/metrics series are labelled by route template, never by raw path."""
+import re
+
+import metrics
+
+
+def series(text: str, name: str) -> dict:
+    return {labels: float(value) for labels, value in re.findall(rf"^{name}{{(.*)}} (\S+)$", text, re.M)}
+
+
+def test_requests_are_counted_per_route_template(client):
+    metrics.registry.reset()
+    for product_id in (1, 2, 3):
+        assert client.get(f"/products/{product_id}").status_code == 200
+    assert client.get("/products/999999").status_code == 404
+    assert client.get("/no/such/page").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+
+    requests = series(text, "http_requests_total")
+    assert requests['method="GET",route="/products/{product_id}",status="200"'] == 3
+    assert requests['method="GET",route="/products/{product_id}",status="404"'] == 1
+    assert requests[f'method="GET",route="{metrics.UNMATCHED_ROUTE}",status="404"'] == 1
+    assert not re.search(r'route="/products/\d', text)
+
+    counts = series(text, "http_request_duration_seconds_count")
+    assert counts['method="GET",route="/products/{product_id}"'] == 4
+    assert series(text, "db_queries_total")['method="GET",route="/products/{product_id}"'] > 0
+
+
+def test_label_values_are_escaped():
+    assert metrics._labels("GET", 'a"b\\c') == 'method="GET",route="a\\"b\\\\c"'
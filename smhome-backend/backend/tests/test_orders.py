@@ -0,0 +1,120 @@
+"""Checkout reserves stock, payment sells it and cancellation or expiry
+hands it back, without ever selling more than is on hand."""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+import models
+import orders
+
+
+def stock(product_id: int) -> tuple:
+    with models.engine.connect() as conn:
+        row = conn.execute(
+            select(models.Inventory.on_hand, models.Inventory.reserved)
+            .where(models.Inventory.product_id == product_id)
+        ).first()
+    return tuple(row) if row else None
+
+
+def expire_all():
+    later = orders.utcnow() + timedelta(minutes=orders.RESERVATION_MINUTES + 1)
+    with models.SessionLocal() as db:
+        while orders.expire_reservations(db, later):
+            pass
+
+
+@pytest.fixture
+def product_id(client, admin_headers):
+    """The last catalog product, with 5 units and no reservations."""
+    with models.engine.connect() as conn:
+        product_id = conn.execute(select(func.max(models.Product.id))).scalar()
+    expire_all()
+    assert client.put(f"/admin/inventory/{product_id}", json={"on_hand": 5}, headers=admin_headers).status_code == 200
+    yield product_id
+    expire_all()
+
+
+def check_out(client, headers: dict, product_id: int, quantity: int = 1):
+    assert client.post("/cart", json={"product_id": product_id, "quantity": quantity}, headers=headers).status_code == 200
+    return client.post("/checkout", headers=headers)
+
+
+def test_every_seeded_product_is_stocked(client):
+    with models.engine.connect() as conn:
+        unstocked = conn.execute(
+            select(func.count()).select_from(models.Product).outerjoin(
+                models.Inventory, models.Inventory.product_id == models.Product.id
+            ).where(models.Inventory.product_id.is_(None))
+        ).scalar()
+    assert unstocked == 0
+    assert stock(1) == (orders.INITIAL_STOCK, 0)
+
+
+def test_upgrade_stocks_products_without_inventory(client):
+    with models.engine.begin() as conn:
+        conn.execute(models.Inventory.__table__.delete().where(models.Inventory.product_id == 2))
+        conn.execute(orders.stock_missing_statement())
+    assert stock(2) == (orders.INITIAL_STOCK, 0)
+
+
+def test_checkout_reserves_and_pay_sells(client, make_user, product_id):
+    headers = make_user()
+    response = check_out(client, headers, product_id, quantity=2)
+    assert response.status_code == 200, response.text
+    order = response.json()
+    assert order["status"] == "pending"
+    assert [line["quantity"] for line in order["lines"]] == [2]
+    assert client.get("/cart", headers=headers).json() == []
+    assert stock(product_id) == (5, 2)
+
+    paid = client.post(f"/orders/{order['id']}/pay", headers=headers)
+    assert paid.status_code == 200
+    assert paid.json()["status"] == "paid"
+    assert stock(product_id) == (3, 0)
+    assert client.post(f"/orders/{order['id']}/cancel", headers=headers).status_code == 409
+
+
+def test_cancel_releases_the_reservation(client, make_user, product_id):
+    headers = make_user()
+    order = check_out(client, headers, product_id, quantity=3).json()
+    assert stock(product_id) == (5, 3)
+
+    cancelled = client.post(f"/orders/{order['id']}/cancel", headers=headers)
+    assert cancelled.json()["status"] == "cancelled"
+    assert stock(product_id) == (5, 0)
+    assert client.post(f"/orders/{order['id']}/pay", headers=headers).status_code == 409
+
+
+def test_orders_belong_to_their_user(client, make_user, product_id):
+    order = check_out(client, make_user(), product_id).json()
+    assert client.post(f"/orders/{order['id']}/cancel", headers=make_user()).status_code == 404
+
+
+def test_concurrent_checkouts_never_oversell(client, make_user, product_id):
+    buyers = [make_user() for _ in range(12)]
+    for headers in buyers:
+        client.post("/cart", json={"product_id": product_id, "quantity": 1}, headers=headers)
+
+    with ThreadPoolExecutor(max_workers=len(buyers)) as pool:
+        statuses = list(pool.map(lambda headers: client.post("/checkout", headers=headers).status_code, buyers))
+
+    assert sorted(statuses) == [200] * 5 + [409] * 7
+    assert stock(product_id) == (5, 5)
+
+
+def test_sweeper_expires_lapsed_reservations(client, make_user, product_id):
+    headers = make_user()
+    order = check_out(client, headers, product_id, quantity=4).json()
+
+    with models.SessionLocal() as db:
+        assert orders.expire_reservations(db) == 0
+        later = orders.utcnow() + timedelta(minutes=orders.RESERVATION_MINUTES + 1)
+        assert orders.expire_reservations(db, later) == 1
+        assert orders.expire_reservations(db, later) == 0
+
+    assert client.get(f"/orders/{order['id']}", headers=headers).json()["status"] == "expired"
+    assert stock(product_id) == (5, 0)
+    assert client.post(f"/orders/{order['id']}/pay", headers=headers).status_code == 409
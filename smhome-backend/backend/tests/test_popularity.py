@@ -0,0 +1,122 @@
+"""Write-behind popularity counters: requests only touch memory, flushes
+merge into the daily rows, and nothing pending is lost at shutdown."""
+import pytest
+from sqlalchemy import event, select
+
+import database
+import metrics
+import models
+import popularity
+
+Activity = models.ProductActivity
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    """A buffer of the test's own, out of reach of the app's flusher."""
+    buffer = popularity.CounterBuffer()
+    monkeypatch.setattr(popularity, "counters", buffer)
+    return buffer
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = database.make_engine(f"sqlite:///{tmp_path / 'activity.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    # Flusher threads rebuild the module's snapshot; keep the app's intact
+    monkeypatch.setattr(popularity, "snapshot", popularity.PopularSnapshot())
+    yield engine
+    engine.dispose()
+
+
+def activity(engine) -> dict:
+    with engine.connect() as conn:
+        return {row[0]: tuple(row[1:]) for row in conn.execute(
+            select(Activity.product_id, Activity.views, Activity.favorites, Activity.cart_adds)
+        )}
+
+
+def test_requests_only_count_in_memory(client, make_user, buffer):
+    writes = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if metrics.current_request() is not None and "product_activity" in statement:
+            writes.append(statement)
+
+    event.listen(models.engine, "before_cursor_execute", record)
+    try:
+        headers = make_user()
+        assert client.get("/products/2").status_code == 200
+        assert client.post("/favorites", json={"product_id": 2}, headers=headers).status_code == 200
+        assert client.post("/cart", json={"product_id": 2, "quantity": 3}, headers=headers).status_code == 200
+    finally:
+        event.remove(models.engine, "before_cursor_execute", record)
+
+    assert writes == []
+    today = popularity.today()
+    assert buffer.drain() == {(2, today, "views"): 1, (2, today, "favorites"): 1, (2, today, "cart_adds"): 3}
+
+
+def test_flushes_merge_into_daily_rows(engine):
+    buffer = popularity.CounterBuffer()
+    for _ in range(3):
+        buffer.incr(1, "views")
+    buffer.incr(1, "cart_adds", 2)
+    buffer.incr(2, "favorites")
+    assert buffer.flush(engine) == 2
+
+    buffer.incr(1, "views")
+    buffer.incr(2, "favorites", 4)
+    assert buffer.flush(engine) == 2
+    assert buffer.flush(engine) == 0
+    assert activity(engine) == {1: (4, 0, 2), 2: (0, 5, 0)}
+
+
+def test_failed_flush_keeps_the_counts(engine):
+    buffer = popularity.CounterBuffer()
+    buffer.incr(1, "views", 2)
+    broken = database.make_engine("sqlite:////nonexistent/dir/activity.db")
+    with pytest.raises(Exception):
+        buffer.flush(broken)
+    buffer.incr(1, "views")
+    buffer.flush(engine)
+    assert activity(engine) == {1: (3, 0, 0)}
+
+
+def test_a_full_buffer_asks_for_a_flush():
+    buffer = popularity.CounterBuffer(flush_size=3)
+    buffer.incr(1, "views")
+    buffer.incr(2, "views")
+    assert not buffer.flush_wanted.is_set()
+    buffer.incr(1, "views")
+    assert buffer.flush_wanted.is_set()
+
+
+def test_stopping_the_flusher_writes_what_is_pending(engine):
+    buffer = popularity.CounterBuffer()
+    flusher = popularity.Flusher(engine, buffer)
+    flusher.start()
+    buffer.incr(7, "views", 5)
+    buffer.incr(7, "cart_adds")
+    flusher.stop()
+
+    assert not flusher.is_alive()
+    assert activity(engine) == {7: (5, 0, 1)}
+    assert buffer.drain() == {}
+
+
+def test_snapshot_ranks_by_weighted_activity(engine):
+    with engine.begin() as conn:
+        conn.execute(models.Product.__table__.insert(), [{"id": n, "name": f"P{n}"} for n in (1, 2, 3)])
+    buffer = popularity.CounterBuffer()
+    buffer.incr(1, "views", 4)
+    buffer.incr(2, "cart_adds")
+    buffer.incr(3, "favorites")
+    buffer.flush(engine)
+
+    snapshot = popularity.PopularSnapshot()
+    snapshot.refresh(engine)
+    # views x1, favorites x3, cart adds x5
+    assert snapshot.get("trending", 10) == (2, 1, 3)
+    assert snapshot.get("best_sellers", 10) == (2,)
+    assert snapshot.get("trending", 1) == (2,)
@@ -0,0 +1,107 @@
+"""Cart pricing rules, the price book's catalog-version invalidation, and
+checkout charging what GET /cart/summary showed."""
+import pytest
+
+import pricing
+from catalog_cache import catalog_cache
+
+PRICES = {
+    1: pricing.unit_price(100.0, None),
+    2: pricing.unit_price(40.0, 25),
+    3: pricing.unit_price(4.0, None),
+}
+
+
+def test_unit_price_applies_the_discount():
+    assert PRICES[2] == pricing.UnitPrice(40.0, 25, 30.0)
+
+
+def test_flat_shipping_and_discounts():
+    summary = pricing.summarize([(10, 1, 2), (11, 2, 3)], PRICES)
+    assert [line["line_total"] for line in summary["lines"]] == [200.0, 90.0]
+    assert summary["item_count"] == 5
+    assert summary["subtotal"] == 290.0
+    assert summary["discount_total"] == 30.0
+    assert summary["shipping"] == pricing.SHIPPING_FLAT
+    assert summary["total"] == round(290.0 + pricing.SHIPPING_FLAT, 2)
+
+
+def test_empty_cart_costs_nothing():
+    summary = pricing.summarize([], PRICES, "FREESHIP")
+    assert summary["lines"] == []
+    assert (summary["shipping"], summary["voucher"], summary["total"]) == (0.0, None, 0.0)
+
+
+def test_lines_for_removed_products_are_left_out():
+    summary = pricing.summarize([(10, 1, 1), (11, 99, 4)], PRICES)
+    assert [line["product_id"] for line in summary["lines"]] == [1]
+    assert summary["item_count"] == 1
+
+
+@pytest.mark.parametrize("code", ["FREESHIP", " freeship "])
+def test_freeship_voucher(code):
+    summary = pricing.summarize([(10, 1, 1)], PRICES, code)
+    assert summary["voucher"] == "FREESHIP"
+    assert summary["shipping"] == 0.0
+    assert summary["voucher_discount"] == 15.0
+    assert summary["total"] == 85.0
+
+
+def test_unknown_voucher_is_ignored():
+    summary = pricing.summarize([(10, 1, 1)], PRICES, "NOPE")
+    assert summary["voucher"] is None and summary["voucher_discount"] == 0.0
+
+
+def test_total_never_goes_below_zero():
+    summary = pricing.summarize([(10, 3, 1)], PRICES, "FREESHIP")
+    assert summary["voucher_discount"] == 4.0
+    assert summary["total"] == 0.0
+
+
+def test_tax_is_on_goods_after_the_voucher(monkeypatch):
+    monkeypatch.setattr(pricing, "TAX_RATE", 0.1)
+    summary = pricing.summarize([(10, 1, 1)], PRICES, "FREESHIP")
+    assert summary["tax"] == 8.5
+    assert summary["total"] == 93.5
+
+
+def test_price_book_serves_filled_prices_until_the_catalog_changes():
+    book = pricing.PriceBook()
+    prices, missing, version = book.lookup([1, 2])
+    assert (prices, missing) == ({}, {1, 2})
+    book.fill(version, [(1, 100.0, None), (2, 40.0, 25)])
+
+    prices, missing, _ = book.lookup([1, 2])
+    assert prices == {1: PRICES[1], 2: PRICES[2]} and missing == set()
+
+    catalog_cache.bump()
+    prices, missing, _ = book.lookup([1, 2])
+    assert (prices, missing) == ({}, {1, 2})
+
+
+def test_price_book_drops_prices_read_before_a_catalog_change():
+    book = pricing.PriceBook()
+    _, _, version = book.lookup([1])
+    catalog_cache.bump()
+    assert book.fill(version, [(1, 100.0, None)]) == {1: PRICES[1]}
+    assert book.lookup([1])[1] == {1}
+
+
+def test_price_book_is_bounded():
+    book = pricing.PriceBook(maxsize=2)
+    _, _, version = book.lookup([1, 2, 3])
+    book.fill(version, [(1, 100.0, None), (2, 40.0, 25)])
+    book.fill(version, [(3, 4.0, None)])
+    assert book.lookup([1, 2, 3])[1] == {1, 2}
+
+
+def test_checkout_charges_the_cart_summary(client, make_user):
+    headers = make_user()
+    for product_id, quantity in ((1, 2), (3, 1)):
+        client.post("/cart", json={"product_id": product_id, "quantity": quantity}, headers=headers)
+    summary = client.get("/cart/summary", params={"voucher": "FREESHIP"}, headers=headers).json()
+
+    order = client.post("/checkout", params={"voucher": "FREESHIP"}, headers=headers).json()
+    for field in ("subtotal", "discount_total", "shipping", "voucher", "voucher_discount", "tax", "total"):
+        assert order[field] == summary[field], field
+    assert [line["line_total"] for line in order["lines"]] == [line["line_total"] for line in summary["lines"]]
@@ -0,0 +1,26 @@
+"""The sampling profiler is admin-only and reports samples by route."""
+import pytest
+
+
+@pytest.mark.parametrize("headers", [
+    {},
+    {"X-Admin-Token": "wrong"},
+])
+def test_profile_needs_the_admin_token(client, headers):
+    assert client.post("/admin/profile", params={"seconds": 0.05}, headers=headers).status_code == 403
+
+
+def test_signed_in_users_are_not_admins(client, make_user):
+    response = client.post("/admin/profile", params={"seconds": 0.05}, headers=make_user())
+    assert response.status_code == 403
+
+
+def test_admin_gets_a_profile(client, admin_headers):
+    response = client.post("/admin/profile", params={"seconds": 0.05, "interval_ms": 5}, headers=admin_headers)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["samples"] > 0
+    assert set(result) == {"seconds", "interval_ms", "samples", "routes", "collapsed"}
+
+    collapsed = client.post("/admin/profile", params={"seconds": 0.05, "format": "collapsed"}, headers=admin_headers)
+    assert collapsed.headers["content-type"].startswith("text/plain")
@@ -0,0 +1,46 @@
+"""Cart and favorites are read with a fixed number of statements, however
+many rows the user has."""
+import re
+
+import pytest
+from sqlalchemy import select
+
+import metrics
+import models
+
+ROW_COUNTS = (1, 4, 12)
+
+
+def count_queries(client, path: str, headers: dict) -> int:
+    """Statements the request for `path` ran, as attributed to it by the
+    metrics middleware's engine hooks (background work isn't counted)."""
+    metrics.registry.reset()
+    assert client.get(path, headers=headers).status_code == 200
+    found = re.search(rf'^db_queries_total{{method="GET",route="{path}"}} (\d+)$', metrics.registry.render(), re.M)
+    return int(found.group(1))
+
+
+@pytest.fixture(scope="module")
+def product_ids(client):
+    with models.engine.connect() as conn:
+        ids = conn.execute(select(models.Product.id).order_by(models.Product.id)).scalars().all()
+    assert len(ids) >= max(ROW_COUNTS)
+    return ids
+
+
+@pytest.mark.parametrize("path, add", [
+    ("/cart", lambda client, product_id, headers: client.post(
+        "/cart", json={"product_id": product_id, "quantity": 2}, headers=headers)),
+    ("/favorites", lambda client, product_id, headers: client.post(
+        "/favorites", json={"product_id": product_id}, headers=headers)),
+])
+def test_reads_are_constant_in_rows(client, make_user, product_ids, path, add):
+    counts = {}
+    for rows in ROW_COUNTS:
+        headers = make_user()
+        for product_id in product_ids[:rows]:
+            assert add(client, product_id, headers).status_code == 200
+        counts[rows] = count_queries(client, path, headers)
+        assert len(client.get(path, headers=headers).json()) == rows
+    assert len(set(counts.values())) == 1, counts
+    assert counts[ROW_COUNTS[0]] > 0
@@ -0,0 +1,146 @@
+"""Related-product refreshes: incremental co-occurrence counts, agreement
+with a full rebuild, the refresh lease and the generation-keyed cache."""
+import time
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+import invalidation
+import models
+import related
+
+A, B, C = 4, 9, 13
+
+
+def pair_count(a: int, b: int) -> int:
+    with models.engine.connect() as conn:
+        return conn.execute(
+            select(models.ProductPair.count).where(models.ProductPair.product_id == a, models.ProductPair.other_id == b)
+        ).scalar() or 0
+
+
+def suggestions() -> list:
+    with models.engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(
+            select(models.RelatedProduct.product_id, models.RelatedProduct.rank,
+                   models.RelatedProduct.related_id, models.RelatedProduct.score)
+            .order_by(models.RelatedProduct.product_id, models.RelatedProduct.rank)
+        )]
+
+
+def lease() -> tuple:
+    with models.engine.connect() as conn:
+        return tuple(conn.execute(
+            select(models.RelatedState.lease_owner, models.RelatedState.lease_until).where(models.RelatedState.id == 1)
+        ).one())
+
+
+@pytest.fixture
+def settled(client):
+    """Wait out the refresh the app starts on boot, then bring the
+    suggestions up to date."""
+    deadline = time.monotonic() + 10
+    while related.refresh(models.engine)["generation"] == 0 or lease()[0] is not None:
+        assert time.monotonic() < deadline, "the startup refresh never finished"
+        time.sleep(0.05)
+
+
+def favorite(client, headers, *product_ids):
+    for product_id in product_ids:
+        assert client.post("/favorites", json={"product_id": product_id}, headers=headers).status_code == 200
+
+
+def test_baskets_adjust_pair_counts_incrementally(client, make_user, settled):
+    before = pair_count(A, B), pair_count(B, A), pair_count(A, C)
+    headers = make_user()
+    favorite(client, headers, A, B)
+    client.post("/cart", json={"product_id": C, "quantity": 1}, headers=headers)
+
+    report = related.refresh(models.engine)
+    assert report["users"] == 1
+    assert (pair_count(A, B), pair_count(B, A), pair_count(A, C)) == (before[0] + 1, before[1] + 1, before[2] + 1)
+
+    client.delete(f"/favorites/{B}", headers=headers)
+    related.refresh(models.engine)
+    assert (pair_count(A, B), pair_count(A, C)) == (before[0], before[2] + 1)
+
+    # Nothing changed since: nothing to do
+    assert related.refresh(models.engine)["users"] == 0
+
+
+def test_incremental_refresh_matches_a_full_rebuild(client, make_user, settled):
+    for products in ((A, B), (A, B, C), (B, C)):
+        favorite(client, make_user(), *products)
+    with models.SessionLocal() as db:
+        product = db.get(models.Product, C)
+        product.price = product.price * 3
+        db.commit()
+
+    related.refresh(models.engine)
+    incremental = suggestions()
+    related.refresh(models.engine, full=True)
+    assert suggestions() == incremental
+
+    # A co-occurring product outranks every similar-price one
+    with models.engine.connect() as conn:
+        top = conn.execute(
+            select(models.RelatedProduct.related_id)
+            .where(models.RelatedProduct.product_id == A, models.RelatedProduct.rank == 0)
+        ).scalar()
+    assert top == B
+
+
+def test_second_refresher_backs_off_while_the_lease_is_held(client, make_user, monkeypatch, settled):
+    favorite(client, make_user(), A, C)
+    competing = []
+    changed_users = related._changed_users
+
+    def refresh_meanwhile(conn):
+        competing.append(related.refresh(models.engine))
+        return changed_users(conn)
+
+    monkeypatch.setattr(related, "_changed_users", refresh_meanwhile)
+    report = related.refresh(models.engine)
+
+    assert competing[0]["users"] == 0 and competing[0]["products"] == 0
+    assert report["users"] == 1
+    assert lease() == (None, None)
+
+
+def test_expired_lease_is_taken_over(client, make_user, settled):
+    later = invalidation.utcnow() + timedelta(seconds=related.LEASE_SECONDS)
+    with models.engine.begin() as conn:
+        conn.execute(update(models.RelatedState).values(lease_owner="crashed", lease_until=later))
+    favorite(client, make_user(), B, C)
+    assert related.refresh(models.engine)["users"] == 0
+
+    with models.engine.begin() as conn:
+        conn.execute(update(models.RelatedState).values(lease_until=invalidation.utcnow() - timedelta(seconds=1)))
+    assert related.refresh(models.engine)["users"] == 1
+    assert lease() == (None, None)
+
+
+def test_writes_stop_once_the_lease_is_lost(client, settled):
+    claimed, _ = related._claim(models.engine, "slow")
+    assert claimed
+    with models.engine.begin() as conn:
+        conn.execute(update(models.RelatedState).values(lease_owner="newer"))
+    with pytest.raises(related.LeaseLost):
+        with related._writing(models.engine, "slow"):
+            pass
+    with models.engine.begin() as conn:
+        conn.execute(update(models.RelatedState).values(lease_owner=None, lease_until=None))
+
+
+def test_cached_suggestions_follow_the_generation(client, make_user, settled):
+    served = client.get(f"/products/{B}/related").json()
+    favorite(client, make_user(), B, A)
+    favorite(client, make_user(), B, A)
+    report = related.refresh(models.engine)
+
+    # Still the old generation here: the cached body is served
+    assert client.get(f"/products/{B}/related").json() == served
+    invalidation.publish(related.INVALIDATION_TOPIC, str(report["generation"]))
+    assert related.generation == report["generation"]
+    assert client.get(f"/products/{B}/related").json()[0]["id"] == A
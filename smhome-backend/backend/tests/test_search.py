@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import models
+import search
+
+
+def ids(stmt) -> list:
+    with models.engine.connect() as conn:
+        return [row.id for row in conn.execute(stmt)]
+
+
+@pytest.mark.parametrize("q", ["sofa", "oak tab", "GRAY", "chair"])
+def test_fallback_finds_what_fts_finds(client, q):
+    found = ids(search.search_products_query(q, search.MAX_LIMIT))
+    assert set(ids(search.search_fallback_query(q, search.MAX_LIMIT))) >= set(found)
+
+
+def test_fallback_ranks_name_hits_first(client):
+    ranked = ids(search.search_fallback_query("sofa", search.MAX_LIMIT))
+    with models.SessionLocal() as db:
+        names = [db.get(models.Product, product_id).name.lower() for product_id in ranked]
+    assert names == sorted(names, key=lambda name: "sofa" not in name)
+
+
+def test_other_databases_get_the_fallback():
+    stmt = search.search_products_query("oak", 5, dialect="postgresql")
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ILIKE" in sql and "products_fts" not in sql
+    assert search.search_products_query("!!", 5, dialect="postgresql") is None
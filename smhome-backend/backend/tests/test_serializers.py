@@ -0,0 +1,79 @@
+"""The row serializers must produce exactly what the response schemas make
+of the ORM objects, which is what these endpoints returned before they
+skipped Pydantic (see serializers.py)."""
+import json
+
+import pytest
+
+import catalog
+import fastjson
+import models
+import queries
+import schemas
+import serializers
+
+COLOR = {"name": "Oak", "hex": "#c8a165", "images": ["https://example.com/images/oak-1.jpg"]}
+PRODUCTS = [
+    # Discounted to a price that needs rounding to cents
+    {"name": "Discounted", "price": 19.99, "discountPercent": 15, "colors": [COLOR]},
+    # Nullable fields left null
+    {"name": "Plain", "price": 1234.5, "discountPercent": None, "colors": []},
+    {"name": "Whole", "price": 100.0, "discountPercent": 0, "colors": [COLOR, {**COLOR, "name": "Ash"}]},
+]
+
+
+def encoded(item) -> str:
+    # Compared as text so field order and int/float types count too
+    return json.dumps(json.loads(fastjson.dumps(item)))
+
+
+def expected(schema, obj) -> str:
+    return json.dumps(schema.model_validate(obj).model_dump(mode="json"))
+
+
+@pytest.fixture(scope="module")
+def owned(client):
+    """Products, and a user holding each in their cart and favorites."""
+    with models.SessionLocal() as db:
+        products = [
+            models.Product(image="https://example.com/images/main.jpg", description="", category="Test", **fields)
+            for fields in PRODUCTS
+        ]
+        user = models.User(email="serializers@example.com", hashed_password="-", username="serializers")
+        db.add_all([*products, user])
+        db.flush()
+        for position, product in enumerate(products):
+            selected = None if position == 0 else {"name": "Oak", "hex": "#c8a165"}
+            db.add(models.CartItem(user_id=user.id, product_id=product.id, quantity=position + 1, selected_color=selected))
+            db.add(models.Favorite(user_id=user.id, product_id=product.id))
+        db.commit()
+        return user.id, [product.id for product in products]
+
+
+def test_product_dict(client, owned):
+    _, product_ids = owned
+    with models.SessionLocal() as db:
+        for product_id in product_ids:
+            row = db.execute(catalog.product_query(product_id)).first()
+            product = db.get(models.Product, product_id)
+            assert encoded(serializers.product_dict(row)) == expected(schemas.ProductResponse, product)
+
+
+def test_cart_item_dict(client, owned):
+    user_id, _ = owned
+    with models.SessionLocal() as db:
+        rows = db.execute(queries.cart_items(user_id)).all()
+        items = db.query(models.CartItem).filter_by(user_id=user_id).order_by(models.CartItem.id).all()
+        assert len(rows) == len(items) == len(PRODUCTS)
+        for row, item in zip(rows, items):
+            assert encoded(serializers.cart_item_dict(row)) == expected(schemas.CartItemResponse, item)
+
+
+def test_favorite_dict(client, owned):
+    user_id, _ = owned
+    with models.SessionLocal() as db:
+        rows = db.execute(queries.favorites(user_id)).all()
+        favorites = db.query(models.Favorite).filter_by(user_id=user_id).order_by(models.Favorite.id).all()
+        assert len(rows) == len(favorites) == len(PRODUCTS)
+        for row, favorite in zip(rows, favorites):
+            assert encoded(serializers.favorite_dict(row)) == expected(schemas.FavoriteResponse, favorite)
@@ -0,0 +1,97 @@
+"""`python startup.py init|seed` on a fresh database, and the startup
+timing report."""
+import json
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import func, inspect, select, text
+
+import database
+import models
+import startup
+
+
+def run_cli(database_url: str, command: str) -> str:
+    env = dict(os.environ, DATABASE_URL=database_url)
+    result = subprocess.run(
+        [sys.executable, "startup.py", command], cwd=os.path.dirname(startup.__file__),
+        env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+@pytest.fixture
+def fresh(tmp_path):
+    url = f"sqlite:///{tmp_path / 'fresh.db'}"
+    engine = database.make_engine(url)
+    yield url, engine
+    engine.dispose()
+
+
+def count(engine, table) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+
+def test_check_schema_fails_fast_on_an_empty_database(fresh):
+    _, engine = fresh
+    with pytest.raises(RuntimeError, match="python startup.py init"):
+        startup.check_schema(engine)
+
+
+def test_init_builds_the_schema_search_index_and_listings(fresh):
+    url, engine = fresh
+    run_cli(url, "init")
+
+    tables = set(inspect(engine).get_table_names())
+    assert set(models.Base.metadata.tables) <= tables
+    assert "products_fts" in tables
+    assert count(engine, models.Product.__table__) == 0
+    assert count(engine, models.Locale.__table__) > 0
+
+    # Running it again is harmless
+    run_cli(url, "init")
+
+
+def test_seed_loads_the_catalog_once(fresh):
+    url, engine = fresh
+    first = json.loads(run_cli(url, "seed"))
+    assert first["imported"] > 0 and first["errors"] == []
+
+    again = json.loads(run_cli(url, "seed"))
+    assert again == {"imported": 0, "skipped": 0, "errors": []}
+
+    products = count(engine, models.Product.__table__)
+    assert products == first["imported"]
+    assert count(engine, models.ProductListing.__table__) == products
+    assert count(engine, models.Inventory.__table__) == products
+    with engine.connect() as conn:
+        indexed = conn.execute(text("SELECT count(*) FROM products_fts")).scalar()
+    assert indexed == products
+
+
+def test_timer_reports_each_phase(caplog):
+    timer = startup.StartupTimer()
+    with timer.phase("schema"):
+        pass
+    with pytest.raises(ValueError):
+        with timer.phase("warm"):
+            raise ValueError
+    assert [name for name, _ in timer.phases] == ["import", "schema", "warm"]
+    assert all(seconds >= 0 for _, seconds in timer.phases)
+
+    with caplog.at_level(logging.INFO, logger="smhome.startup"):
+        timer.report()
+    message = caplog.records[-1].getMessage()
+    assert message.startswith("worker ready in ")
+    assert "import " in message and "schema " in message and "warm " in message
+
+
+def test_warm_catalog_fills_every_category_slice(client):
+    with models.engine.connect() as conn:
+        categories = conn.execute(select(func.count(models.ProductListing.category.distinct()))).scalar()
+    assert startup.warm_catalog(models.engine) == categories + 1
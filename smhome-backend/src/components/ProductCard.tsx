@@ -62,20 +62,20 @@ const ProductCard: React.FC<ProductCardProps> = ({ product }) => {
           {product.discountPercent ? (
             <>
               <span className="original-price">
-                ${product.price.toFixed(2)}
+                {product.localPrice?.formatted ?? `$${product.price.toFixed(2)}`}
               </span>{' '}
               <span className="discounted-price">
-                ${(product.price * (1 - product.discountPercent / 100)).toFixed(2)}
+                {product.localPrice?.formattedEffective ?? `$${(product.price * (1 - product.discountPercent / 100)).toFixed(2)}`}
               </span>
               <span className="discount-badge">
                 -{product.discountPercent}%
               </span>
             </>
           ) : (
-            <span>${product.price.toFixed(2)}</span>
+            <span>{product.localPrice?.formatted ?? `$${product.price.toFixed(2)}`}</span>
           )}
         </div>
-        <p className="product-category">Category: {product.category}</p>
+        <p className="product-category">Category: {product.categoryLabel ?? product.category}</p>
       </div>
     </div>
   );
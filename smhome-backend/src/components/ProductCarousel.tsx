@@ -1,22 +1,32 @@
 import React, { useEffect, useState } from 'react';
 import Slider from 'react-slick';
 import { type Product } from '../types/Product';
+import { catalogHeaders } from '../i18n';
 import 'slick-carousel/slick/slick.css';
 import 'slick-carousel/slick/slick-theme.css';
 import '../styles/ProductCarousel.css';
 
-const ProductCarousel: React.FC = () => {
+interface ProductCarouselProps {
+  // Show suggestions related to this product instead of featured products
+  productId?: number;
+  title?: string;
+}
+
+const ProductCarousel: React.FC<ProductCarouselProps> = ({ productId, title = 'Featured Products' }) => {
   const [products, setProducts] = useState<Product[]>([]);
 
   useEffect(() => {
-    fetch('http://127.0.0.1:8000/products')
+    // Related products are precomputed server-side; featured ones are the first 5
+    const url = productId !== undefined
+      ? `http://127.0.0.1:8000/products/${productId}/related?limit=5`
+      : 'http://127.0.0.1:8000/products?limit=5';
+    fetch(url, { headers: catalogHeaders() })
       .then((res) => res.json())
       .then((data) => {
-        // Slice to get only the first 5 items for the carousel
         setProducts(data.slice(0, 5));
       })
       .catch((err) => console.error('Error fetching carousel products:', err));
-  }, []);
+  }, [productId]);
 
   const settings = {
     dots: true,
@@ -45,7 +55,7 @@ const ProductCarousel: React.FC = () => {
 
   return (
     <div className="product-carousel">
-      <h2>Featured Products</h2>
+      <h2>{title}</h2>
       <Slider {...settings}>
         {products.map((product) => (
           <div key={product.id} className="carousel-slide">
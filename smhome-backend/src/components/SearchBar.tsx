@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { FaSearch } from 'react-icons/fa';
 import { useNavigate } from 'react-router-dom';
 import { type Product } from '../types/Product';
@@ -7,27 +7,22 @@ import '../styles/SearchBar.css';
 const SearchBar: React.FC = () => {
   const [query, setQuery] = useState('');
   const [isFocused, setIsFocused] = useState(false);
-  const [allProducts, setAllProducts] = useState<Product[]>([]);
   const navigate = useNavigate();
 
-  // Fetch all products on mount to have data ready for searching
-  useEffect(() => {
-    fetch('http://127.0.0.1:8000/products')
-      .then((res) => res.json())
-      .then((data) => setAllProducts(data))
-      .catch((err) => console.error('Error loading products for search:', err));
-  }, []);
-
-  const handleSubmit = (e: React.FormEvent) => {
+  const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!query.trim()) return;
 
-    // Filter products by name or description using the fetched data
-    const results = allProducts.filter(
-      (product) =>
-        product.name.toLowerCase().includes(query.toLowerCase()) ||
-        product.description.toLowerCase().includes(query.toLowerCase())
-    );
+    // Ranked full-text search on the server (name, description, category, colors)
+    let results: Product[] = [];
+    try {
+      const res = await fetch(
+        `http://127.0.0.1:8000/products/search?q=${encodeURIComponent(query)}&limit=50`
+      );
+      results = await res.json();
+    } catch (err) {
+      console.error('Error searching products:', err);
+    }
 
     // Navigate to products page with search results
     navigate('/products', { state: { searchResults: results, query } });
@@ -52,4 +47,4 @@ const SearchBar: React.FC = () => {
   );
 };
 
-export default SearchBar;
\ No newline at end of file
+export default SearchBar;
\ No newline at end of file
@@ -2,34 +2,69 @@
 /* eslint-disable react-refresh/only-export-components */
 import React, { createContext, useContext, useState, useEffect } from 'react';
 import { type Product } from '../types/Product';
+import { subscribeServerEvents } from './serverEvents';
 
 interface CartContextType {
   cartItems: Product[];
   addToCart: (product: Product, selectedColor?: any) => void;
   removeFromCart: (id: number) => void;
+  // Bumped whenever the server-side cart has changed, here or elsewhere
+  revision: number;
 }
 
 const CartContext = createContext<CartContextType | undefined>(undefined);
 
+// Backend cart lines ({ product, selected_color, ... }) as cart entries
+const toCartProduct = (item: any): Product => ({
+  ...item.product,
+  selectedColor: item.selected_color // Restore selected color
+});
+
+const isLine = (product: Product, productId: number, color: any) =>
+  product.id === productId && (product.selectedColor?.name ?? null) === (color?.name ?? null);
+
 export const CartProvider: React.FC<{ children: React.ReactNode }> = ({ children }) => {
   const [cartItems, setCartItems] = useState<Product[]>([]);
+  const [revision, setRevision] = useState(0);
   const token = localStorage.getItem('token');
 
   // Load Cart
   useEffect(() => {
     if (token) {
-      // Server-side
-      fetch('http://127.0.0.1:8000/cart', {
-        headers: { Authorization: `Bearer ${token}` }
+      // Server-side. A guest cart left in localStorage is merged in the same
+      // request, as one batch of add operations.
+      const saved = localStorage.getItem('cart');
+      const guestItems: Product[] = saved ? JSON.parse(saved) : [];
+      const request = guestItems.length > 0
+        ? fetch('http://127.0.0.1:8000/cart', {
+            method: 'PATCH',
+            headers: {
+              'Content-Type': 'application/json',
+              Authorization: `Bearer ${token}`
+            },
+            body: JSON.stringify({
+              operations: guestItems.map(item => ({
+                op: 'add',
+                product_id: item.id,
+                quantity: 1,
+                selected_color: item.selectedColor
+              }))
+            })
+          })
+        : fetch('http://127.0.0.1:8000/cart', {
+            headers: { Authorization: `Bearer ${token}` }
+          });
+
+      request
+      .then(res => {
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        if (guestItems.length > 0) localStorage.removeItem('cart');
+        return res.json();
       })
-      .then(res => res.json())
       .then(data => {
         // Transform backend response to Product format
-        const products = data.map((item: any) => ({
-          ...item.product,
-          selectedColor: item.selected_color // Restore selected color
-        }));
-        setCartItems(products);
+        setCartItems(data.map(toCartProduct));
+        setRevision(r => r + 1);
       })
       .catch(err => console.error("Failed to load cart", err));
     } else {
@@ -39,6 +74,41 @@ export const CartProvider: React.FC<{ children: React.ReactNode }> = ({ children
     }
   }, [token]);
 
+  // Apply changes made from other tabs and devices as they are pushed
+  useEffect(() => {
+    if (!token) return;
+    const changed = () => setRevision(r => r + 1);
+    return subscribeServerEvents(token, {
+      'cart.item': item => {
+        setCartItems(prev => prev.some(p => isLine(p, item.product.id, item.selected_color))
+          ? prev
+          : [...prev, toCartProduct(item)]);
+        changed();
+      },
+      'cart.removed': ({ product_id, selected_color }) => {
+        // No color means every color of the product
+        setCartItems(prev => prev.filter(p => selected_color == null
+          ? p.id !== product_id
+          : !isLine(p, product_id, selected_color)));
+        changed();
+      },
+      'cart.cleared': () => {
+        setCartItems([]);
+        changed();
+      },
+      // Events may have been missed; load the whole cart once
+      reset: () => {
+        fetch('http://127.0.0.1:8000/cart', { headers: { Authorization: `Bearer ${token}` } })
+        .then(res => res.json())
+        .then(data => {
+          setCartItems(data.map(toCartProduct));
+          changed();
+        })
+        .catch(err => console.error("Failed to reload cart", err));
+      }
+    });
+  }, [token]);
+
   // Save Client-side Cart
   useEffect(() => {
     if (!token) {
@@ -88,7 +158,7 @@ export const CartProvider: React.FC<{ children: React.ReactNode }> = ({ children
   };
 
   return (
-    <CartContext.Provider value={{ cartItems, addToCart, removeFromCart }}>
+    <CartContext.Provider value={{ cartItems, addToCart, removeFromCart, revision }}>
       {children}
     </CartContext.Provider>
   );
@@ -1,9 +1,13 @@
+/* eslint-disable @typescript-eslint/no-explicit-any */
 /* eslint-disable react-refresh/only-export-components */
-import React, { createContext, useContext, useState, useEffect } from 'react';
+import React, { createContext, useContext, useState, useEffect, useCallback, useRef } from 'react';
 import { type Product } from '../types/Product';
+import { subscribeServerEvents } from './serverEvents';
 
 interface FavoritesContextType {
+  // The full list is only downloaded by loadFavorites(); isFavorite() needs just the ids
   favorites: Product[];
+  loadFavorites: () => void;
   addToFavorites: (product: Product) => void;
   removeFromFavorites: (id: number) => void;
   isFavorite: (id: number) => boolean;
@@ -11,33 +15,83 @@ interface FavoritesContextType {
 
 const FavoritesContext = createContext<FavoritesContextType | undefined>(undefined);
 
+const withId = (ids: Set<number>, id: number) => ids.has(id) ? ids : new Set(ids).add(id);
+
+const withoutId = (ids: Set<number>, id: number) => {
+  if (!ids.has(id)) return ids;
+  const next = new Set(ids);
+  next.delete(id);
+  return next;
+};
+
 export const FavoritesProvider: React.FC<{ children: React.ReactNode }> = ({ children }) => {
   const [favorites, setFavorites] = useState<Product[]>([]);
+  const [favoriteIds, setFavoriteIds] = useState<Set<number>>(new Set());
+  const listLoaded = useRef(false);
   const token = localStorage.getItem('token');
 
+  const loadFavoriteIds = useCallback(() => {
+    fetch('http://127.0.0.1:8000/favorites/ids', {
+      headers: { Authorization: `Bearer ${token}` }
+    })
+    .then(res => res.json())
+    .then(data => setFavoriteIds(new Set(data.product_ids)))
+    .catch(err => console.error("Failed to load favorites from server", err));
+  }, [token]);
+
+  const loadFavorites = useCallback(() => {
+    if (!token) return;
+    listLoaded.current = true;
+    fetch('http://127.0.0.1:8000/favorites', {
+      headers: { Authorization: `Bearer ${token}` }
+    })
+    .then(res => res.json())
+    .then(data => {
+      // Backend returns a list of wrapper objects with a "product" key
+      // We map it to get just the Product array
+      const products: Product[] = data.map((item: any) => item.product);
+      setFavorites(products);
+      setFavoriteIds(new Set(products.map(p => p.id)));
+    })
+    .catch(err => console.error("Failed to load favorites from server", err));
+  }, [token]);
+
   // Load Favorites on Mount or Auth Change
   useEffect(() => {
+    listLoaded.current = false;
     if (token) {
-      // 1. If Logged In: Fetch from Backend
-      fetch('http://127.0.0.1:8000/favorites', {
-        headers: { Authorization: `Bearer ${token}` }
-      })
-      .then(res => res.json())
-      .then(data => {
-        // Backend returns a list of wrapper objects with a "product" key
-        // We map it to get just the Product array
-        const products = data.map((item: any) => item.product);
-        setFavorites(products);
-      })
-      .catch(err => console.error("Failed to load favorites from server", err));
+      // 1. If Logged In: just the ids, enough to mark every product card
+      loadFavoriteIds();
     } else {
       // 2. If Guest: Load from LocalStorage
       const saved = localStorage.getItem('favorites');
       if (saved) {
-        setFavorites(JSON.parse(saved));
+        const products: Product[] = JSON.parse(saved);
+        setFavorites(products);
+        setFavoriteIds(new Set(products.map(p => p.id)));
       }
     }
-  }, [token]);
+  }, [token, loadFavoriteIds]);
+
+  // Apply favorites toggled in other tabs and devices as they are pushed
+  useEffect(() => {
+    if (!token) return;
+    return subscribeServerEvents(token, {
+      'favorite.added': (item: any) => {
+        setFavoriteIds(prev => withId(prev, item.product.id));
+        setFavorites(prev => prev.some(p => p.id === item.product.id) ? prev : [...prev, item.product]);
+      },
+      'favorite.removed': ({ product_id }) => {
+        setFavoriteIds(prev => withoutId(prev, product_id));
+        setFavorites(prev => prev.filter(p => p.id !== product_id));
+      },
+      // Events may have been missed; load again whatever was loaded
+      reset: () => {
+        if (listLoaded.current) loadFavorites();
+        else loadFavoriteIds();
+      }
+    });
+  }, [token, loadFavorites, loadFavoriteIds]);
 
   // Save to LocalStorage (Only for Guests)
   useEffect(() => {
@@ -48,6 +102,7 @@ export const FavoritesProvider: React.FC<{ children: React.ReactNode }> = ({ chi
 
   const addToFavorites = async (product: Product) => {
     // Optimistic Update: Update UI immediately
+    setFavoriteIds(prev => withId(prev, product.id));
     setFavorites((prev) => {
       if (prev.some(p => p.id === product.id)) return prev;
       return [...prev, product];
@@ -72,6 +127,7 @@ export const FavoritesProvider: React.FC<{ children: React.ReactNode }> = ({ chi
 
   const removeFromFavorites = async (id: number) => {
     // Optimistic Update
+    setFavoriteIds(prev => withoutId(prev, id));
     setFavorites((prev) => prev.filter(p => p.id !== id));
 
     // If logged in, sync with server
@@ -88,11 +144,11 @@ export const FavoritesProvider: React.FC<{ children: React.ReactNode }> = ({ chi
   };
 
   const isFavorite = (id: number) => {
-    return favorites.some(p => p.id === id);
+    return favoriteIds.has(id);
   };
 
   return (
-    <FavoritesContext.Provider value={{ favorites, addToFavorites, removeFromFavorites, isFavorite }}>
+    <FavoritesContext.Provider value={{ favorites, loadFavorites, addToFavorites, removeFromFavorites, isFavorite }}>
       {children}
     </FavoritesContext.Provider>
   );
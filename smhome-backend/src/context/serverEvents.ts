@@ -0,0 +1,37 @@
+/* eslint-disable @typescript-eslint/no-explicit-any */
+// Cart and favorites changes pushed by the backend (GET /events). One
+// EventSource per tab is shared by every listener; it reconnects on its own
+// and resumes from the last event it saw.
+
+type Handlers = Record<string, (data: any) => void>;
+
+const EVENT_TYPES = ['cart.item', 'cart.removed', 'cart.cleared', 'favorite.added', 'favorite.removed', 'reset'];
+
+let source: EventSource | null = null;
+let sourceToken: string | null = null;
+const listeners = new Set<Handlers>();
+
+export const subscribeServerEvents = (token: string, handlers: Handlers) => {
+  if (!source || sourceToken !== token) {
+    source?.close();
+    // EventSource can't send an Authorization header
+    source = new EventSource(`http://127.0.0.1:8000/events?token=${encodeURIComponent(token)}`);
+    sourceToken = token;
+    EVENT_TYPES.forEach(type => {
+      source!.addEventListener(type, event => {
+        const data = JSON.parse((event as MessageEvent).data);
+        listeners.forEach(listener => listener[type]?.(data));
+      });
+    });
+  }
+  listeners.add(handlers);
+
+  return () => {
+    listeners.delete(handlers);
+    if (listeners.size === 0) {
+      source?.close();
+      source = null;
+      sourceToken = null;
+    }
+  };
+};
@@ -23,4 +23,7 @@ i18n
     }
   });
 
+// Lets the backend answer catalog requests in the selected language
+export const catalogHeaders = () => ({ 'Accept-Language': i18n.language });
+
 export default i18n;
\ No newline at end of file
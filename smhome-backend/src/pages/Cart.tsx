@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import '../styles/Cart.css';
 import VisaCard from '../assets/VisaCard.png';
 import MasterCard from '../assets/MasterCard.png';
@@ -6,10 +6,22 @@ import PayPal from '../assets/PayPal.png';
 import { useFavorites } from '../context/FavoritesContext';
 import { useCart } from '../context/CartContext';
 
+// Totals priced by the server (GET /cart/summary)
+interface CartSummary {
+  item_count: number;
+  subtotal: number;
+  shipping: number;
+  voucher: string | null;
+  voucher_discount: number;
+  tax: number;
+  total: number;
+}
 
 const Cart: React.FC = () => {
 
-  const { cartItems, removeFromCart } = useCart();
+  const { cartItems, removeFromCart, revision } = useCart();
+  const token = localStorage.getItem('token');
+  const [summary, setSummary] = useState<CartSummary | null>(null);
 
   const [voucherCode, setVoucherCode] = useState('');
   const [appliedVoucher, setAppliedVoucher] = useState(false);
@@ -21,11 +33,30 @@ const Cart: React.FC = () => {
     country: 'United States',
   });
 
-  const subtotal = cartItems.reduce((sum, item) => sum + item.price, 0);
-  const shipping = appliedVoucher ? 0 : 9.99;
-  const voucherDiscount = appliedVoucher ? 15.00 : 0;
+  // Signed-in carts are priced by the server; only a guest cart is totalled here
+  useEffect(() => {
+    if (!token) return;
+    const query = appliedVoucher ? `?voucher=${encodeURIComponent(voucherCode.trim())}` : '';
+    fetch(`http://127.0.0.1:8000/cart/summary${query}`, {
+      headers: { Authorization: `Bearer ${token}` }
+    })
+      .then(res => {
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        return res.json();
+      })
+      .then(data => setSummary(data))
+      .catch(err => console.error("Failed to load cart summary", err));
+    // The voucher code only matters once it has been applied
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [token, revision, appliedVoucher]);
+
+  const itemCount = summary ? summary.item_count : cartItems.length;
+  const subtotal = summary ? summary.subtotal : cartItems.reduce((sum, item) => sum + (item.effectivePrice ?? item.price), 0);
+  const shipping = summary ? summary.shipping : (appliedVoucher ? 0 : 9.99);
+  const voucherDiscount = summary ? summary.voucher_discount : (appliedVoucher ? 15.00 : 0);
+  const tax = summary ? summary.tax : 0;
   // Ensure total doesn't go below zero
-  const total = Math.max(0, subtotal + shipping - voucherDiscount);
+  const total = summary ? summary.total : Math.max(0, subtotal + shipping - voucherDiscount);
 
   const applyVoucher = () => {
     if (voucherCode.trim().toLowerCase() === 'freeship') {
@@ -149,7 +180,7 @@ const Cart: React.FC = () => {
             {/* Price Breakdown */}
             <div className="price-breakdown">
               <div className="price-row">
-                <span>Subtotal ({cartItems.length} items)</span>
+                <span>Subtotal ({itemCount} items)</span>
                 <span>${subtotal.toFixed(2)}</span>
               </div>
               <div className="price-row">
@@ -162,6 +193,12 @@ const Cart: React.FC = () => {
                 <span>Voucher Discount</span>
                 <span style={{ color: 'green' }}>-${voucherDiscount.toFixed(2)}</span>
               </div>
+              {tax > 0 && (
+                <div className="price-row">
+                  <span>Tax</span>
+                  <span>${tax.toFixed(2)}</span>
+                </div>
+              )}
               <div className="price-total">
                 <strong>Total Payment</strong>
                 <strong>${total.toFixed(2)}</strong>
@@ -1,10 +1,14 @@
-import React from 'react';
+import React, { useEffect } from 'react';
 import ProductCard from '../components/ProductCard';
 import { useFavorites } from '../context/FavoritesContext';
 import '../styles/Favorites.css';
 
 const Favorites: React.FC = () => {
-  const { favorites } = useFavorites();
+  const { favorites, loadFavorites } = useFavorites();
+
+  useEffect(() => {
+    loadFavorites();
+  }, [loadFavorites]);
 
   return (
     <div className="favorites">
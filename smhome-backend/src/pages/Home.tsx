@@ -6,6 +6,7 @@ import 'slick-carousel/slick/slick-theme.css';
 import ProductCard from '../components/ProductCard';
 import '../styles/Home.css';
 import { type Product } from '../types/Product';
+import { catalogHeaders } from '../i18n';
 import { useCart } from '../context/CartContext'; // Import context hook
 
 import IntroVideo1 from '../assets/videos/intro-1.mp4';
@@ -26,7 +27,7 @@ const Home: React.FC = () => {
 
   // Fetch Products from Backend
   useEffect(() => {
-    fetch('http://127.0.0.1:8000/products')
+    fetch('http://127.0.0.1:8000/products', { headers: catalogHeaders() })
       .then(res => res.json())
       .then(data => {
         setProducts(data);
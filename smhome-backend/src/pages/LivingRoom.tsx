@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import ProductCard from '../components/ProductCard';
 import { type Product } from '../types/Product';
+import { catalogHeaders } from '../i18n';
 import '../styles/Products.css';
 
 interface LivingRoomProps {
@@ -12,7 +13,7 @@ const LivingRoom: React.FC<LivingRoomProps> = ({ addToCart }) => {
   const [loading, setLoading] = useState<boolean>(true);
 
   useEffect(() => {
-    fetch('http://127.0.0.1:8000/products')
+    fetch('http://127.0.0.1:8000/products?category=Living%20Room', { headers: catalogHeaders() })
       .then(res => res.json())
       .then(data => {
         setProducts(data);
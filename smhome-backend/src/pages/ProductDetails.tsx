@@ -1,6 +1,8 @@
 import React, { useState, useEffect } from 'react';
 import { useParams } from 'react-router-dom';
 import { type Product } from '../types/Product';
+import { catalogHeaders } from '../i18n';
+import ProductCarousel from '../components/ProductCarousel';
 import '../styles/ProductDetails.css';
 
 interface ProductDetailsProps {
@@ -21,7 +23,7 @@ const ProductDetails: React.FC<ProductDetailsProps> = ({ addToCart }) => {
   // Fetch product from backend
   useEffect(() => {
     setLoading(true);
-    fetch(`http://127.0.0.1:8000/products/${id}`)
+    fetch(`http://127.0.0.1:8000/products/${id}`, { headers: catalogHeaders() })
       .then((res) => {
         if (!res.ok) throw new Error('Product not found');
         return res.json();
@@ -89,21 +91,21 @@ const ProductDetails: React.FC<ProductDetailsProps> = ({ addToCart }) => {
             {product.discountPercent ? (
               <>
                 <span className="original-price">
-                  ${product.price.toFixed(2)}
+                  {product.localPrice?.formatted ?? `$${product.price.toFixed(2)}`}
                 </span>{' '}
                 <span className="discounted-price">
-                  ${(product.price * (1 - product.discountPercent / 100)).toFixed(2)}
+                  {product.localPrice?.formattedEffective ?? `$${(product.price * (1 - product.discountPercent / 100)).toFixed(2)}`}
                 </span>
                 <span className="discount-badge">
                   -{product.discountPercent}%
                 </span>
               </>
             ) : (
-              <span>${product.price.toFixed(2)}</span>
+              <span>{product.localPrice?.formatted ?? `$${product.price.toFixed(2)}`}</span>
             )}
           </div>
           
-          <p className="product-category">Category: {product.category}</p>
+          <p className="product-category">Category: {product.categoryLabel ?? product.category}</p>
           
           <div className="color-selector">
             <p className="color-label">Color:</p>
@@ -146,6 +148,8 @@ const ProductDetails: React.FC<ProductDetailsProps> = ({ addToCart }) => {
           </div>
         </div>
       </div>
+
+      <ProductCarousel productId={product.id} title="You may also like" />
     </div>
   );
 };
@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { useLocation, useNavigate } from 'react-router-dom';
 import ProductCard from '../components/ProductCard';
 import { type Product } from '../types/Product';
+import { catalogHeaders } from '../i18n';
 import '../styles/Products.css';
 
 interface ProductsProps {
@@ -22,7 +23,7 @@ const Products: React.FC<ProductsProps> = ({ addToCart }) => {
 
   // Fetch all products from the backend on mount
   useEffect(() => {
-    fetch('http://127.0.0.1:8000/products')
+    fetch('http://127.0.0.1:8000/products', { headers: catalogHeaders() })
       .then((res) => res.json())
       .then((data) => {
         setProducts(data);
@@ -6,6 +6,17 @@ export interface Product {
   description: string;
   category: string;
   discountPercent?: number;
+  effectivePrice?: number; // price after discount, computed by the backend
+
+  // Present when the backend answered in a locale other than its own
+  categoryLabel?: string;
+  localPrice?: {
+    currency: string;
+    price: number;
+    effectivePrice: number | null;
+    formatted: string;
+    formattedEffective: string | null;
+  };
 
   colors: {
     name: string;